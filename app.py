@@ -1,87 +1,71 @@
 import random
-from datetime import datetime, timedelta
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash, abort
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session
-from models import db, User, Product, Video, Order, OrderItem 
+from datetime import datetime
+from flask import Flask, Blueprint, current_app, render_template, request, jsonify, session, redirect, url_for, flash, abort, send_file, make_response
+from models import db, User, Product, Video
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
-from werkzeug.utils import secure_filename
-from PIL import Image
-from flask_migrate import Migrate
-import requests
-import base64
-import json
+from werkzeug.utils import secure_filename, safe_join
+from werkzeug.http import is_resource_modified
+from flask_migrate import Migrate, stamp
+from markupsafe import Markup
+import click
+import hashlib
 import os
 import traceback
+from urllib.parse import quote
 
 
-# Importar configuración desde config.py
+# Importar configuración desde config.py (también carga .env)
 from config import Config
 
-app = Flask(__name__)
-app.config.from_object(Config)
-
-# ✅ INICIALIZAR DB PRIMERO - CORREGIDO
-from models import db
-db.init_app(app)
-migrate = Migrate(app, db)
-
-# ✅ DIAGNÓSTICO
-print("🔍 DIAGNÓSTICO DE PLANTILLAS:")
-print(f"Directorio actual: {os.getcwd()}")
-print(f"¿Existe templates/? {os.path.exists('templates')}")
-print(f"¿Existe templates/login.html? {os.path.exists('templates/login.html')}")
-
-app.config['UPLOAD_FOLDER'] = 'static/uploads'
-app.config['VIDEO_UPLOAD_FOLDER'] = 'static/videos'
-app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024
-app.config['ALLOWED_EXTENSIONS'] = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
-app.config['ALLOWED_VIDEO_EXTENSIONS'] = {'mp4', 'mov', 'avi', 'wmv', 'webm', 'mkv'}
-
-# Asegurar que las carpetas existan
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-os.makedirs(app.config['VIDEO_UPLOAD_FOLDER'], exist_ok=True)
+# Todas las rutas viven en este blueprint; create_app() (al final del archivo)
+# arma la aplicación. Importar este módulo no abre conexiones ni toca la base de datos.
+bp = Blueprint('main', __name__, cli_group=None)
+migrate = Migrate()
 
 def allowed_file(filename):
     return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
+           filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
 
 def allowed_video_file(filename):
     return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_VIDEO_EXTENSIONS']
+           filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_VIDEO_EXTENSIONS']
+
+@bp.app_template_global()
+def video_mime_type(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if filename and '.' in filename else ''
+    return current_app.config['VIDEO_MIME_TYPES'].get(extension, 'application/octet-stream')
 
 # Configuración de Flask-Login
 login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'login'
+login_manager.login_view = 'main.login'
 
 # ✅ IMPORTAR MODELOS DESPUÉS DE INICIALIZAR DB
-from models import Product, User, Cart, CartItem, Order, OrderItem, Video, Venta
-
-# Cargar variables de entorno
-def load_environment():
-    try:
-        if os.path.exists('.env'):
-            with open('.env', 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#') and '=' in line:
-                        key, value = line.split('=', 1)
-                        os.environ.setdefault(key, value)
-            print("✅ Variables cargadas desde .env")
-        else:
-            print("🌐 Usando variables de entorno del sistema")
-    except Exception as e:
-        print(f"⚠️ Error cargando entorno: {e}")
-
-load_environment()
-
-# Configuración de PayPal
-PAYPAL_CLIENT_ID = os.environ.get('PAYPAL_CLIENT_ID', '')
-PAYPAL_CLIENT_SECRET = os.environ.get('PAYPAL_CLIENT_SECRET', '')
-PAYPAL_MODE = os.environ.get('PAYPAL_MODE', 'sandbox')
-PAYPAL_BASE_URL = "https://api-m.paypal.com" if PAYPAL_MODE == "live" else "https://api-m.sandbox.paypal.com"
+from models import Product, User, Cart, CartItem, Video, Venta
+from search import search_products, search_sort_keys, ensure_search_index
+from fuzzy import fuzzy_products, FUZZY_LIMIT
+from catalog import CatalogFilters, catalog_facets, catalog_categories
+from suggest import suggest_index, DEFAULT_LIMIT as SUGGEST_LIMIT, MAX_LIMIT as SUGGEST_MAX_LIMIT
+from pagination import Page, InvalidCursor, paginate_request, next_page_url, link_header
+from cache import home_cache, catalog_cache, invalidate_home_products, invalidate_home_videos
+from cart_service import (load_cart, add_cart_item, remove_cart_item, order_total,
+                          apply_cart_operations, CartOperationError)
+from images import enqueue_product_image, delete_variants
+from assets import asset_url, is_fingerprinted
+from rollups import backfill_rollups, sales_summary
+from stats import get_dashboard_stats, invalidate_dashboard_stats, stats_cache
+from identity import load_identity, invalidate_identity, identity_cache
+from inventory import (reserve_cart, release_reservations, attach_order, check_reservations, reserved_lines,
+                       release_expired_reservations, start_reservation_sweeper)
+from orders import find_order, place_order, payer_details, captured_amount, OrderError
+from synthetic import generate
+from query_stats import init_query_stats, query_budget
+from db_routing import init_db_routing, replica_read, router as db_router
+from uploads import (UploadError, create_upload, load_upload, parse_checksum,
+                     append_chunk, complete_upload, discard_upload)
+
+# PayPal: token cacheado, Session con pool y timeouts (ver paypal_client.py)
+from paypal_client import paypal, PayPalError
 
 # 🔥 DECORADORES PARA CONTROL DE ACCESO
 def admin_required(f):
@@ -102,52 +86,61 @@ def master_admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def upload_path(folder_key, filename):
+    """Ruta donde guardar un archivo subido; la carpeta se crea la primera vez que se usa"""
+    folder = current_app.config[folder_key]
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, filename)
+
 # Función para obtener access token de PayPal
 def get_paypal_access_token():
     try:
-        auth = base64.b64encode(f"{PAYPAL_CLIENT_ID}:{PAYPAL_CLIENT_SECRET}".encode()).decode()
-        headers = {
-            "Content-Type": "application/x-www-form-urlencoded",
-            "Authorization": f"Basic {auth}"
-        }
-        data = {"grant_type": "client_credentials"}
-        
-        response = requests.post(f"{PAYPAL_BASE_URL}/v1/oauth2/token", headers=headers, data=data)
-        if response.status_code == 200:
-            return response.json()["access_token"]
-        else:
-            print(f"Error PayPal: {response.text}")
-            return None
-    except Exception as e:
+        return paypal.get_access_token()
+    except PayPalError as e:
         print(f"Error obteniendo token PayPal: {e}")
         return None
 
 # RUTAS DE PRUEBA PARA DIAGNÓSTICO
-@app.route('/health')
+@bp.route('/health')
 def health_check():
     return "✅ HEALTH CHECK - APP RUNNING", 200
 
 
 
 
-@app.route('/')
+def render_featured_products():
+    featured_products = Product.query.filter(Product.featured == True).limit(6).all()
+    
+    print(f"🔍 Página principal - Productos destacados encontrados: {len(featured_products)}")
+    
+    # DEBUG: Imprimir los productos que se están enviando a la plantilla
+    for i, p in enumerate(featured_products):
+        print(f"   Producto {i+1}: {p.name} - ${p.price} - {p.category}")
+    
+    return Markup(render_template('partials/home_featured_products.html',
+                                  featured_products=featured_products))
+
+def render_featured_video():
+    featured_video = Video.query.filter_by(is_featured=True).first()
+    return Markup(render_template('partials/home_featured_video.html',
+                                  featured_video=featured_video))
+
+def render_other_videos():
+    other_videos = Video.query.filter_by(is_featured=False).limit(4).all()
+    return Markup(render_template('partials/home_other_videos.html',
+                                  other_videos=other_videos))
+
+@bp.route('/')
+@query_budget(6)
+@replica_read
 def index():
     try:
-        featured_products = Product.query.filter(Product.featured == True).limit(6).all()
-        featured_video = Video.query.filter_by(is_featured=True).first()
-        other_videos = Video.query.filter_by(is_featured=False).limit(4).all()
-        
-        print(f"🔍 Página principal - Productos destacados encontrados: {len(featured_products)}")
-        
-        # DEBUG: Imprimir los productos que se están enviando a la plantilla
-        for i, p in enumerate(featured_products):
-            print(f"   Producto {i+1}: {p.name} - ${p.price} - {p.category}")
-        
+        # Secciones cacheadas: solo se consultan en BD tras una edición del admin o al expirar el TTL
         return render_template(
             'index.html',
-            featured_products=featured_products,
-            featured_video=featured_video,
-            other_videos=other_videos
+            featured_products_html=home_cache.get_or_render('home:featured_products', render_featured_products),
+            featured_video_html=home_cache.get_or_render('home:featured_video', render_featured_video),
+            other_videos_html=home_cache.get_or_render('home:other_videos', render_other_videos)
         )
     except Exception as e:
         return f"""
@@ -156,11 +149,11 @@ def index():
         <pre>{traceback.format_exc()}</pre>
         """
 
-@app.route('/test')
+@bp.route('/test')
 def test():
     return "✅ Aplicación funcionando correctamente"
 
-@app.route('/test-db')
+@bp.route('/test-db')
 def test_db():
     try:
         product_count = Product.query.count()
@@ -179,11 +172,11 @@ def test_db():
 
 
 
-@app.route('/check-database')
+@bp.route('/check-database')
 def check_database():
     try:
         # Verificar conexión a la base de datos
-        with app.app_context():
+        with current_app.app_context():
             db.engine.connect()
             return {
                 'status': '✅ CONEXIÓN EXITOSA A POSTGRESQL',
@@ -194,14 +187,14 @@ def check_database():
         return {
             'status': '❌ ERROR DE CONEXIÓN',
             'error': str(e),
-            'database_url': app.config.get('SQLALCHEMY_DATABASE_URI', 'No configurada')
+            'database_url': current_app.config.get('SQLALCHEMY_DATABASE_URI', 'No configurada')
         }, 500
 
-@app.route('/init-database')
+@bp.route('/init-database')
 def init_database():
     """Inicializar base de datos con tablas y datos básicos"""
     try:
-        with app.app_context():
+        with current_app.app_context():
             # Crear todas las tablas
             db.create_all()
             print("✅ Tablas creadas en PostgreSQL")
@@ -265,33 +258,102 @@ def init_database():
         return {'status': '❌ Error', 'error': str(e)}, 500
 
 # Ruta de búsqueda
-@app.route('/search')
+@bp.route('/search')
+@query_budget(6)
+@replica_read
 def search():
     try:
         query = request.args.get('q', '').strip()
         
         if query:
-            products = Product.query.filter(
-                (Product.name.ilike(f'%{query}%')) |
-                (Product.description.ilike(f'%{query}%')) |
-                (Product.category.ilike(f'%{query}%'))
-            ).all()
+            page = paginate_request(search_products(query), search_sort_keys())
         else:
-            products = []
+            page = Page([], None, 0)
+        
+        # Si las coincidencias exactas no llenan la primera página se completan
+        # con productos parecidos ("rubr" -> "Rúbor"); ?fuzzy=0 lo desactiva
+        fuzzy = []
+        remaining = min(FUZZY_LIMIT, page.page_size - len(page))
+        if (query and remaining > 0 and request.args.get('fuzzy') != '0'
+                and not request.args.get('cursor') and not page.has_next):
+            fuzzy = fuzzy_products(query, limit=remaining, exclude=[p.id for p in page.items])
+        
+        if request.args.get('format') == 'json':
+            return products_json(page, fuzzy=fuzzy)
         
         return render_template('search_results.html', 
-                             products=products, 
+                             products=page.items + fuzzy, 
+                             fuzzy_ids={p.id for p in fuzzy},
                              query=query,
-                             search_count=len(products))
+                             search_count=len(page),
+                             fuzzy_count=len(fuzzy),
+                             page=page,
+                             next_url=next_page_url(page))
+    except InvalidCursor as e:
+        return invalid_cursor_response(e)
     except Exception as e:
         return f"Error en búsqueda: {str(e)}"
 
+# Sugerencias mientras se escribe (índice en memoria, sin consultas salvo al ponerse al día).
+# Sin @replica_read: elegir réplica ya abre una conexión y esto debe responder sin tocar la BD
+@bp.route('/search/suggest')
+@query_budget(3)
+def search_suggest():
+    try:
+        query = request.args.get('q', '')
+        limit = min(max(request.args.get('limit', SUGGEST_LIMIT, type=int), 1), SUGGEST_MAX_LIMIT)
+        suggest_index.refresh()
+        categories, products = suggest_index.suggest(query, limit)
+        response = jsonify({
+            'query': query,
+            'categories': [{'name': category, 'count': count,
+                            'url': url_for('main.products', category=category)}
+                           for category, count in categories],
+            'products': [{'id': product_id, 'name': name, 'category': category, 'price': price,
+                          'url': url_for('main.product_detail', product_id=product_id)}
+                         for product_id, name, category, price in products],
+        })
+        response.headers['Cache-Control'] = 'public, max-age=60'
+        return response
+    except Exception as e:
+        return jsonify({'error': f'Error en sugerencias: {str(e)}'}), 500
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Identidad ligera (id, username, role) cacheada por proceso: sin SELECT en cada petición
+    return load_identity(user_id)
+
+# Streaming de videos con soporte de Range (206) y sendfile
+@bp.route('/videos/<path:filename>')
+def video_stream(filename):
+    if not allowed_video_file(filename):
+        abort(404)
+    
+    folder = os.path.abspath(current_app.config['VIDEO_UPLOAD_FOLDER'])
+    path = safe_join(folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    
+    mimetype = video_mime_type(filename)
+    mode = current_app.config['VIDEO_SENDFILE_MODE']
+    
+    if mode == 'x-accel':
+        # nginx lee el archivo y atiende los Range; el worker queda libre de inmediato
+        response = current_app.response_class(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = current_app.config['VIDEO_ACCEL_PREFIX'] + quote(filename)
+    else:
+        # conditional=True: Range/206 e If-Modified-Since. En modo 'direct' el cuerpo va por
+        # wsgi.file_wrapper (gunicorn lo envía con sendfile() sin copiarlo a Python);
+        # con USE_X_SENDFILE Flask solo agrega la cabecera X-Sendfile y el proxy lo envía
+        response = send_file(path, mimetype=mimetype, conditional=True,
+                             max_age=current_app.config['VIDEO_MAX_AGE'])
+    
+    response.headers['Cache-Control'] = f"public, max-age={current_app.config['VIDEO_MAX_AGE']}"
+    response.headers['Accept-Ranges'] = 'bytes'
+    return response
 
 # Rutas de autenticación
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         username = request.form['username']
@@ -302,13 +364,13 @@ def login():
         if user and user.check_password(password):
             login_user(user)
             flash('¡Inicio de sesión exitoso!', 'success')
-            return redirect(next_page or url_for('index'))
+            return redirect(next_page or url_for('main.index'))
         else:
             flash('Usuario o contraseña incorrectos', 'danger')
     
     return render_template('login.html', next=request.args.get('next', ''))
 
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
 def register():
     if request.method == 'POST':
         username = request.form['username']
@@ -318,98 +380,192 @@ def register():
         
         if User.query.filter_by(username=username).first():
             flash('El nombre de usuario ya existe', 'danger')
-            return redirect(url_for('register'))
+            return redirect(url_for('main.register'))
         
         if User.query.filter_by(email=email).first():
             flash('El email ya está registrado', 'danger')
-            return redirect(url_for('register'))
+            return redirect(url_for('main.register'))
         
         new_user = User(username=username, email=email, role='customer')
         new_user.set_password(password)
         
         db.session.add(new_user)
         db.session.commit()
+        invalidate_dashboard_stats()
         
         login_user(new_user)
         flash('¡Registro exitoso! Bienvenido/a', 'success')
-        return redirect(next_page or url_for('index'))
+        return redirect(next_page or url_for('main.index'))
     
     return render_template('register.html', next=request.args.get('next', ''))
 
-@app.route('/logout')
+@bp.route('/logout')
 @login_required
 def logout():
     logout_user()
     session.clear()
     flash('Has cerrado sesión', 'info')
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
 # Rutas de productos
-@app.route('/products')
+@bp.route('/products')
+@query_budget(4)
+@replica_read
 def products():
     try:
-        category = request.args.get('category', '')
-        query = request.args.get('q', '')
-        
-        if category:
-            products_query = Product.query.filter_by(category=category)
-        else:
-            products_query = Product.query
+        filters = CatalogFilters(request.args)
+        page = paginate_request(filters.query(), filters.sort_keys())
+        # Conteos de las facetas desde el cubo cacheado: sin GROUP BY por visita
+        facets = catalog_facets(filters)
         
-        if query:
-            products_query = products_query.filter(
-                (Product.name.ilike(f'%{query}%')) |
-                (Product.description.ilike(f'%{query}%'))
-            )
-        
-        products = products_query.all()
+        if request.args.get('format') == 'json':
+            return products_json(page, facets)
         
         return render_template('products.html', 
-                             products=products, 
-                             category=category,
-                             search_query=query)
+                             products=page.items, 
+                             category=filters.category,
+                             search_query=filters.q,
+                             filters=filters,
+                             facets=facets,
+                             page=page,
+                             next_url=next_page_url(page))
+    except InvalidCursor as e:
+        return invalid_cursor_response(e)
     except Exception as e:
         return f"Error cargando productos: {str(e)}"
 
-@app.route('/product/<int:product_id>')
+def invalid_cursor_response(e):
+    """400 para un ?cursor= alterado o de otro listado (antes llegaba a la BD)"""
+    if request.args.get('format') == 'json':
+        return jsonify({'error': str(e)}), 400
+    return f"Cursor inválido: {str(e)}", 400
+
+def product_json(p):
+    return {
+        'id': p.id,
+        'name': p.name,
+        'description': p.description,
+        'price': p.price,
+        'category': p.category,
+        'image_url': p.image_url,
+        'stock': p.stock
+    }
+
+def products_json(page, facets=None, fuzzy=None):
+    """Respuesta JSON de una página de productos con cursor y cabecera Link"""
+    data = {
+        'products': [product_json(p) for p in page.items],
+        'next_cursor': page.next_cursor
+    }
+    if fuzzy is not None:
+        # Coincidencias aproximadas (errores de tipeo), fuera de la paginación por cursor
+        data['fuzzy'] = [product_json(p) for p in fuzzy]
+    if facets is not None:
+        data['facets'] = {
+            'total': facets.total,
+            'categories': dict(facets.categories),
+            'prices': {key: count for key, _, count in facets.prices},
+            'in_stock': facets.in_stock
+        }
+    return jsonify(data), 200, link_header(page)
+
+@bp.route('/product/<int:product_id>')
+@query_budget(4)
+@replica_read
 def product_detail(product_id):
+    as_json = request.args.get('format') == 'json'
+    
+    # Solo (versión, fecha) por clave primaria: si el cliente ya tiene esta versión,
+    # 304 sin cargar el producto ni renderizar
+    validators = db.session.query(Product.version, Product.updated_at).filter_by(id=product_id).first()
+    if validators is None:
+        abort(404)
+    etag = product_etag(product_id, validators.version, as_json)
+    # Los mensajes flash solo salen una vez: con alguno pendiente siempre se renderiza
+    if '_flashes' not in session and not is_resource_modified(
+            request.environ, etag=etag, last_modified=validators.updated_at):
+        response = current_app.response_class(status=304)
+        return with_validators(response, etag, validators.updated_at)
+    
     try:
-        product = Product.query.get_or_404(product_id)
-        return render_template('product_detail.html', product=product)
+        product = db.session.get(Product, product_id)
+        if as_json:
+            response = jsonify({
+                'id': product.id,
+                'name': product.name,
+                'description': product.description,
+                'price': product.price,
+                'category': product.category,
+                'image_url': product.image_url,
+                'stock': product.stock,
+                'version': product.version,
+                'updated_at': product.updated_at.isoformat() if product.updated_at else None
+            })
+        else:
+            response = make_response(render_template('product_detail.html', product=product))
+        return with_validators(response, product_etag(product_id, product.version, as_json), product.updated_at)
     except Exception as e:
         return f"Error cargando producto: {str(e)}"
 
+def product_etag(product_id, version, as_json=False):
+    """ETag fuerte de la página (o JSON) de un producto.
+    
+    El HTML lleva además quién lo ve (la barra de navegación cambia) y la huella de plantillas y estáticos.
+    """
+    if as_json:
+        return f'p{product_id}-v{version}-json'
+    viewer = f'u{current_user.id}' if current_user.is_authenticated else 'anon'
+    return f'p{product_id}-v{version}-{viewer}-{render_build()}'
+
+def with_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+_render_build = None
+
+def render_build():
+    """Huella de las plantillas y del manifest de estáticos (igual en todos los workers del mismo deploy)"""
+    global _render_build
+    if _render_build is None:
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(os.path.join(current_app.root_path, current_app.template_folder)):
+            dirs.sort()
+            for name in sorted(files):
+                with open(os.path.join(root, name), 'rb') as f:
+                    digest.update(f.read())
+        manifest = os.path.join(current_app.static_folder, 'manifest.json')
+        if os.path.exists(manifest):
+            with open(manifest, 'rb') as f:
+                digest.update(f.read())
+        _render_build = digest.hexdigest()[:10]
+    return _render_build
+
 # Rutas del carrito
-@app.route('/add_to_cart', methods=['POST'])
+@bp.route('/add_to_cart', methods=['POST'])
 def add_to_cart():
     if not current_user.is_authenticated:
         return jsonify({
             'success': False, 
             'message': 'Debes iniciar sesión',
-            'redirect': url_for('login')
+            'redirect': url_for('main.login')
         })
     
     try:
         data = request.get_json()
         product_id = data.get('product_id')
-        quantity = data.get('quantity', 1)
+        quantity = int(data.get('quantity', 1))
         
-        product = Product.query.get(product_id)
-        if not product:
-            return jsonify({'success': False, 'message': 'Producto no encontrado'})
+        if quantity <= 0:
+            return jsonify({'success': False, 'message': 'Cantidad inválida'})
         
-        cart = Cart.query.filter_by(user_id=current_user.id, is_active=True).first()
-        if not cart:
-            cart = Cart(user_id=current_user.id)
-            db.session.add(cart)
-            db.session.commit()
-        
-        cart_item = CartItem.query.filter_by(cart_id=cart.id, product_id=product_id).first()
-        if cart_item:
-            cart_item.quantity += quantity
-        else:
-            cart_item = CartItem(cart_id=cart.id, product_id=product_id, quantity=quantity)
-            db.session.add(cart_item)
+        # Carrito activo + línea (insertar o sumar) con dos upserts atómicos: sin carreras
+        # entre clics rápidos ni filas duplicadas
+        if add_cart_item(current_user.id, product_id, quantity) is None:
+            db.session.rollback()
+            return jsonify({'success': False, 'message': 'Producto no encontrado'})
         
         db.session.commit()
         return jsonify({'success': True, 'message': 'Producto agregado al carrito'})
@@ -418,29 +574,17 @@ def add_to_cart():
         db.session.rollback()
         return jsonify({'success': False, 'message': f'Error: {str(e)}'})
 
-@app.route('/cart')
+@bp.route('/cart')
+@query_budget(3)
 @login_required
 def cart():
     try:
-        cart = Cart.query.filter_by(user_id=current_user.id, is_active=True).first()
-        cart_items = []
-        total = 0
-        
-        if cart:
-            for item in cart.items:
-                item_total = item.product.price * item.quantity
-                total += item_total
-                cart_items.append({
-                    'product': item.product,
-                    'quantity': item.quantity,
-                    'total': item_total
-                })
-        
-        return render_template('cart.html', cart_items=cart_items, total=total)
+        summary = load_cart(current_user.id)
+        return render_template('cart.html', cart_items=summary.items, total=summary.subtotal)
     except Exception as e:
         return f"Error cargando carrito: {str(e)}"
 
-@app.route('/update_cart_quantity', methods=['POST'])
+@bp.route('/update_cart_quantity', methods=['POST'])
 @login_required
 def update_cart_quantity():
     try:
@@ -470,7 +614,7 @@ def update_cart_quantity():
         db.session.rollback()
         return jsonify({'success': False, 'message': f'Error: {str(e)}'})
 
-@app.route('/remove_from_cart', methods=['POST'])
+@bp.route('/remove_from_cart', methods=['POST'])
 @login_required
 def remove_from_cart():
     try:
@@ -480,31 +624,15 @@ def remove_from_cart():
         if not product_id:
             return jsonify({'success': False, 'message': 'ID de producto no proporcionado'})
         
-        cart = Cart.query.filter_by(user_id=current_user.id, is_active=True).first()
-        if not cart:
-            return jsonify({'success': False, 'message': 'Carrito no encontrado'})
-        
-        cart_item = CartItem.query.filter_by(cart_id=cart.id, product_id=product_id).first()
-        if cart_item:
-            db.session.delete(cart_item)
+        if remove_cart_item(current_user.id, product_id):
             db.session.commit()
             
-            cart_items = []
-            total = 0
-            for item in cart.items:
-                item_total = item.product.price * item.quantity
-                total += item_total
-                cart_items.append({
-                    'product': item.product,
-                    'quantity': item.quantity,
-                    'total': item_total
-                })
-            
+            summary = load_cart(current_user.id)
             return jsonify({
                 'success': True, 
                 'message': 'Producto eliminado del carrito',
-                'total': total,
-                'item_count': len(cart.items)
+                'total': summary.subtotal,
+                'item_count': summary.item_count
             })
         else:
             return jsonify({'success': False, 'message': 'Producto no encontrado en el carrito'})
@@ -513,62 +641,98 @@ def remove_from_cart():
         db.session.rollback()
         return jsonify({'success': False, 'message': f'Error: {str(e)}'})
 
-@app.route('/checkout')
+def cart_json(summary, **extra):
+    """Resumen del carrito recalculado, para actualizar la página sin recargar"""
+    return jsonify({
+        'success': True,
+        'items': [{
+            'product_id': item['product'].id,
+            'quantity': item['quantity'],
+            'total': item['total']
+        } for item in summary.items],
+        'item_count': summary.item_count,
+        'subtotal': summary.subtotal,
+        'tax': summary.tax,
+        'shipping': summary.shipping,
+        'total': summary.total,
+        **extra
+    })
+
+@bp.route('/cart/batch', methods=['POST'])
+@login_required
+def cart_batch():
+    """Aplica varias operaciones add/set/remove en una sola transacción.
+
+    Body: {"operations": [{"op": "set", "product_id": 3, "quantity": 2}, ...]}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        missing = apply_cart_operations(current_user.id, data.get('operations'))
+        db.session.commit()
+        return cart_json(load_cart(current_user.id), missing=missing)
+    
+    except CartOperationError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'})
+
+@bp.route('/checkout')
+@query_budget(3)
 @login_required
 def checkout():
     try:
-        cart = Cart.query.filter_by(user_id=current_user.id, is_active=True).first()
-        cart_items = []
-        subtotal = 0
-        tax = 0
-        shipping = 0
-        total = 0
-        
-        if cart:
-            for item in cart.items:
-                item_total = item.product.price * item.quantity
-                subtotal += item_total
-                cart_items.append({
-                    'product': item.product,
-                    'quantity': item.quantity,
-                    'total': item_total
-                })
-        
-        tax = subtotal * 0.16
-        shipping = 5.00 if subtotal > 0 else 0
-        total = subtotal + tax + shipping
-        
+        summary = load_cart(current_user.id)
         return render_template('checkout.html', 
-                             cart_items=cart_items, 
-                             subtotal=subtotal,
-                             tax=tax,
-                             shipping=shipping,
-                             total=total)
+                             cart_items=summary.items, 
+                             subtotal=summary.subtotal,
+                             tax=summary.tax,
+                             shipping=summary.shipping,
+                             total=summary.total)
     except Exception as e:
         return f"Error en checkout: {str(e)}"
 
 # Rutas de PayPal (simplificadas)
-@app.route('/create-paypal-order', methods=['POST'])
+@bp.route('/create-paypal-order', methods=['POST'])
 @login_required
 def create_paypal_order():
     try:
-        cart = Cart.query.filter_by(user_id=current_user.id, is_active=True).first()
-        if not cart or not cart.items:
+        summary = load_cart(current_user.id)
+        if summary.is_empty:
             return jsonify({'error': 'Carrito vacío'}), 400
         
-        subtotal = sum(item.product.price * item.quantity for item in cart.items)
-        tax = subtotal * 0.16
-        shipping = 5.00
-        total = subtotal + tax + shipping
+        # Apartar el stock antes de cobrar: si algo se agotó, el cliente sabe qué
+        reservation = reserve_cart(current_user.id)
+        if not reservation.ok:
+            return jsonify({'error': reservation.message, 'failed': reservation.failed}), 409
+        
+        # Se cobra exactamente lo apartado (lo mismo que registrará place_order)
+        total = order_total(sum(line.price * line.quantity for line in reserved_lines(current_user.id)))
+        
+        if paypal.is_configured:
+            order_id = paypal.create_order(total, currency='MXN')['id']
+        else:
+            # Para desarrollo (sin credenciales), simular orden
+            order_id = f"simulated_{random.randint(100000, 999999)}"
         
-        # Para desarrollo, simular orden
-        order_id = f"simulated_{random.randint(100000, 999999)}"
+        attach_order(current_user.id, order_id)
+        db.session.commit()
         return jsonify({'id': order_id})
-            
+    
+    except PayPalError as e:
+        print(f"⚠️ {e}")
+        release_reservations(user_id=current_user.id)
+        db.session.commit()
+        return jsonify({'error': 'PayPal no respondió, intenta de nuevo'}), 502
     except Exception as e:
+        # La sesión puede quedar inválida tras el error: deshacer antes de devolver el stock apartado
+        db.session.rollback()
+        release_reservations(user_id=current_user.id)
+        db.session.commit()
         return jsonify({'error': str(e)}), 500
 
-@app.route('/capture-paypal-order', methods=['POST'])
+@bp.route('/capture-paypal-order', methods=['POST'])
 @login_required
 def capture_paypal_order():
     try:
@@ -578,20 +742,60 @@ def capture_paypal_order():
         if not order_id:
             return jsonify({'error': 'ID de orden inválido'}), 400
         
-        session['last_order_total'] = 100.00  # Simulado
-        session['paypal_order_id'] = order_id
+        # Reintento o doble envío del mismo pago: la orden ya existe, no se cobra ni se crea de nuevo
+        order = find_order(order_id, user_id=current_user.id)
+        if order:
+            return order_captured(order)
         
-        return jsonify({'success': True})
-            
+        # Solo se cobra lo apartado para esta orden; si venció o el carrito cambió
+        # mientras el cliente estaba en PayPal, se libera y no se captura
+        problem = check_reservations(current_user.id, order_id)
+        db.session.commit()
+        if problem:
+            return jsonify({'error': problem}), 409
+        
+        capture, amount = {}, None
+        if paypal.is_configured and not order_id.startswith('simulated_'):
+            capture = paypal.capture_order(order_id)
+            amount = captured_amount(capture)
+            if capture.get('status') != 'COMPLETED':
+                release_reservations(user_id=current_user.id, paypal_order_id=order_id)
+                db.session.commit()
+                return jsonify({'error': 'El pago no se completó'}), 402
+        
+        payer_id, shipping_name, shipping_address = payer_details(capture)
+        order, _ = place_order(current_user.id, order_id, amount=amount, payer_id=payer_id,
+                               shipping_name=shipping_name, shipping_address=shipping_address)
+        return order_captured(order)
+    
+    except PayPalError as e:
+        print(f"⚠️ {e}")
+        return jsonify({'error': 'PayPal no respondió, intenta de nuevo'}), 502
+    except OrderError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@app.route('/payment-cancelled')
+def order_captured(order):
+    session['last_order_total'] = order.total
+    session['paypal_order_id'] = order.payment_id
+    session['last_order_id'] = order.id
+    return jsonify({'success': True, 'order_id': order.id})
+
+@bp.route('/payment-cancelled')
 def payment_cancelled():
+    if current_user.is_authenticated:
+        try:
+            release_reservations(user_id=current_user.id)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️ Error liberando reservas: {e}")
     flash('Has cancelado el proceso de pago', 'info')
-    return redirect(url_for('checkout'))
+    return redirect(url_for('main.checkout'))
 
-@app.route('/order-confirmation')
+@bp.route('/order-confirmation')
 @login_required
 def order_confirmation():
     total = session.get('last_order_total', 0)
@@ -599,59 +803,83 @@ def order_confirmation():
     return render_template('order_confirmation.html', 
                          total=total, 
                          order_id=order_id,
+                         random_number=session.get('last_order_id', ''),
                          currency="MXN")
 
 # RUTAS DE ADMINISTRACIÓN
-@app.route('/admin')
+@bp.route('/admin')
+@query_budget(4)
 @admin_required
 def admin_dashboard():
     try:
-        stats = {
-            'product_count': Product.query.count(),
-            'user_count': User.query.count(),
-            'order_count': Order.query.count(),
-            'video_count': Video.query.count(),
-            'venta_count': Venta.query.count()
-        }
+        stats = get_dashboard_stats()
         return render_template('admin/dashboard.html', stats=stats)
     except Exception as e:
         return f"Error en dashboard admin: {str(e)}"
 
+@bp.route('/admin/cache-stats')
+@admin_required
+def admin_cache_stats():
+    """Aciertos/fallos de las cachés en memoria (por proceso)"""
+    return jsonify({'home': home_cache.stats(), 'catalog': catalog_cache.stats(), 'dashboard': stats_cache.stats(),
+                    'identity': identity_cache.stats(), 'suggest': suggest_index.stats(),
+                    'paypal': paypal.stats(), 'pid': os.getpid()})
+
+@bp.route('/admin/db-stats')
+@admin_required
+def admin_db_stats():
+    """Pools de conexiones por bind (primario y réplicas) y salud de las réplicas (por proceso)"""
+    return jsonify({**db_router.stats(db), 'pid': os.getpid()})
+
 # 🎯 RUTAS DE ADMINISTRACIÓN FALTANTES
-@app.route('/admin/videos')
+@bp.route('/admin/videos')
 @admin_required
 def admin_videos():
     """Gestión de videos"""
     try:
-        videos = Video.query.all()
-        return render_template('admin/videos.html', videos=videos)
+        page = paginate_request(Video.query, [(Video.id, False)], default_size=50)
+        return render_template('admin/videos.html', videos=page.items,
+                             page=page, next_url=next_page_url(page))
+    except InvalidCursor as e:
+        return invalid_cursor_response(e)
     except Exception as e:
         return f"Error cargando videos: {str(e)}"
 
-@app.route('/admin/ventas')
+@bp.route('/admin/ventas')
+@query_budget(5)
 @admin_required
 def admin_ventas():
     """Gestión de ventas"""
     try:
-        ventas = Venta.query.order_by(Venta.fecha.desc()).all()
-        total_general = sum(venta.producto.price * venta.cantidad for venta in ventas)
+        # Totales desde los rollups diarios; solo la página actual de ventas sin procesar
+        summary = sales_summary()
+        ventas_query = Venta.query.options(db.joinedload(Venta.producto), db.joinedload(Venta.usuario))
+        page = paginate_request(ventas_query, [(Venta.fecha, True), (Venta.id, True)], default_size=50)
         return render_template('admin/ventas.html', 
-                             ventas=ventas,
-                             total_general=total_general)
+                             ventas=page.items,
+                             total_general=summary['ingresos'],
+                             summary=summary,
+                             page=page,
+                             next_url=next_page_url(page))
+    except InvalidCursor as e:
+        return invalid_cursor_response(e)
     except Exception as e:
         return f"Error cargando ventas: {str(e)}"
 
-@app.route('/admin/users')
+@bp.route('/admin/users')
 @admin_required
 def admin_users():
     """Gestión de usuarios"""
     try:
-        users = User.query.all()
-        return render_template('admin/users.html', users=users)
+        page = paginate_request(User.query, [(User.id, False)], default_size=50)
+        return render_template('admin/users.html', users=page.items,
+                             page=page, next_url=next_page_url(page))
+    except InvalidCursor as e:
+        return invalid_cursor_response(e)
     except Exception as e:
         return f"Error cargando usuarios: {str(e)}"
 
-@app.route('/admin/videos/add', methods=['GET', 'POST'])
+@bp.route('/admin/videos/add', methods=['GET', 'POST'])
 @admin_required
 def admin_add_video():
     """Agregar video"""
@@ -668,7 +896,7 @@ def admin_add_video():
                 if file and file.filename != '' and allowed_video_file(file.filename):
                     filename = secure_filename(file.filename)
                     unique_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}"
-                    file_path = os.path.join(app.config['VIDEO_UPLOAD_FOLDER'], unique_filename)
+                    file_path = upload_path('VIDEO_UPLOAD_FOLDER', unique_filename)
                     file.save(file_path)
                     file_path = f"videos/{unique_filename}"
             
@@ -688,8 +916,10 @@ def admin_add_video():
             
             db.session.add(new_video)
             db.session.commit()
+            invalidate_home_videos()
+            invalidate_dashboard_stats()
             flash('Video agregado correctamente', 'success')
-            return redirect(url_for('admin_videos'))
+            return redirect(url_for('main.admin_videos'))
             
         except Exception as e:
             db.session.rollback()
@@ -697,7 +927,135 @@ def admin_add_video():
     
     return render_template('admin/add_video.html')
 
-@app.route('/admin/user/add', methods=['GET', 'POST'])
+@bp.route('/admin/videos/uploads', methods=['POST'])
+@admin_required
+def admin_video_upload_create():
+    """Iniciar subida reanudable de video (alta o reemplazo del archivo)"""
+    data = request.get_json() or {}
+    filename = data.get('filename', '')
+    
+    if not allowed_video_file(filename):
+        return jsonify({'success': False, 'message': 'Formato de video no permitido'}), 400
+    
+    try:
+        video_id = int(data['video_id']) if data.get('video_id') else None
+        size = int(data.get('size', 0))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'video_id y size deben ser números enteros'}), 400
+    
+    if video_id and not db.session.get(Video, video_id):
+        return jsonify({'success': False, 'message': 'Video no encontrado'}), 404
+    if not video_id and not data.get('title'):
+        return jsonify({'success': False, 'message': 'El título es obligatorio'}), 400
+    
+    fields = {
+        'video_id': video_id,
+        'title': data.get('title', ''),
+        'description': data.get('description', ''),
+        'category': data.get('category', ''),
+        'is_featured': bool(data.get('is_featured'))
+    }
+    
+    try:
+        upload_id = create_upload(current_app.config['VIDEO_UPLOAD_FOLDER'], filename,
+                                  size, current_app.config['MAX_VIDEO_SIZE'], fields)
+    except UploadError as e:
+        return jsonify({'success': False, 'message': str(e)}), e.status
+    
+    location = url_for('main.admin_video_upload', upload_id=upload_id)
+    return jsonify({
+        'success': True,
+        'upload_id': upload_id,
+        'offset': 0,
+        'chunk_size': current_app.config['VIDEO_CHUNK_SIZE']
+    }), 201, {'Location': location, 'Upload-Offset': '0'}
+
+@bp.route('/admin/videos/uploads/<upload_id>', methods=['HEAD', 'PATCH', 'DELETE'])
+@admin_required
+def admin_video_upload(upload_id):
+    """Consultar offset (HEAD), enviar una parte (PATCH) o cancelar (DELETE)"""
+    folder = current_app.config['VIDEO_UPLOAD_FOLDER']
+    try:
+        if request.method == 'HEAD':
+            meta = load_upload(folder, upload_id)
+            return '', 200, {
+                'Upload-Offset': str(meta['offset']),
+                'Upload-Length': str(meta['size']),
+                'Cache-Control': 'no-store'
+            }
+        
+        if request.method == 'DELETE':
+            discard_upload(folder, upload_id)
+            return '', 204
+        
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Falta Upload-Offset'}), 400
+        
+        new_offset = append_chunk(folder, upload_id, offset, request.stream,
+                                  parse_checksum(request.headers.get('Upload-Checksum')))
+        headers = {'Upload-Offset': str(new_offset)}
+        
+        if new_offset < load_upload(folder, upload_id)['size']:
+            return '', 204, headers
+        
+        video = finish_video_upload(upload_id)
+        return jsonify({
+            'success': True,
+            'complete': True,
+            'video_id': video.id,
+            'redirect': url_for('main.admin_videos')
+        }), 200, headers
+    
+    except UploadError as e:
+        return jsonify({'success': False, 'message': str(e)}), e.status
+
+def finish_video_upload(upload_id):
+    """Archivo completo: moverlo a VIDEO_UPLOAD_FOLDER y crear/actualizar el Video en una transacción"""
+    file_path, final_path, fields = complete_upload(current_app.config['VIDEO_UPLOAD_FOLDER'], upload_id)
+    old_file_path = None
+    try:
+        if fields['video_id']:
+            video = db.session.get(Video, fields['video_id'])
+            if not video:
+                raise UploadError('Video no encontrado', 404)
+            old_file_path = video.file_path
+            video.file_path = file_path
+            video.url = None
+            video.title = fields['title'] or video.title
+            video.description = fields['description']
+            video.category = fields['category']
+            video.is_featured = fields['is_featured']
+        else:
+            video = Video(
+                title=fields['title'],
+                description=fields['description'],
+                category=fields['category'],
+                url=None,
+                file_path=file_path,
+                is_featured=fields['is_featured'],
+                created_at=datetime.utcnow()
+            )
+            db.session.add(video)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        if os.path.exists(final_path):
+            os.remove(final_path)
+        raise
+    
+    # Eliminar el video anterior solo cuando el nuevo ya quedó registrado
+    if old_file_path:
+        old_video_path = os.path.join('static', old_file_path)
+        if os.path.exists(old_video_path):
+            os.remove(old_video_path)
+    
+    invalidate_home_videos()
+    invalidate_dashboard_stats()
+    return video
+
+@bp.route('/admin/user/add', methods=['GET', 'POST'])
 @admin_required
 def admin_add_user():
     """Agregar usuario"""
@@ -710,61 +1068,56 @@ def admin_add_user():
             
             if User.query.filter_by(username=username).first():
                 flash('El nombre de usuario ya existe', 'danger')
-                return redirect(url_for('admin_add_user'))
+                return redirect(url_for('main.admin_add_user'))
             
             if User.query.filter_by(email=email).first():
                 flash('El email ya está registrado', 'danger')
-                return redirect(url_for('admin_add_user'))
+                return redirect(url_for('main.admin_add_user'))
             
             new_user = User(username=username, email=email, role=role)
             new_user.set_password(password)
             
             db.session.add(new_user)
             db.session.commit()
+            invalidate_dashboard_stats()
             
             flash('Usuario agregado exitosamente', 'success')
-            return redirect(url_for('admin_users'))
+            return redirect(url_for('main.admin_users'))
         except Exception as e:
             db.session.rollback()
             flash(f'Error al agregar usuario: {str(e)}', 'danger')
     
     return render_template('admin/add_user.html')
 
-@app.route('/admin/products')
+@bp.route('/admin/products')
 @admin_required
 def admin_products():
     try:
-        products = Product.query.all()
-        return render_template('admin/products.html', products=products)
+        page = paginate_request(Product.query, [(Product.id, False)], default_size=50)
+        return render_template('admin/products.html', products=page.items,
+                             page=page, next_url=next_page_url(page))
+    except InvalidCursor as e:
+        return invalid_cursor_response(e)
     except Exception as e:
         return f"Error cargando productos admin: {str(e)}"
 
 # 🎯 RUTAS CRÍTICAS FALTANTES - AGREGAR PRODUCTO
-@app.route('/admin/product/add', methods=['GET', 'POST'])
+@bp.route('/admin/product/add', methods=['GET', 'POST'])
 @admin_required
 def admin_add_product():
     """Agregar producto - RUTA CRÍTICA FALTANTE"""
     if request.method == 'POST':
         try:
-            # Procesar la imagen
+            # Guardar la imagen; las variantes se generan en segundo plano
             image_filename = None
+            filepath = None
             if 'image' in request.files:
                 file = request.files['image']
                 if file and file.filename != '' and allowed_file(file.filename):
                     filename = secure_filename(file.filename)
                     unique_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}"
-                    filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
+                    filepath = upload_path('UPLOAD_FOLDER', unique_filename)
                     file.save(filepath)
-                    
-                    # Redimensionar si es necesario
-                    try:
-                        img = Image.open(filepath)
-                        if img.width > 800 or img.height > 800:
-                            img.thumbnail((800, 800))
-                            img.save(filepath)
-                    except:
-                        pass
-                    
                     image_filename = f"/static/uploads/{unique_filename}"
             
             # Crear el producto
@@ -779,8 +1132,13 @@ def admin_add_product():
             
             db.session.add(new_product)
             db.session.commit()
+            invalidate_home_products()
+            invalidate_dashboard_stats()
+            suggest_index.upsert(new_product)
+            if filepath:
+                enqueue_product_image(current_app._get_current_object(), new_product.id, filepath, image_filename)
             flash('Producto agregado exitosamente', 'success')
-            return redirect(url_for('admin_products'))
+            return redirect(url_for('main.admin_products'))
             
         except Exception as e:
             db.session.rollback()
@@ -788,7 +1146,7 @@ def admin_add_product():
     
     return render_template('admin/agregar.html')
 
-@app.route('/admin/product/edit/<int:product_id>', methods=['GET', 'POST'])
+@bp.route('/admin/product/edit/<int:product_id>', methods=['GET', 'POST'])
 @admin_required
 def admin_edit_product(product_id):
     """Editar producto - RUTA FALTANTE"""
@@ -797,6 +1155,7 @@ def admin_edit_product(product_id):
     if request.method == 'POST':
         try:
             # Procesar nueva imagen si se subió
+            new_image_path = None
             if 'image' in request.files:
                 file = request.files['image']
                 if file and file.filename != '' and allowed_file(file.filename):
@@ -805,23 +1164,16 @@ def admin_edit_product(product_id):
                         old_image_path = product.image_url.replace('/static/', '')
                         if os.path.exists(old_image_path):
                             os.remove(old_image_path)
+                    delete_variants(product.image_variants)
                     
-                    # Guardar nueva imagen
+                    # Guardar nueva imagen; las variantes se generan en segundo plano
                     filename = secure_filename(file.filename)
                     unique_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}"
-                    filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-                    file.save(filepath)
-                    
-                    # Redimensionar si es necesario
-                    try:
-                        img = Image.open(filepath)
-                        if img.width > 800 or img.height > 800:
-                            img.thumbnail((800, 800))
-                            img.save(filepath)
-                    except:
-                        pass
+                    new_image_path = upload_path('UPLOAD_FOLDER', unique_filename)
+                    file.save(new_image_path)
                     
                     product.image_url = f"/static/uploads/{unique_filename}"
+                    product.image_variants = None
             
             # Actualizar otros campos
             product.name = request.form['name']
@@ -831,8 +1183,13 @@ def admin_edit_product(product_id):
             product.stock = int(request.form['stock'])
             
             db.session.commit()
+            invalidate_home_products()
+            invalidate_dashboard_stats()
+            suggest_index.upsert(product)
+            if new_image_path:
+                enqueue_product_image(current_app._get_current_object(), product.id, new_image_path, product.image_url)
             flash('Producto actualizado exitosamente', 'success')
-            return redirect(url_for('admin_products'))
+            return redirect(url_for('main.admin_products'))
             
         except Exception as e:
             db.session.rollback()
@@ -840,22 +1197,27 @@ def admin_edit_product(product_id):
     
     return render_template('admin/edit_product.html', product=product)
 
-@app.route('/admin/product/delete/<int:product_id>', methods=['POST'])
+@bp.route('/admin/product/delete/<int:product_id>', methods=['POST'])
 @admin_required
 def admin_delete_product(product_id):
     """Eliminar producto - RUTA FALTANTE"""
     try:
         product = Product.query.get_or_404(product_id)
+        image_variants = product.image_variants
         db.session.delete(product)
         db.session.commit()
+        delete_variants(image_variants)
+        invalidate_home_products()
+        invalidate_dashboard_stats()
+        suggest_index.remove(product_id)
         flash('Producto eliminado exitosamente', 'success')
     except Exception as e:
         db.session.rollback()
         flash(f'Error al eliminar producto: {str(e)}', 'danger')
     
-    return redirect(url_for('admin_products'))
+    return redirect(url_for('main.admin_products'))
 
-@app.route('/admin/video/edit/<int:video_id>', methods=['GET', 'POST'])
+@bp.route('/admin/video/edit/<int:video_id>', methods=['GET', 'POST'])
 @admin_required
 def admin_edit_video(video_id):
     """Editar video - RUTA FALTANTE"""
@@ -876,7 +1238,7 @@ def admin_edit_video(video_id):
                     # Guardar nuevo video
                     filename = secure_filename(file.filename)
                     unique_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}"
-                    filepath = os.path.join(app.config['VIDEO_UPLOAD_FOLDER'], unique_filename)
+                    filepath = upload_path('VIDEO_UPLOAD_FOLDER', unique_filename)
                     file.save(filepath)
                     
                     video.file_path = f"videos/{unique_filename}"
@@ -889,8 +1251,9 @@ def admin_edit_video(video_id):
             video.is_featured = 'is_featured' in request.form
             
             db.session.commit()
+            invalidate_home_videos()
             flash('Video actualizado exitosamente', 'success')
-            return redirect(url_for('admin_videos'))
+            return redirect(url_for('main.admin_videos'))
             
         except Exception as e:
             db.session.rollback()
@@ -898,7 +1261,7 @@ def admin_edit_video(video_id):
     
     return render_template('admin/edit_video.html', video=video)
 
-@app.route('/admin/video/delete/<int:video_id>', methods=['POST'])
+@bp.route('/admin/video/delete/<int:video_id>', methods=['POST'])
 @admin_required
 def admin_delete_video(video_id):
     """Eliminar video - RUTA FALTANTE"""
@@ -913,14 +1276,16 @@ def admin_delete_video(video_id):
         
         db.session.delete(video)
         db.session.commit()
+        invalidate_home_videos()
+        invalidate_dashboard_stats()
         flash('Video eliminado exitosamente', 'success')
     except Exception as e:
         db.session.rollback()
         flash(f'Error al eliminar video: {str(e)}', 'danger')
     
-    return redirect(url_for('admin_videos'))
+    return redirect(url_for('main.admin_videos'))
 
-@app.route('/admin/user/edit/<int:user_id>', methods=['GET', 'POST'])
+@bp.route('/admin/user/edit/<int:user_id>', methods=['GET', 'POST'])
 @admin_required
 def admin_edit_user(user_id):
     """Editar usuario - RUTA FALTANTE"""
@@ -936,15 +1301,16 @@ def admin_edit_user(user_id):
                 user.set_password(request.form['password'])
             
             db.session.commit()
+            invalidate_identity(user.id)
             flash('Usuario actualizado exitosamente', 'success')
-            return redirect(url_for('admin_users'))
+            return redirect(url_for('main.admin_users'))
         except Exception as e:
             db.session.rollback()
             flash(f'Error al actualizar usuario: {str(e)}', 'danger')
     
     return render_template('admin/edit_user.html', user=user)
 
-@app.route('/admin/user/delete/<int:user_id>', methods=['POST'])
+@bp.route('/admin/user/delete/<int:user_id>', methods=['POST'])
 @admin_required
 def admin_delete_user(user_id):
     """Eliminar usuario - RUTA FALTANTE"""
@@ -954,18 +1320,20 @@ def admin_delete_user(user_id):
         # No permitir eliminarse a sí mismo
         if user.id == current_user.id:
             flash('No puedes eliminar tu propio usuario', 'danger')
-            return redirect(url_for('admin_users'))
+            return redirect(url_for('main.admin_users'))
         
         db.session.delete(user)
         db.session.commit()
+        invalidate_identity(user_id)
+        invalidate_dashboard_stats()
         flash('Usuario eliminado exitosamente', 'success')
     except Exception as e:
         db.session.rollback()
         flash(f'Error al eliminar usuario: {str(e)}', 'danger')
     
-    return redirect(url_for('admin_users'))
+    return redirect(url_for('main.admin_users'))
 
-@app.route('/debug-database-connection')
+@bp.route('/debug-database-connection')
 def debug_database_connection():
     try:
         # 1. Verificar conexión
@@ -1012,7 +1380,7 @@ def debug_database_connection():
     except Exception as e:
         return f"❌ Error: {str(e)}"
 
-@app.route('/db-connection-info')
+@bp.route('/db-connection-info')
 def db_connection_info():
     import os
     from urllib.parse import urlparse
@@ -1033,12 +1401,12 @@ def db_connection_info():
     
     return info
 
-@app.route('/test-simple')
+@bp.route('/test-simple')
 def test_simple():
     return "✅ TEST SIMPLE FUNCIONANDO"
 
 
-@app.route('/debug-config')
+@bp.route('/debug-config')
 def debug_config():
     from flask import current_app
     import os
@@ -1056,7 +1424,7 @@ def debug_config():
     <p>{'SÍ' if 'railway' in str(current_app.config.get('SQLALCHEMY_DATABASE_URI')) else 'NO'}</p>
     """   
 
-@app.route('/db-info')
+@bp.route('/db-info')
 def db_info():
     import os
     from urllib.parse import urlparse
@@ -1081,7 +1449,7 @@ def db_info():
     
     return info    
 
-@app.route('/update-db-relations')
+@bp.route('/update-db-relations')
 def update_db_relations():
     from app import db
     try:
@@ -1092,15 +1460,15 @@ def update_db_relations():
     except Exception as e:
         return f"<h1>❌ Error actualizando BD:</h1><p>{str(e)}</p>"
 
-@app.route('/check-database-url')
+@bp.route('/check-database-url')
 def check_database_url():
     return f"""
     <h1>Configuración de BD</h1>
-    <p>DATABASE_URL: {app.config.get('SQLALCHEMY_DATABASE_URI', 'No configurada')}</p>
-    <p>¿Usando PostgreSQL?: {'postgresql' in app.config.get('SQLALCHEMY_DATABASE_URI', '')}</p>
+    <p>DATABASE_URL: {current_app.config.get('SQLALCHEMY_DATABASE_URI', 'No configurada')}</p>
+    <p>¿Usando PostgreSQL?: {'postgresql' in current_app.config.get('SQLALCHEMY_DATABASE_URI', '')}</p>
     """        
 
-@app.route('/debug-model-error')
+@bp.route('/debug-model-error')
 def debug_model_error():
     try:
         # Intentar acceder a los productos
@@ -1114,7 +1482,7 @@ def debug_model_error():
         """
 
 
-@app.route('/fix-featured-products')
+@bp.route('/fix-featured-products')
 def fix_featured_products():
     try:
         # Forzar que todos los productos con featured=true se muestren
@@ -1139,7 +1507,7 @@ def fix_featured_products():
         return resultado
     except Exception as e:
         return f"Error: {str(e)}"
-@app.route('/add-sample-products')
+@bp.route('/add-sample-products')
 def add_sample_products():
     from app import db, Product
     
@@ -1156,12 +1524,15 @@ def add_sample_products():
         db.session.add(product)
     
     db.session.commit()
+    invalidate_home_products()
+    invalidate_dashboard_stats()
+    suggest_index.invalidate()
     
     # Verificar que se guardaron
     product_count = Product.query.count()
     return f"<h1>✅ {len(sample_products)} productos de ejemplo agregados</h1><p>Total en base de datos: {product_count} productos</p>"
 
-@app.route('/check-products')
+@bp.route('/check-products')
 def check_products():
     from app import Product
     try:
@@ -1182,7 +1553,7 @@ def check_products():
     except Exception as e:
         return f"<h1>❌ Error leyendo productos:</h1><p>{str(e)}</p>"
 
-@app.route('/restore-my-products')
+@bp.route('/restore-my-products')
 def restore_my_products():
     try:
         # TUS PRODUCTOS ORIGINALES
@@ -1227,6 +1598,9 @@ def restore_my_products():
         
         db.session.bulk_save_objects(mis_productos)
         db.session.commit()
+        invalidate_home_products()
+        invalidate_dashboard_stats()
+        suggest_index.invalidate()
         
         return "✅ Tus 4 productos originales restaurados<br><a href='/debug-productos'>Ver productos</a> | <a href='/'>Ir a página principal</a>"
         
@@ -1236,7 +1610,7 @@ def restore_my_products():
 
                 
 
-@app.route('/debug-featured-products')
+@bp.route('/debug-featured-products')
 def debug_featured_products():
     try:
         # Verificar qué productos tienen featured=true
@@ -1266,7 +1640,7 @@ def debug_featured_products():
     except Exception as e:
         return f"Error: {str(e)}"
 
-@app.route('/create-tables')
+@bp.route('/create-tables')
 def create_tables():
     from app import db
     try:
@@ -1282,7 +1656,7 @@ def create_tables():
     except Exception as e:
         return f"<h1>❌ Error creando tablas:</h1><p>{str(e)}</p>"
 
-@app.route('/debug-productos')
+@bp.route('/debug-productos')
 def debug_productos():
     try:
         productos = Product.query.all()
@@ -1296,9 +1670,9 @@ def debug_productos():
         return f"Error al consultar productos: {str(e)}"      
 """
 # Inicialización de base de datos
-@app.route('/init_db')
+@bp.route('/init_db')
 def init_db():
-    with app.app_context():
+    with current_app.app_context():
         try:
             db.create_all()
             
@@ -1325,7 +1699,7 @@ def init_db():
 
 # === AGREGA ESTAS NUEVAS RUTAS DESPUÉS ===
 
-@app.route('/debug-productos')
+@bp.route('/debug-productos')
 def debug_productos():
     try:
         from models import Product
@@ -1339,7 +1713,7 @@ def debug_productos():
     except Exception as e:
         return f"Error al consultar productos: {str(e)}"
 
-@app.route('/add-sample-products')
+@bp.route('/add-sample-products')
 def add_sample_products():
     try:
         from models import Product, db
@@ -1391,21 +1765,46 @@ def add_sample_products():
     except Exception as e:
         return f"❌ Error al agregar productos: {str(e)}"
 """
-@app.route('/debug-routes')
+@bp.cli.command('backfill-ventas')
+def backfill_ventas_command():
+    """Recalcular ventas_diarias a partir de todas las ventas: flask --app app:create_app backfill-ventas"""
+    total = backfill_rollups()
+    print(f"✅ Rollups de ventas recalculados: {total} filas (día, producto)")
+
+@bp.cli.command('generate-data')
+@click.option('--products', default=0, help='Productos a generar')
+@click.option('--users', default=0, help='Usuarios a generar (contraseña synth123)')
+@click.option('--carts', default=0, help='Carritos activos, para usuarios de esta corrida')
+@click.option('--orders', default=0, help='Órdenes pagadas (con sus líneas y ventas)')
+@click.option('--days', default=365, help='Días de historial de ventas')
+@click.option('--batch-size', default=10000, help='Filas por lote')
+@click.option('--seed', default=42, help='Semilla (misma semilla, mismos datos)')
+def generate_data_command(products, users, carts, orders, days, batch_size, seed):
+    """Datos sintéticos masivos para pruebas de capacidad: flask --app app:create_app generate-data --products 1000000 ..."""
+    generate(products=products, users=users, carts=carts, orders=orders,
+             seed=seed, batch_size=batch_size, days=days)
+
+@bp.cli.command('release-reservations')
+def release_reservations_command():
+    """Liberar reservas de stock vencidas (para cron): flask --app app:create_app release-reservations"""
+    released = release_expired_reservations()
+    print(f"✅ Reservas de stock liberadas: {released}")
+
+@bp.route('/debug-routes')
 def debug_routes():
     """Muestra todas las rutas disponibles"""
     routes = []
-    for rule in app.url_map.iter_rules():
+    for rule in current_app.url_map.iter_rules():
         if 'static' not in rule.rule:
             routes.append(f"{rule.endpoint}: {rule.rule}")
     return "<br>".join(sorted(routes))
 
 # Manejo de errores
-@app.errorhandler(404)
+@bp.app_errorhandler(404)
 def page_not_found(e):
     return render_template('error.html'), 404
 
-@app.errorhandler(500)
+@bp.app_errorhandler(500)
 def internal_error(e):
     return f"""
     <h1>Error 500 - Error Interno del Servidor</h1>
@@ -1413,19 +1812,37 @@ def internal_error(e):
     <pre>{traceback.format_exc()}</pre>
     """, 500
 
-@app.after_request
+# Páginas con datos del carrito, del pago o de administración: nunca se cachean
+NO_STORE_PREFIXES = ('/cart', '/checkout', '/order-confirmation', '/admin')
+STATIC_MAX_AGE = 86400  # estáticos sin huella (uploads, videos): 1 día + revalidación
+IMMUTABLE_MAX_AGE = 31536000  # estáticos con huella: 1 año
+
+@bp.after_app_request
 def add_header(response):
-    response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, post-check=0, pre-check=0, max-age=0'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '-1'
+    if request.path.startswith(NO_STORE_PREFIXES):
+        response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, post-check=0, pre-check=0, max-age=0'
+        response.headers['Pragma'] = 'no-cache'
+        response.headers['Expires'] = '-1'
+    elif request.endpoint == 'static':
+        filename = (request.view_args or {}).get('filename', '')
+        if is_fingerprinted(filename, request.args.get('v')):
+            response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        else:
+            response.headers['Cache-Control'] = f'public, max-age={STATIC_MAX_AGE}'
+    elif (request.method == 'GET' and response.status_code == 200
+          and response.mimetype == 'text/html' and not response.direct_passthrough):
+        # HTML: el navegador revalida siempre, pero si no cambió recibe un 304 sin cuerpo
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.add_etag()
+        response.make_conditional(request)
     return response
 
 # MANEJO GLOBAL DE ERRORES - AL FINAL DEL ARCHIVO
-@app.errorhandler(404)
+@bp.app_errorhandler(404)
 def not_found_error(error):
     return "<h1>404 - Página no encontrada</h1><p>La ruta solicitada no existe.</p>", 404
 
-@app.errorhandler(500)
+@bp.app_errorhandler(500)
 def internal_error(error):
     import traceback
     return f"""
@@ -1435,7 +1852,7 @@ def internal_error(error):
     <pre>{traceback.format_exc()}</pre>
     """, 500
 
-@app.errorhandler(Exception)
+@bp.app_errorhandler(Exception)
 def handle_all_errors(error):
     import traceback
     return f"""
@@ -1446,13 +1863,47 @@ def handle_all_errors(error):
     <pre>{traceback.format_exc()}</pre>
     """, 500
 
-# ✅ CREAR TABLAS SI NO EXISTEN
-with app.app_context():
-    try:
-        db.create_all()
-        print("✅ Tablas verificadas/creadas en PostgreSQL")
-    except Exception as e:
-        print(f"❌ Error creando tablas: {e}")
-
+def init_db():
+    """Crea las tablas que falten y el índice de búsqueda (bases nuevas / desarrollo).
+
+    En producción el esquema lo manejan las migraciones: flask --app app:create_app db upgrade
+    """
+    db.create_all()
+    ensure_search_index()
+
+@bp.cli.command('init-db')
+def init_db_command():
+    """Crear el esquema en una base vacía y marcarla con la última migración: flask --app app:create_app init-db"""
+    init_db()
+    stamp()
+    print("✅ Tablas e índice de búsqueda creados; base marcada en la última migración")
+
+# 📦 Tareas de fondo por proceso: se arrancan con la primera petición, ya dentro
+# del worker (con preload_app los hilos del proceso padre no sobreviven al fork)
+@bp.before_app_request
+def start_background_tasks():
+    start_reservation_sweeper(current_app._get_current_object())
+
+def create_app(config_object=Config):
+    """Fábrica de la aplicación: configuración + extensiones + rutas, sin tocar la base de datos"""
+    app = Flask(__name__)
+    app.config.from_object(config_object)
+    
+    db.init_app(app)
+    migrate.init_app(app, db)
+    login_manager.init_app(app)
+    init_query_stats(app)
+    init_db_routing(app)
+    paypal.init_app(app)
+    
+    # URLs de estáticos con huella en las plantillas: {{ asset_url('css/style.css') }}
+    app.add_template_global(asset_url)
+    app.add_template_global(catalog_categories)
+    app.register_blueprint(bp)
+    # Las carpetas de subidas se crean al guardar el primer archivo (upload_path)
+    return app
+
+# Sin instancia global: importar este módulo no crea la app ni toca el disco.
+#   gunicorn 'app:create_app()'   |   flask --app app:create_app <comando>
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 8080)), debug=False)
\ No newline at end of file
+    create_app().run(host='0.0.0.0', port=int(os.environ.get('PORT', 8080)), debug=False)
@@ -0,0 +1,72 @@
+import hashlib
+import json
+import os
+import threading
+
+from flask import url_for
+
+# 🧾 RECURSOS ESTÁTICOS CON HUELLA (FINGERPRINT)
+# `python assets.py` (en el build) escribe static/manifest.json con el hash de
+# cada archivo de css/, js/ e images/. asset_url() agrega ?v=<hash> a la URL,
+# así el navegador puede cachearla un año: si el archivo cambia, cambia la URL.
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+MANIFEST_PATH = os.path.join(STATIC_FOLDER, 'manifest.json')
+FINGERPRINTED_DIRS = ('css', 'js', 'images')
+
+_manifest = None
+_lock = threading.Lock()
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def build_manifest():
+    """{ruta relativa a static/: hash} para todos los recursos con huella"""
+    manifest = {}
+    for folder in FINGERPRINTED_DIRS:
+        for root, _, files in os.walk(os.path.join(STATIC_FOLDER, folder)):
+            for name in files:
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, STATIC_FOLDER).replace(os.sep, '/')
+                manifest[rel] = file_hash(path)
+    return manifest
+
+
+def get_manifest():
+    """Manifest del build; si no existe (desarrollo) se calcula al vuelo una vez"""
+    global _manifest
+    if _manifest is None:
+        with _lock:
+            if _manifest is None:
+                if os.path.exists(MANIFEST_PATH):
+                    with open(MANIFEST_PATH) as f:
+                        _manifest = json.load(f)
+                else:
+                    _manifest = build_manifest()
+    return _manifest
+
+
+def asset_url(filename, **values):
+    """Igual que url_for('static', filename=...) pero con ?v=<hash> si el archivo tiene huella"""
+    version = get_manifest().get(filename)
+    if version:
+        values['v'] = version
+    return url_for('static', filename=filename, **values)
+
+
+def is_fingerprinted(filename, version):
+    """True si `version` es el hash actual de `filename` (URL inmutable)"""
+    return bool(version) and get_manifest().get(filename) == version
+
+
+if __name__ == '__main__':
+    manifest = build_manifest()
+    with open(MANIFEST_PATH, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print(f"✅ Manifest generado: {len(manifest)} archivos en {MANIFEST_PATH}")
@@ -0,0 +1,149 @@
+"""Prueba de concurrencia: muchos clics simultáneos en "Agregar al carrito".
+
+Levanta la app con gunicorn (2 workers x 4 hilos, como en railway.json),
+inicia sesión con varios usuarios y dispara /add_to_cart desde muchos hilos
+a la vez sobre los mismos productos. Al final verifica en la base de datos:
+    - un solo carrito activo por usuario,
+    - una sola línea por (carrito, producto),
+    - cantidad = suma de los clics que respondieron success.
+
+Uso:
+    python benchmarks/bench_add_to_cart.py [hilos] [clics_por_hilo]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DB_PATH = os.path.join(tempfile.gettempdir(), 'bench_add_to_cart.db')
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{DB_PATH}')
+
+from bench_video import free_port, percentile  # noqa: E402
+
+USERS = 4
+PRODUCTS = 3
+
+
+def setup_data():
+    if os.environ['DATABASE_URL'] == f'sqlite:///{DB_PATH}' and os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    from app import create_app, init_db
+    app = create_app()
+    from models import db, User, Product, Cart, CartItem
+    with app.app_context():
+        init_db()
+        CartItem.query.delete()
+        Cart.query.delete()
+        User.query.filter(User.username.like('bench_cart_%')).delete(synchronize_session=False)
+        for i in range(USERS):
+            user = User(username=f'bench_cart_{i}', email=f'bench_cart_{i}@example.com')
+            user.set_password('bench')
+            db.session.add(user)
+        if Product.query.count() < PRODUCTS:
+            for i in range(PRODUCTS):
+                db.session.add(Product(name=f'Bench {i}', description='bench', price=10, category='labios', stock=100))
+        db.session.commit()
+        return [p.id for p in Product.query.order_by(Product.id).limit(PRODUCTS)]
+
+
+def clicker(base_url, username, product_ids, clicks, barrier, results, times):
+    session = requests.Session()
+    session.post(f'{base_url}/login', data={'username': username, 'password': 'bench'})
+    barrier.wait()
+    for i in range(clicks):
+        product_id = product_ids[i % len(product_ids)]
+        t = time.perf_counter()
+        try:
+            r = session.post(f'{base_url}/add_to_cart', json={'product_id': product_id, 'quantity': 1})
+            ok = r.status_code == 200 and r.json().get('success')
+        except (requests.RequestException, ValueError):
+            ok = False
+        times.append(time.perf_counter() - t)
+        if ok:
+            results[(username, product_id)] += 1
+        else:
+            results['errors'] += 1
+
+
+def verify(expected):
+    from app import create_app
+    app = create_app()
+    from models import db, User, Cart, CartItem
+    with app.app_context():
+        problems = 0
+        for user in User.query.filter(User.username.like('bench_cart_%')):
+            active = Cart.query.filter_by(user_id=user.id, is_active=True).all()
+            if len(active) != 1:
+                print(f"   ❌ {user.username}: {len(active)} carritos activos")
+                problems += 1
+                continue
+            lines = Counter()
+            for item in CartItem.query.filter_by(cart_id=active[0].id):
+                if item.product_id in lines:
+                    print(f"   ❌ {user.username}: línea duplicada del producto {item.product_id}")
+                    problems += 1
+                lines[item.product_id] += item.quantity
+            for (username, product_id), count in expected.items():
+                if username == user.username and lines[product_id] != count:
+                    print(f"   ❌ {username}/{product_id}: cantidad {lines[product_id]}, clics ok {count}")
+                    problems += 1
+        return problems
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    clicks = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    product_ids = setup_data()
+
+    port = free_port()
+    server = subprocess.Popen(
+        ['gunicorn', 'app:create_app()', '--bind', f'127.0.0.1:{port}',
+         '--workers', '2', '--threads', '4', '--worker-class', 'gthread'],
+        cwd=ROOT, env=dict(os.environ), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+
+    try:
+        for _ in range(100):
+            try:
+                requests.get(f'{base_url}/health', timeout=1)
+                break
+            except requests.RequestException:
+                time.sleep(0.2)
+
+        results, times = Counter(), []
+        barrier = threading.Barrier(threads)
+        workers = [threading.Thread(target=clicker, args=(base_url, f'bench_cart_{i % USERS}', product_ids,
+                                                          clicks, barrier, results, times))
+                   for i in range(threads)]
+        started = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+    errors = results.pop('errors', 0)
+    print(f"\n🛒 {threads} hilos x {clicks} clics ({USERS} usuarios, {PRODUCTS} productos) en {elapsed:.1f}s")
+    print(f"   ok {sum(results.values())}, errores {errors}, "
+          f"p50 {statistics.median(times) * 1000:.1f} ms, p95 {percentile(times, 95) * 1000:.1f} ms")
+    problems = verify(results)
+    print("   ✅ Sin carritos ni líneas duplicadas, cantidades exactas" if not problems
+          else f"   ❌ {problems} inconsistencias")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
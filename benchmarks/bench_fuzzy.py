@@ -0,0 +1,70 @@
+"""Benchmark: búsqueda con errores de tipeo (fuzzy.py) vs ILIKE y texto completo.
+
+Usa los mismos productos sintéticos que bench_search.py y compara, para
+consultas con errores ("rubr", "labial mate rubi", ...), la latencia y las
+filas de: ILIKE (la búsqueda original), el índice de texto completo y la
+búsqueda aproximada (pg_trgm en PostgreSQL, trigramas en memoria en SQLite).
+
+Uso:
+    python benchmarks/bench_fuzzy.py [num_productos]
+
+Usa DATABASE_URL si está definida; si no, una base SQLite temporal.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.gettempdir(), 'bench_fuzzy.db')}")
+os.environ.setdefault('SQL_LOG', 'off')
+os.environ.setdefault('RESERVATION_SWEEP_SECONDS', '0')
+
+from app import create_app, init_db  # noqa: E402
+from models import db, Product  # noqa: E402
+from search import search_products  # noqa: E402
+from fuzzy import fuzzy_products  # noqa: E402
+from suggest import suggest_index  # noqa: E402
+from bench_search import seed, ilike_query  # noqa: E402
+
+app = create_app()
+
+CONSULTAS = ['rubr', 'labial mate rubi', 'delinador negro', 'iluminadr dorado', 'mascara', 'sombra coral', 'xyz']
+
+
+def timed(run, repeat=5):
+    best, count = None, 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = len(run())
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, count
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with app.app_context():
+        init_db()
+        seed(total)
+        dialect = db.engine.dialect.name
+        print(f"\n🔤 {Product.query.count()} productos en {dialect}")
+        if dialect != 'postgresql':
+            start = time.perf_counter()
+            suggest_index.rebuild()
+            print(f"   índice de trigramas en memoria: {suggest_index.stats()['fuzzy_words']} palabras, "
+                  f"{(time.perf_counter() - start) * 1000:.0f} ms (compartido con /search/suggest)")
+
+        print(f"\n{'consulta':<20}{'ILIKE ms':>10}{'filas':>7}{'FTS ms':>10}{'filas':>7}{'fuzzy ms':>10}{'filas':>7}  mejor coincidencia")
+        for query in CONSULTAS:
+            ilike_ms, ilike_rows = timed(lambda: ilike_query(query).limit(50).all())
+            fts_ms, fts_rows = timed(lambda: search_products(query).limit(50).all())
+            fuzzy_ms, fuzzy_rows = timed(lambda: fuzzy_products(query, limit=50))
+            best = fuzzy_products(query, limit=1)
+            print(f"{query:<20}{ilike_ms:>10.2f}{ilike_rows:>7}{fts_ms:>10.2f}{fts_rows:>7}"
+                  f"{fuzzy_ms:>10.2f}{fuzzy_rows:>7}  {best[0].name if best else '-'}")
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Benchmark: latencia de registrar la orden al capturar el pago, de 1 a 100 líneas.
+
+Compara orders.place_order (inserts en bloque, una transacción) con el
+enfoque ORM fila por fila (session.add + flush por línea, un rollup por
+venta). Para cada tamaño de carrito mide la mediana y el número de
+sentencias SQL, y comprueba que repetir la captura no duplica la orden.
+
+Uso:
+    python benchmarks/bench_order.py [repeticiones]
+
+Usa DATABASE_URL si está definida; si no, una base SQLite temporal.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.gettempdir(), 'bench_order.db')}")
+os.environ.setdefault('RESERVATION_SWEEP_SECONDS', '0')
+
+from sqlalchemy import event  # noqa: E402
+
+from app import create_app, init_db  # noqa: E402
+from models import (db, User, Product, Cart, CartItem, Order, OrderItem, Venta,  # noqa: E402
+                    VentaDiaria, StockReservation)
+from cart_service import load_cart  # noqa: E402
+from inventory import reserve_cart, attach_order  # noqa: E402
+from orders import place_order  # noqa: E402
+
+app = create_app()
+
+LINE_COUNTS = (1, 5, 10, 25, 50, 100)
+
+
+def seed_products(count):
+    have = Product.query.filter(Product.name.like('Bench orden %')).count()
+    if have < count:
+        db.session.execute(db.insert(Product), [{
+            'name': f'Bench orden {i}', 'description': 'bench', 'price': 10 + i % 50,
+            'category': 'labios', 'stock': 10 ** 6
+        } for i in range(have, count)])
+        db.session.commit()
+    return [p.id for p in Product.query.filter(Product.name.like('Bench orden %')).order_by(Product.id).limit(count)]
+
+
+def new_cart(product_ids, n):
+    user = User(username=f'bench_order_{time.perf_counter_ns()}', email=f'{time.perf_counter_ns()}@example.com')
+    db.session.add(user)
+    db.session.flush()
+    cart = Cart(user_id=user.id, is_active=True)
+    db.session.add(cart)
+    db.session.flush()
+    db.session.execute(db.insert(CartItem), [{'cart_id': cart.id, 'product_id': pid, 'quantity': 2}
+                                             for pid in product_ids[:n]])
+    db.session.commit()
+    return user.id
+
+
+def reserve(user_id, payment_id):
+    """Lo que hace /create-paypal-order antes de cobrar: place_order registra lo apartado"""
+    reserve_cart(user_id)
+    attach_order(user_id, payment_id)
+    db.session.commit()
+
+
+def place_order_row_by_row(user_id, payment_id):
+    """Referencia: el ORM escribiendo cada fila por separado"""
+    summary = load_cart(user_id)
+    order = Order(user_id=user_id, total=summary.total, status='paid', payment_id=payment_id)
+    db.session.add(order)
+    db.session.flush()
+    today = datetime.utcnow().date()
+    for item in summary.items:
+        db.session.add(OrderItem(order_id=order.id, product_id=item['product'].id,
+                                 quantity=item['quantity'], price=item['product'].price))
+        db.session.add(Venta(producto_id=item['product'].id, cantidad=item['quantity'], usuario_id=user_id))
+        rollup = VentaDiaria.query.filter_by(fecha=today, producto_id=item['product'].id).first()
+        if rollup:
+            rollup.cantidad += item['quantity']
+            rollup.ingresos += item['quantity'] * item['product'].price
+        else:
+            db.session.add(VentaDiaria(fecha=today, producto_id=item['product'].id,
+                                       cantidad=item['quantity'], ingresos=item['quantity'] * item['product'].price))
+        db.session.flush()
+    summary.cart.is_active = False
+    db.session.commit()
+
+
+def measure(fn, product_ids, n, repeats, statements):
+    times, counts = [], []
+    for i in range(repeats):
+        user_id = new_cart(product_ids, n)
+        payment_id = f'BENCH-{n}-{i}-{time.perf_counter_ns()}'
+        reserve(user_id, payment_id)
+        statements.clear()
+        t = time.perf_counter()
+        fn(user_id, payment_id)
+        times.append(time.perf_counter() - t)
+        counts.append(len(statements))
+    return statistics.median(times) * 1000, statistics.median(counts)
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    with app.app_context():
+        init_db()
+        product_ids = seed_products(max(LINE_COUNTS))
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(1))
+
+        print(f"\n🧾 Registro de la orden al capturar ({db.engine.dialect.name}, mediana de {repeats})")
+        print(f"   {'líneas':>6}   {'en bloque':>18}   {'fila por fila':>18}")
+        for n in LINE_COUNTS:
+            bulk_ms, bulk_sql = measure(lambda uid, pid: place_order(uid, pid), product_ids, n, repeats, statements)
+            rows_ms, rows_sql = measure(place_order_row_by_row, product_ids, n, repeats, statements)
+            print(f"   {n:>6}   {bulk_ms:8.1f} ms {bulk_sql:4.0f} SQL   {rows_ms:8.1f} ms {rows_sql:4.0f} SQL")
+
+        # Idempotencia: capturar dos veces el mismo pago
+        user_id = new_cart(product_ids, 10)
+        payment_id = f'BENCH-RETRY-{time.perf_counter_ns()}'
+        reserve(user_id, payment_id)
+        first, created = place_order(user_id, payment_id)
+        again, created_again = place_order(user_id, payment_id)
+        duplicates = Order.query.filter_by(payment_id=payment_id).count()
+        print(f"\n   reintento del mismo pago: orden {first.id} -> {again.id}, "
+              f"creada de nuevo: {created_again}, órdenes con ese pago: {duplicates} "
+              f"{'✅' if created and not created_again and duplicates == 1 else '❌'}")
+
+        StockReservation.query.delete()
+        db.session.commit()
+
+
+if __name__ == '__main__':
+    main()
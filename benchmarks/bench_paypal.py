@@ -0,0 +1,96 @@
+"""Benchmark: costo de PayPal por checkout, sin conexión (usa paypal_stub.py).
+
+Compara el flujo anterior (POST OAuth nuevo + requests.post sin pool en cada
+checkout) con PayPalClient (token cacheado + Session keep-alive), y mide el
+peor caso cuando PayPal falla o se cuelga (timeouts + reintentos).
+
+Uso:
+    python benchmarks/bench_paypal.py [checkouts] [latencia_s]
+"""
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from paypal_client import PayPalClient, PayPalError  # noqa: E402
+from paypal_stub import serve  # noqa: E402
+
+
+def legacy_checkout(base_url):
+    """Lo que hacía app.py: token nuevo y conexión nueva en cada llamada, sin timeout"""
+    token = requests.post(f"{base_url}/v1/oauth2/token", auth=('id', 'secret'),
+                          data={"grant_type": "client_credentials"}).json()['access_token']
+    headers = {"Authorization": f"Bearer {token}"}
+    order = requests.post(f"{base_url}/v2/checkout/orders", headers=headers,
+                          json={"intent": "CAPTURE"}).json()
+    requests.post(f"{base_url}/v2/checkout/orders/{order['id']}/capture", headers=headers)
+
+
+def client_checkout(client):
+    order = client.create_order(10.0)
+    client.capture_order(order['id'])
+
+
+def run(label, fn, n):
+    times = []
+    for _ in range(n):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    print(f"   {label:<22} p50 {statistics.median(times) * 1000:7.1f} ms   "
+          f"total {sum(times):6.2f} s")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+
+    server, state = serve(latency=latency)
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    print(f"\n💳 {n} checkouts, latencia simulada {latency * 1000:.0f} ms por petición")
+
+    run('anterior', lambda: legacy_checkout(base_url), n)
+    before = dict(state.counters)
+    client = PayPalClient(base_url=base_url, client_id='id', client_secret='secret')
+    run('PayPalClient', lambda: client_checkout(client), n)
+    print(f"   tokens pedidos: {state.counters['token'] - before['token']} "
+          f"(antes {before['token']}), conexiones TCP: {state.counters['connections'] - before['connections']} "
+          f"(antes {before['connections']})")
+    server.shutdown()
+
+    # Fallos: 50% de 503 -> los reintentos con backoff los absorben
+    server, state = serve(latency=latency, fail_rate=0.5)
+    client = PayPalClient(base_url=f'http://127.0.0.1:{server.server_port}',
+                          client_id='id', client_secret='secret', timeout=(1, 2), retries=3, backoff=0.05)
+    ok = 0
+    for _ in range(20):
+        try:
+            client_checkout(client)
+            ok += 1
+        except PayPalError:
+            pass
+    print(f"\n⚠️ 50% de respuestas 503: {ok}/20 checkouts completados, "
+          f"{state.counters['failures']} respuestas 503 absorbidas por los reintentos")
+    server.shutdown()
+
+    # Cuelgue: PayPal nunca responde -> el hilo queda libre tras el timeout
+    server, _ = serve(hang_rate=1.0)
+    client = PayPalClient(base_url=f'http://127.0.0.1:{server.server_port}',
+                          client_id='id', client_secret='secret', timeout=(1, 1), retries=1, backoff=0)
+    t = time.perf_counter()
+    try:
+        client.get_access_token()
+    except PayPalError:
+        pass
+    print(f"🧊 PayPal colgado: el hilo se libera en {time.perf_counter() - t:.1f} s "
+          f"(antes: indefinidamente)")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
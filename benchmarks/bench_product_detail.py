@@ -0,0 +1,93 @@
+"""Benchmark: GET condicional de /product/<id> (304 vs página completa).
+
+Mide la latencia de la página del producto renderizada (200) contra la
+revalidación con If-None-Match (304, solo la consulta de versión), y
+verifica que editar el producto en admin_edit_product sube la versión,
+cambia el ETag y deja de responder 304 con el ETag viejo.
+
+Uso:
+    python benchmarks/bench_product_detail.py [repeticiones]
+
+Usa DATABASE_URL si está definida; si no, una base SQLite temporal.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DB_PATH = os.path.join(tempfile.gettempdir(), 'bench_product_detail.db')
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{DB_PATH}')
+os.environ.setdefault('RESERVATION_SWEEP_SECONDS', '0')
+os.environ.setdefault('SQL_LOG', 'off')
+
+from app import create_app, init_db  # noqa: E402
+from models import db, User, Product  # noqa: E402
+
+app = create_app()
+
+
+def setup():
+    with app.app_context():
+        init_db()
+        admin = User.query.filter_by(username='bench_pd_admin').first()
+        if not admin:
+            admin = User(username='bench_pd_admin', email='bench_pd_admin@example.com', role='admin')
+            admin.set_password('bench')
+            db.session.add(admin)
+        product = Product(name='Labial condicional', description='bench ' * 50, price=199,
+                          category='labios', stock=10)
+        db.session.add(product)
+        db.session.commit()
+        return product.id
+
+
+def timed(client, path, repeats, headers=None):
+    times, status = [], None
+    for _ in range(repeats):
+        t = time.perf_counter()
+        status = client.get(path, headers=headers).status_code
+        times.append(time.perf_counter() - t)
+    return statistics.median(times) * 1000, status
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    product_id = setup()
+    path = f'/product/{product_id}'
+    client = app.test_client()
+
+    first = client.get(path)
+    etag = first.headers['ETag']
+    full_ms, full_status = timed(client, path, repeats)
+    cond_ms, cond_status = timed(client, path, repeats, {'If-None-Match': etag})
+    print(f"\n🏷️ {path} (mediana de {repeats})")
+    print(f"   página completa   {full_ms:6.2f} ms  ({full_status})")
+    print(f"   If-None-Match     {cond_ms:6.2f} ms  ({cond_status})")
+
+    # La edición del admin tiene que invalidar el ETag
+    admin = app.test_client()
+    admin.post('/login', data={'username': 'bench_pd_admin', 'password': 'bench'})
+    with app.app_context():
+        before = db.session.get(Product, product_id).version
+    admin.post(f'/admin/product/edit/{product_id}', data={
+        'name': 'Labial condicional v2', 'description': 'bench', 'price': '209',
+        'category': 'labios', 'stock': '10'})
+    with app.app_context():
+        after = db.session.get(Product, product_id).version
+    stale = client.get(path, headers={'If-None-Match': etag})
+
+    checks = {
+        '304 con el ETag vigente': cond_status == 304,
+        'la edición sube la versión': after == before + 1,
+        'ETag viejo -> 200 con ETag nuevo': stale.status_code == 200 and stale.headers['ETag'] != etag,
+        'la página muestra la edición': b'Labial condicional v2' in stale.data,
+    }
+    for label, ok in checks.items():
+        print(f"   {'✅' if ok else '❌'} {label}")
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == '__main__':
+    main()
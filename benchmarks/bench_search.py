@@ -0,0 +1,83 @@
+"""Benchmark: búsqueda ILIKE vs índice de texto completo.
+
+Uso:
+    python benchmarks/bench_search.py [num_productos]
+
+Usa DATABASE_URL si está definida; si no, una base SQLite temporal.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.gettempdir(), 'bench_search.db')}")
+
+from app import create_app, init_db  # noqa: E402
+from models import db, Product  # noqa: E402
+from search import search_products  # noqa: E402
+
+app = create_app()
+
+TIPOS = ['Labial', 'Rúbor', 'Sombra', 'Base', 'Delineador', 'Máscara', 'Gloss', 'Corrector', 'Iluminador', 'Polvo']
+ACABADOS = ['Mate', 'Satinado', 'Brillante', 'Metálico', 'Natural', 'Intenso', 'Líquido', 'Compacto']
+COLORES = ['Rojo', 'Rosa', 'Nude', 'Coral', 'Vino', 'Durazno', 'Café', 'Negro', 'Dorado', 'Ruby']
+CATEGORIAS = ['labios', 'ojos', 'rostro']
+CONSULTAS = ['rubor', 'labial mate', 'ruby', 'delineador negro', 'iluminador dorado', 'xyz']
+
+
+def seed(total, batch_size=5000):
+    rng = random.Random(42)
+    existing = Product.query.count()
+    for start in range(existing, total, batch_size):
+        rows = []
+        for i in range(start, min(start + batch_size, total)):
+            name = f"{rng.choice(TIPOS)} {rng.choice(ACABADOS)} {rng.choice(COLORES)} {i}"
+            rows.append({
+                'name': name,
+                'description': f"{name} de larga duración, acabado {rng.choice(ACABADOS).lower()}",
+                'price': round(rng.uniform(5, 500), 2),
+                'category': rng.choice(CATEGORIAS),
+                'image_url': '',
+                'stock': rng.randint(0, 100),
+                'featured': False,
+            })
+        db.session.execute(db.insert(Product), rows)
+        db.session.commit()
+
+
+def ilike_query(query):
+    return Product.query.filter(
+        (Product.name.ilike(f'%{query}%')) |
+        (Product.description.ilike(f'%{query}%')) |
+        (Product.category.ilike(f'%{query}%'))
+    )
+
+
+def timed(build_query, query, repeat=5):
+    best = None
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = len(build_query(query).limit(50).all())
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, count
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with app.app_context():
+        init_db()
+        seed(total)
+        print(f"\n📊 {Product.query.count()} productos en {db.engine.dialect.name}\n")
+        print(f"{'consulta':<22}{'ILIKE ms':>12}{'FTS ms':>12}{'filas':>8}")
+        for query in CONSULTAS:
+            ilike_ms, _ = timed(ilike_query, query)
+            fts_ms, rows = timed(search_products, query)
+            print(f"{query:<22}{ilike_ms:>12.2f}{fts_ms:>12.2f}{rows:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark: tiempo de arranque de la app.
+
+Mide, cada uno en un proceso nuevo:
+    import      `import app` + create_app() (sin tocar la base de datos ni el disco)
+    primera     primera petición a /health con el cliente de pruebas
+    gunicorn    desde lanzar gunicorn hasta la primera respuesta, con y sin preload_app
+
+Uso:
+    python benchmarks/bench_startup.py [repeticiones]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_video import free_port  # noqa: E402
+
+PROBE = """
+import time
+t = time.perf_counter()
+import app
+client = app.create_app().test_client()
+t_import = time.perf_counter() - t
+t = time.perf_counter()
+client.get('/health')
+print(t_import, time.perf_counter() - t)
+"""
+
+
+def env():
+    environ = dict(os.environ)
+    environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.gettempdir(), 'bench_startup.db')}")
+    return environ
+
+
+def in_process():
+    out = subprocess.run([sys.executable, '-W', 'ignore', '-c', PROBE], cwd=ROOT, env=env(),
+                         capture_output=True, text=True, check=True).stdout.split()
+    return float(out[-2]), float(out[-1])
+
+
+def gunicorn_boot(preload):
+    port = free_port()
+    environ = env()
+    environ.update(PORT=str(port), GUNICORN_PRELOAD='true' if preload else 'false')
+    started = time.perf_counter()
+    server = subprocess.Popen(['gunicorn', 'app:create_app()', '--bind', f'127.0.0.1:{port}'],
+                              cwd=ROOT, env=environ, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                requests.get(f'http://127.0.0.1:{port}/health', timeout=1)
+                return time.perf_counter() - started
+            except requests.RequestException:
+                if server.poll() is not None or time.perf_counter() - started > 30:
+                    raise RuntimeError('gunicorn no arrancó')
+                time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    samples = [in_process() for _ in range(repeats)]
+    boot_preload = [gunicorn_boot(True) for _ in range(repeats)]
+    boot_lazy = [gunicorn_boot(False) for _ in range(repeats)]
+
+    print(f"\n🚀 Arranque (mediana de {repeats})")
+    print(f"   import app              {statistics.median(s[0] for s in samples) * 1000:7.0f} ms")
+    print(f"   primera petición        {statistics.median(s[1] for s in samples) * 1000:7.0f} ms")
+    print(f"   gunicorn con preload    {statistics.median(boot_preload) * 1000:7.0f} ms")
+    print(f"   gunicorn sin preload    {statistics.median(boot_lazy) * 1000:7.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Prueba de carga: reservas de stock sobre un solo producto muy vendido.
+
+Muchos hilos intentan apartar el mismo producto a la vez (más demanda que
+stock) con dos estrategias:
+    condicional  inventory.reserve_cart: UPDATE ... SET stock = stock - n WHERE stock >= n
+    bloqueo      SELECT ... FOR UPDATE, validar en Python y luego UPDATE
+                 (la fila queda bloqueada durante toda la validación)
+
+Para cada una mide reservas/s y latencias, y verifica que no se vendió de
+más: reservas exitosas == stock inicial y stock final == 0.
+
+Uso:
+    python benchmarks/bench_stock.py [hilos] [stock_inicial] [demanda_por_hilo]
+
+Usa DATABASE_URL si está definida (recomendado PostgreSQL, donde FOR UPDATE
+bloquea de verdad); si no, una base SQLite temporal.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.gettempdir(), 'bench_stock.db')}")
+os.environ.setdefault('RESERVATION_SWEEP_SECONDS', '0')
+
+from app import create_app, init_db  # noqa: E402
+from models import db, User, Product, Cart, CartItem, StockReservation  # noqa: E402
+from inventory import reserve_cart, RESERVATION_TTL  # noqa: E402
+from bench_video import percentile  # noqa: E402
+
+app = create_app()
+
+# Tiempo entre leer el stock y escribirlo en la estrategia con bloqueo
+# (equivale a un ida y vuelta a la base de datos desde la app)
+APP_ROUND_TRIP = 0.002
+
+
+def seed(users, stock):
+    """Un producto con `stock` unidades y `users` carritos con 1 unidad de él"""
+    StockReservation.query.delete()
+    CartItem.query.delete()
+    Cart.query.delete()
+    User.query.filter(User.username.like('bench_stock_%')).delete(synchronize_session=False)
+    Product.query.filter_by(name='Labial viral').delete()
+    db.session.commit()
+
+    product = Product(name='Labial viral', description='bench', price=199, category='labios', stock=stock)
+    db.session.add(product)
+    db.session.execute(db.insert(User), [{
+        'username': f'bench_stock_{i}', 'email': f'bench_stock_{i}@example.com', 'role': 'customer'
+    } for i in range(users)])
+    db.session.commit()
+
+    user_ids = [u.id for u in User.query.filter(User.username.like('bench_stock_%')).order_by(User.id)]
+    db.session.execute(db.insert(Cart), [{'user_id': uid, 'is_active': True} for uid in user_ids])
+    carts = db.session.query(Cart.id).filter(Cart.user_id.in_(user_ids)).all()
+    db.session.execute(db.insert(CartItem), [{'cart_id': c.id, 'product_id': product.id, 'quantity': 1}
+                                             for c in carts])
+    db.session.commit()
+    return product.id, user_ids
+
+
+def reserve_with_lock(user_id):
+    """Estrategia de referencia: bloqueo pesimista de las filas de producto"""
+    lines = (db.session.query(CartItem.product_id, CartItem.quantity)
+             .join(Cart, Cart.id == CartItem.cart_id)
+             .filter(Cart.user_id == user_id, Cart.is_active == True)
+             .all())
+    products = {p.id: p for p in (Product.query
+                                  .filter(Product.id.in_([line.product_id for line in lines]))
+                                  .order_by(Product.id)
+                                  .with_for_update())}
+    time.sleep(APP_ROUND_TRIP)
+    if any((products[line.product_id].stock or 0) < line.quantity for line in lines):
+        db.session.rollback()
+        return False
+    now = datetime.utcnow()
+    for line in lines:
+        products[line.product_id].stock -= line.quantity
+        db.session.add(StockReservation(user_id=user_id, product_id=line.product_id, quantity=line.quantity,
+                                        status='held', created_at=now, expires_at=now + RESERVATION_TTL))
+    db.session.commit()
+    return True
+
+
+def run(label, reserve, threads, stock, per_thread):
+    with app.app_context():
+        product_id, user_ids = seed(threads * per_thread, stock)
+
+    results = {'ok': 0, 'failed': 0, 'errors': 0}
+    times = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(ids):
+        with app.app_context():
+            barrier.wait()
+            for user_id in ids:
+                t = time.perf_counter()
+                try:
+                    outcome = 'ok' if reserve(user_id) else 'failed'
+                except Exception:
+                    db.session.rollback()
+                    outcome = 'errors'
+                elapsed = time.perf_counter() - t
+                with lock:
+                    results[outcome] += 1
+                    times.append(elapsed)
+            db.session.remove()
+
+    workers = [threading.Thread(target=worker, args=(user_ids[i::threads],)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        final_stock = db.session.get(Product, product_id).stock
+        held = StockReservation.query.filter_by(product_id=product_id, status='held').count()
+
+    attempts = sum(results.values())
+    correct = results['ok'] == held == stock - final_stock and final_stock >= 0
+    print(f"   {label:<12} {attempts / elapsed:8.0f} intentos/s   "
+          f"p50 {statistics.median(times) * 1000:6.1f} ms   p95 {percentile(times, 95) * 1000:6.1f} ms   "
+          f"ok {results['ok']}  sin stock {results['failed']}  errores {results['errors']}   "
+          f"stock final {final_stock}  {'✅' if correct else '❌ sobreventa/inconsistencia'}")
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    stock = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    per_thread = int(sys.argv[3]) if len(sys.argv) > 3 else 25
+
+    with app.app_context():
+        init_db()
+        engine = db.engine.dialect.name
+    print(f"\n📦 {threads} hilos x {per_thread} intentos sobre 1 producto con stock {stock} ({engine})")
+    run('condicional', lambda uid: reserve_cart(uid).ok, threads, stock, per_thread)
+    run('bloqueo', reserve_with_lock, threads, stock, per_thread)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,389 @@
+"""Prueba de carga de la tienda: throughput y latencias por ruta, contra una línea base.
+
+Siembra la base (productos, usuarios con carrito, órdenes y ventas) a la
+escala pedida, levanta la app (gunicorn como en producción, o el servidor
+WSGI de werkzeug con hilos) y durante `--duration` segundos lanza
+`--concurrency` compradores, cada uno con su sesión iniciada, que recorren
+una mezcla de rutas: index, products, search, product_detail, cart,
+checkout y los endpoints JSON del carrito (/add_to_cart, /cart/batch,
+/update_cart_quantity).
+
+Por ruta informa peticiones/s, p50/p95/p99 y errores: cada escenario
+verifica el contenido de la respuesta (la página esperada, o el JSON con
+success y el carrito actualizado), no solo el status; una página de
+"Error ..." con 200 cuenta como error. Termina con código 1 si hubo
+respuestas incorrectas o, con --baseline, si alguna ruta empeoró más que
+--tolerance respecto a la corrida guardada.
+
+Uso:
+    python benchmarks/bench_storefront.py                         # corrida + comparación con baseline.json
+    python benchmarks/bench_storefront.py --save-baseline         # guardar esta corrida como línea base
+    DATABASE_URL=postgresql://localhost/makeup_bench python benchmarks/bench_storefront.py --products 50000
+
+Sin DATABASE_URL usa una base SQLite temporal que se recrea en cada corrida.
+Con DATABASE_URL solo agrega los datos de carga que falten (usuarios carga_*).
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DB_PATH = os.path.join(tempfile.gettempdir(), 'bench_storefront.db')
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+PASSWORD = 'carga'
+
+if 'DATABASE_URL' not in os.environ:
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ.setdefault('RESERVATION_SWEEP_SECONDS', '0')
+os.environ.setdefault('SQL_LOG', 'off')
+
+from bench_video import free_port, percentile  # noqa: E402
+
+TIPOS = ['Labial', 'Rubor', 'Sombra', 'Base', 'Delineador', 'Máscara', 'Gloss', 'Corrector', 'Iluminador', 'Polvo']
+ACABADOS = ['Mate', 'Satinado', 'Brillante', 'Metálico', 'Natural', 'Intenso', 'Líquido', 'Compacto']
+COLORES = ['Rojo', 'Rosa', 'Nude', 'Coral', 'Vino', 'Durazno', 'Café', 'Negro', 'Dorado', 'Ruby']
+CATEGORIAS = ['labios', 'ojos', 'rostro']
+BUSQUEDAS = ['labial', 'rubor rosa', 'mate', 'delineador negro', 'iluminador dorado', 'gloss', 'xyz']
+
+# Mezcla de tráfico: (ruta, peso). Mayormente navegación, algo de carrito.
+MIX = [
+    ('index', 15),
+    ('products', 18),
+    ('search', 14),
+    ('product_detail', 25),
+    ('cart', 8),
+    ('checkout', 4),
+    ('add_to_cart', 7),
+    ('cart_batch', 5),
+    ('update_cart_quantity', 4),
+]
+
+
+def seed(products, users, cart_items, ventas, rng):
+    """Inserciones en bloque; reutiliza lo que ya exista en la base"""
+    from werkzeug.security import generate_password_hash
+    from app import create_app, init_db
+    app = create_app()
+    from models import db, User, Product, Cart, CartItem, Venta
+    from rollups import backfill_rollups
+
+    with app.app_context():
+        init_db()
+        have = Product.query.count()
+        for start in range(have, products, 5000):
+            db.session.execute(db.insert(Product), [{
+                'name': f"{rng.choice(TIPOS)} {rng.choice(ACABADOS)} {rng.choice(COLORES)} {i}",
+                'description': f"Producto de carga {i}, acabado {rng.choice(ACABADOS).lower()}",
+                'price': round(rng.uniform(5, 500), 2),
+                'category': rng.choice(CATEGORIAS),
+                'stock': 10 ** 6,
+                'featured': i < 12
+            } for i in range(start, min(start + 5000, products))])
+            db.session.commit()
+        product_ids = [pid for (pid,) in db.session.query(Product.id).order_by(Product.id).limit(products)]
+
+        have = User.query.filter(User.username.like('carga_%')).count()
+        if have < users:
+            # Un solo hash para todos: calcularlo por usuario tomaría segundos
+            password_hash = generate_password_hash(PASSWORD)
+            db.session.execute(db.insert(User), [{
+                'username': f'carga_{i}', 'email': f'carga_{i}@example.com',
+                'password_hash': password_hash, 'role': 'customer'
+            } for i in range(have, users)])
+            db.session.commit()
+        user_ids = [uid for (uid,) in db.session.query(User.id)
+                    .filter(User.username.like('carga_%')).order_by(User.id).limit(users)]
+
+        without_cart = [uid for uid in user_ids
+                        if not Cart.query.filter_by(user_id=uid, is_active=True).first()]
+        if without_cart:
+            db.session.execute(db.insert(Cart), [{'user_id': uid, 'is_active': True} for uid in without_cart])
+            carts = db.session.query(Cart.id).filter(Cart.user_id.in_(without_cart), Cart.is_active == True).all()
+            db.session.execute(db.insert(CartItem), [
+                {'cart_id': cart_id, 'product_id': pid, 'quantity': rng.randint(1, 3)}
+                for (cart_id,) in carts for pid in rng.sample(product_ids, min(cart_items, len(product_ids)))])
+            db.session.commit()
+
+        have = Venta.query.count()
+        if have < ventas:
+            now = datetime.utcnow()
+            for start in range(have, ventas, 5000):
+                db.session.execute(db.insert(Venta), [{
+                    'producto_id': rng.choice(product_ids), 'cantidad': rng.randint(1, 4),
+                    'usuario_id': rng.choice(user_ids), 'fecha': now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+                } for _ in range(start, min(start + 5000, ventas))])
+                db.session.commit()
+            backfill_rollups()
+
+        return product_ids, [f'carga_{i}' for i in range(users)], db.engine.dialect.name
+
+
+def start_server(kind, port):
+    if kind == 'gunicorn':
+        process = subprocess.Popen(['gunicorn', 'app:create_app()', '--bind', f'127.0.0.1:{port}'],
+                                   cwd=ROOT, env=dict(os.environ),
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return process.terminate
+    from werkzeug.serving import make_server
+    from app import create_app
+    app = create_app()
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.shutdown
+
+
+def wait_ready(base_url):
+    for _ in range(150):
+        try:
+            requests.get(f'{base_url}/health', timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError('El servidor no arrancó')
+
+
+def request_for(route, rng, product_ids):
+    """(método, ruta, json, check) de una petición de la mezcla.
+
+    `check(response)` devuelve None si la respuesta es la esperada o el motivo
+    por el que no lo es: un 200 con la página de "Error ..." también falla.
+    """
+    product_id = rng.choice(product_ids)
+    if route == 'index':
+        return 'GET', '/', None, page_with('Belleza profesional a tu alcance')
+    if route == 'products':
+        category = rng.choice(CATEGORIAS + [''])
+        return 'GET', f"/products?category={category}", None, page_with('Nuestros Productos', 'class="product-card"')
+    if route == 'search':
+        query = rng.choice(BUSQUEDAS)
+        return 'GET', f"/search?q={query}", None, page_with('Resultados de búsqueda', f'"{query}"')
+    if route == 'product_detail':
+        return 'GET', f'/product/{product_id}', None, page_with(f'data-product-id="{product_id}"')
+    if route == 'cart':
+        return 'GET', '/cart', None, page_with('Tu Carrito de Compras', 'class="cart-item"')
+    if route == 'checkout':
+        return 'GET', '/checkout', None, page_with('Finalizar Compra', 'grand-total')
+    if route == 'add_to_cart':
+        return 'POST', '/add_to_cart', {'product_id': product_id, 'quantity': 1}, json_success()
+    if route == 'cart_batch':
+        added, quantity = rng.choice(product_ids), rng.randint(1, 3)
+        return 'POST', '/cart/batch', {'operations': [
+            {'op': 'add', 'product_id': added, 'quantity': 1},
+            {'op': 'set', 'product_id': product_id, 'quantity': quantity}]}, json_success(
+                lambda data: batch_applied(data, added, product_id, quantity))
+    # Actualizar un producto que no está en el carrito es una respuesta válida
+    return ('POST', '/update_cart_quantity', {'product_id': product_id, 'quantity': rng.randint(1, 3)},
+            json_success(allowed_failure='Producto no encontrado en el carrito'))
+
+
+def batch_applied(data, added, product_id, quantity):
+    """El carrito devuelto tiene la línea agregada y, si estaba, la fijada con su cantidad"""
+    lines = {item['product_id']: item['quantity'] for item in data.get('items', [])}
+    if added != product_id and added not in lines:
+        return f'falta el producto agregado {added}'
+    # 'set' solo cambia líneas existentes
+    if product_id in lines and lines[product_id] != quantity:
+        return f'el producto {product_id} quedó con {lines[product_id]} y no {quantity}'
+    return True
+
+
+def page_with(*markers):
+    def check(response):
+        if response.status_code != 200:
+            return f'status {response.status_code}'
+        if not response.headers.get('Content-Type', '').startswith('text/html'):
+            return f"Content-Type {response.headers.get('Content-Type')}"
+        text = response.text
+        if text.startswith('Error '):
+            return text[:120]
+        missing = [marker for marker in markers if marker not in text]
+        return f'falta {missing[0]!r} en la página' if missing else None
+    return check
+
+
+def json_success(extra=None, allowed_failure=None):
+    def check(response):
+        if response.status_code != 200:
+            return f'status {response.status_code}'
+        data = response.json()
+        if data.get('success') is not True:
+            if allowed_failure and data.get('message') == allowed_failure:
+                return None
+            return f"success={data.get('success')}: {data.get('message')}"
+        result = extra(data) if extra else True
+        return None if result is True else result
+    return check
+
+
+def shopper(base_url, username, product_ids, seed_value, deadline, warmup_until, results, lock):
+    rng = random.Random(seed_value)
+    routes, weights = zip(*MIX)
+    session = requests.Session()
+    session.post(f'{base_url}/login', data={'username': username, 'password': PASSWORD})
+    while time.perf_counter() < deadline:
+        route = rng.choices(routes, weights)[0]
+        method, path, body, check = request_for(route, rng, product_ids)
+        t = time.perf_counter()
+        try:
+            problem = check(session.request(method, f'{base_url}{path}', json=body))
+        except (requests.RequestException, ValueError) as e:
+            problem = str(e)
+        elapsed = time.perf_counter() - t
+        if t < warmup_until:
+            continue
+        with lock:
+            results[route]['times'].append(elapsed)
+            if problem:
+                results[route]['errors'] += 1
+                results[route]['problems'][problem] += 1
+
+
+def summarize(results, seconds):
+    summary = {}
+    for route, _ in MIX:
+        times = results[route]['times']
+        if not times:
+            continue
+        summary[route] = {
+            'requests': len(times),
+            'rps': round(len(times) / seconds, 1),
+            'p50_ms': round(statistics.median(times) * 1000, 2),
+            'p95_ms': round(percentile(times, 95) * 1000, 2),
+            'p99_ms': round(percentile(times, 99) * 1000, 2),
+            'errors': results[route]['errors']
+        }
+    return summary
+
+
+def problems(results):
+    """Motivo más frecuente de las respuestas incorrectas de cada ruta"""
+    return {route: results[route]['problems'].most_common(1)[0]
+            for route, _ in MIX if results[route]['problems']}
+
+
+def compare(summary, baseline, tolerance):
+    """Rutas que empeoraron: p95 más alto o throughput más bajo que la base (más allá de la tolerancia)"""
+    regressions = []
+    for route, now in summary.items():
+        before = baseline['routes'].get(route)
+        if not before:
+            continue
+        # Piso de 2 ms: en rutas de 1-3 ms la variación normal ya supera cualquier porcentaje
+        if now['p95_ms'] > before['p95_ms'] * (1 + tolerance) and now['p95_ms'] - before['p95_ms'] > 2:
+            regressions.append(f"{route}: p95 {before['p95_ms']} -> {now['p95_ms']} ms")
+        if now['rps'] < before['rps'] * (1 - tolerance):
+            regressions.append(f"{route}: {before['rps']} -> {now['rps']} peticiones/s")
+        # Errores como proporción: la cantidad depende de cuántas peticiones tocaron a la ruta
+        rate_before = before['errors'] / before['requests']
+        rate_now = now['errors'] / now['requests']
+        if rate_now > rate_before + 0.01:
+            regressions.append(f"{route}: errores {rate_before:.1%} -> {rate_now:.1%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=64)
+    parser.add_argument('--cart-items', type=int, default=5)
+    parser.add_argument('--ventas', type=int, default=20000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--warmup', type=float, default=3)
+    parser.add_argument('--server', choices=['gunicorn', 'werkzeug'], default='gunicorn')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.35)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    product_ids, usernames, dialect = seed(args.products, args.users, args.cart_items, args.ventas, rng)
+    print(f"\n🌱 Base {dialect}: {args.products} productos, {args.users} usuarios, "
+          f"{args.ventas} ventas ({time.perf_counter() - started:.1f}s)")
+
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    stop_server = start_server(args.server, port)
+    try:
+        wait_ready(base_url)
+        results = defaultdict(lambda: {'times': [], 'errors': 0, 'problems': Counter()})
+        lock = threading.Lock()
+        now = time.perf_counter()
+        warmup_until = now + args.warmup
+        deadline = warmup_until + args.duration
+        shoppers = [threading.Thread(target=shopper, args=(base_url, usernames[i % len(usernames)], product_ids,
+                                                           args.seed + i, deadline, warmup_until, results, lock))
+                    for i in range(args.concurrency)]
+        for t in shoppers:
+            t.start()
+        for t in shoppers:
+            t.join()
+    finally:
+        stop_server()
+
+    summary = summarize(results, args.duration)
+    total = sum(r['requests'] for r in summary.values())
+    print(f"🛍️ {args.concurrency} compradores durante {args.duration:.0f}s con {args.server}: "
+          f"{total / args.duration:.0f} peticiones/s\n")
+    print(f"   {'ruta':<22}{'pet/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errores':>9}")
+    for route, r in summary.items():
+        print(f"   {route:<22}{r['rps']:>8}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['errors']:>9}")
+    wrong = problems(results)
+    if wrong:
+        print("\n❌ Respuestas incorrectas:")
+        for route, (problem, count) in wrong.items():
+            print(f"   - {route}: {count}× {problem}")
+
+    meta = {
+        'database': dialect, 'server': args.server, 'products': args.products, 'users': args.users,
+        'ventas': args.ventas, 'concurrency': args.concurrency, 'duration': args.duration
+    }
+    if args.save_baseline:
+        if wrong:
+            print("\n   (no se guarda una línea base con respuestas incorrectas)")
+            sys.exit(1)
+        with open(args.baseline, 'w') as f:
+            json.dump({'meta': meta, 'recorded_at': datetime.utcnow().isoformat(timespec='seconds'),
+                       'routes': summary}, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"\n💾 Línea base guardada en {os.path.relpath(args.baseline)}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("\n   (sin línea base: guárdala con --save-baseline)")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline['meta'] != meta:
+        print(f"\n⚠️ La línea base se tomó con otra configuración: {baseline['meta']}")
+    regressions = compare(summary, baseline, args.tolerance)
+    if wrong:
+        sys.exit(1)
+    if regressions:
+        print(f"\n❌ Regresiones respecto a la línea base (tolerancia {args.tolerance:.0%}):")
+        for line in regressions:
+            print(f"   - {line}")
+        sys.exit(1)
+    print(f"\n✅ Sin regresiones respecto a la línea base (tolerancia {args.tolerance:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Microbenchmark: índice de sugerencias en memoria (suggest.py).
+
+Carga N nombres sintéticos directo en el índice (sin base de datos) y mide:
+construcción completa, latencia de suggest() por tipo de prefijo (la
+primera consulta de un prefijo corto calcula su top-k, las siguientes lo
+reutilizan) y el costo de las actualizaciones incrementales del admin.
+Al final mide el endpoint /search/suggest completo (Flask + JSON).
+
+Uso:
+    python benchmarks/bench_suggest.py [num_nombres]
+
+Usa DATABASE_URL si está definida; si no, una base SQLite temporal.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.gettempdir(), 'bench_suggest.db')}")
+os.environ.setdefault('SQL_LOG', 'off')
+os.environ.setdefault('RESERVATION_SWEEP_SECONDS', '0')
+os.environ.setdefault('SUGGEST_REFRESH_SECONDS', '3600')
+
+from app import create_app, init_db  # noqa: E402
+from suggest import SuggestIndex, suggest_index  # noqa: E402
+
+app = create_app()
+
+TIPOS = ['Labial', 'Rúbor', 'Sombra', 'Base', 'Delineador', 'Máscara', 'Gloss', 'Corrector', 'Iluminador', 'Polvo']
+ACABADOS = ['Mate', 'Satinado', 'Brillante', 'Metálico', 'Natural', 'Intenso', 'Líquido', 'Compacto']
+COLORES = ['Rojo', 'Rosa', 'Nude', 'Coral', 'Vino', 'Durazno', 'Café', 'Negro', 'Dorado', 'Ruby']
+CATEGORIAS = ['labios', 'ojos', 'rostro']
+PREFIJOS = {
+    'una letra': ['l', 'r', 's', 'b', 'm'],
+    'dos letras': ['la', 'ru', 'so', 'de', 'ma'],
+    'palabra': ['labial', 'rubor', 'sombra', 'corrector', 'gloss'],
+    'dos palabras': ['labial mate', 'rubor nude', 'sombra coral r', 'gloss vino', 'base natural'],
+    'número': ['1234', '99', '500', '7777', '31415'],
+    'sin resultados': ['xyz', 'qqq', 'labial zz', 'kw', 'zzzz'],
+}
+
+
+def synthetic_rows(total):
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    return [(i, f"{rng.choice(TIPOS)} {rng.choice(ACABADOS)} {rng.choice(COLORES)} {i}",
+             rng.choice(CATEGORIAS), round(rng.uniform(5, 500), 2),
+             int(rng.paretovariate(1.2)) - 1, rng.random() < 0.01, now)
+            for i in range(1, total + 1)]
+
+
+def micro(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def us(seconds):
+    return f"{seconds * 1e6:8.1f} µs"
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rows = synthetic_rows(total)
+    index = SuggestIndex()
+
+    start = time.perf_counter()
+    index.load(rows)
+    build = time.perf_counter() - start
+    stats = index.stats()
+    print(f"\n⌨️ Índice de sugerencias: {stats['products']} nombres, {stats['keys']} claves")
+    print(f"   construcción completa   {build * 1000:8.1f} ms")
+
+    print(f"\n   {'prefijo':<16}{'primera':>12}{'mediana':>12}{'p99':>12}")
+    worst = 0
+    for label, prefixes in PREFIJOS.items():
+        first = [micro(lambda p=p: index.suggest(p, 8), 1)[0] for p in prefixes]
+        times = [t for p in prefixes for t in micro(lambda p=p: index.suggest(p, 8), 400)]
+        times.sort()
+        p99 = times[int(len(times) * 0.99)]
+        worst = max(worst, p99)
+        print(f"   {label:<16}{us(max(first)):>12}{us(statistics.median(times)):>12}{us(p99):>12}")
+
+    product = SimpleNamespace(id=total + 1, name='Labial Mate Rojo Edición', category='labios',
+                              price=99.0, sold_count=3, featured=False, updated_at=datetime.utcnow())
+    add = micro(lambda: index.upsert(product), 200)
+    remove = micro(lambda: index.remove(product.id), 1)
+    print(f"\n   upsert (admin)          {us(statistics.median(add))}")
+    print(f"   remove (admin)          {us(remove[0])}")
+
+    # Las ediciones actualizan los tops guardados en lugar de descartarlos:
+    # tienen que seguir calientes y dar lo mismo que un índice recién construido
+    rng = random.Random(7)
+    current = {row[0]: row for row in rows}
+    for _ in range(300):
+        product_id = rng.randint(1, total)
+        if rng.random() < 0.2:
+            index.remove(product_id)
+            current.pop(product_id, None)
+        else:
+            row = (product_id, f"{rng.choice(TIPOS)} {rng.choice(COLORES)} {product_id}", rng.choice(CATEGORIAS),
+                   10.0, rng.randint(0, 400), False, datetime.utcnow())
+            index.upsert(SimpleNamespace(**dict(zip(('id', 'name', 'category', 'price', 'sold_count',
+                                                       'featured', 'updated_at'), row))))
+            current[product_id] = row
+    warm = max(micro(lambda p=p: index.suggest(p, 8), 1)[0] for p in PREFIJOS['una letra'])
+    fresh = SuggestIndex()
+    fresh.load(list(current.values()))
+    same = (all(index.suggest(p, 8) == fresh.suggest(p, 8) for prefixes in PREFIJOS.values() for p in prefixes)
+            and all(index.fuzzy(q, 0.3, 20) == fresh.fuzzy(q, 0.3, 20) for q in ('rubr', 'labial mate rubi', 'negr')))
+    print(f"   una letra tras ediciones{us(warm)}")
+
+    # El endpoint completo, con el índice global del proceso cargado con los mismos nombres
+    with app.app_context():
+        init_db()
+    suggest_index.load(rows)
+    client = app.test_client()
+    endpoint = micro(lambda: client.get('/search/suggest?q=labial+m'), 300)
+    print(f"\n   GET /search/suggest     {us(statistics.median(endpoint))}  (Flask + JSON, cliente de prueba)")
+
+    checks = {
+        f"p99 de suggest() {us(worst).strip()} (objetivo < 1 ms)": worst < 0.001,
+        'tras 300 ediciones coincide con un índice reconstruido': same,
+    }
+    print()
+    for label, ok in checks.items():
+        print(f"   {'✅' if ok else '❌'} {label}")
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark: ocupación de workers con espectadores de video buscando (seek).
+
+Levanta la app con gunicorn (misma config que railway.json: 2 workers x 4 hilos),
+lanza N espectadores que piden rangos aleatorios de un video de prueba y mide,
+al mismo tiempo, la latencia de /health: si los videos acaparan los hilos, la
+tienda se vuelve lenta.
+
+Uso:
+    python benchmarks/bench_video.py [espectadores] [segundos]
+"""
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VIDEO_NAME = 'bench_video.mp4'
+VIDEO_SIZE = 64 * 1024 * 1024
+CHUNK = 1024 * 1024
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def viewer(base_url, stop, stats):
+    session = requests.Session()
+    rng = random.Random()
+    while not stop.is_set():
+        start = rng.randrange(0, VIDEO_SIZE - CHUNK)
+        t = time.perf_counter()
+        r = session.get(f"{base_url}/videos/{VIDEO_NAME}",
+                        headers={'Range': f'bytes={start}-{start + CHUNK - 1}'})
+        stats['video'].append(time.perf_counter() - t)
+        stats['bytes'] += len(r.content)
+
+
+def shopper(base_url, stop, stats):
+    session = requests.Session()
+    while not stop.is_set():
+        t = time.perf_counter()
+        session.get(f"{base_url}/health")
+        stats['health'].append(time.perf_counter() - t)
+        time.sleep(0.01)
+
+
+def main():
+    viewers = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    seconds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    video_path = os.path.join(ROOT, 'static', 'videos', VIDEO_NAME)
+    with open(video_path, 'wb') as f:
+        f.write(os.urandom(VIDEO_SIZE))
+
+    port = free_port()
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.gettempdir(), 'bench_video.db')}")
+    server = subprocess.Popen(
+        ['gunicorn', 'app:create_app()', '--bind', f'127.0.0.1:{port}',
+         '--workers', '2', '--threads', '4', '--worker-class', 'gthread'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+
+    try:
+        for _ in range(100):
+            try:
+                requests.get(f'{base_url}/health', timeout=1)
+                break
+            except requests.RequestException:
+                time.sleep(0.2)
+
+        stats = {'video': [], 'health': [], 'bytes': 0}
+        stop = threading.Event()
+        threads = [threading.Thread(target=viewer, args=(base_url, stop, stats)) for _ in range(viewers)]
+        threads.append(threading.Thread(target=shopper, args=(base_url, stop, stats)))
+        for t in threads:
+            t.start()
+        time.sleep(seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+
+        mb_s = stats['bytes'] / seconds / 1024 / 1024
+        print(f"\n🎬 {viewers} espectadores, {seconds}s, rangos de {CHUNK // 1024} KiB")
+        print(f"   video:  {len(stats['video'])} peticiones, {mb_s:.1f} MiB/s, "
+              f"p50 {percentile(stats['video'], 50) * 1000:.1f} ms, p95 {percentile(stats['video'], 95) * 1000:.1f} ms")
+        print(f"   /health: {len(stats['health'])} peticiones, "
+              f"p50 {statistics.median(stats['health']) * 1000:.1f} ms, p95 {percentile(stats['health'], 95) * 1000:.1f} ms, "
+              f"max {max(stats['health']) * 1000:.1f} ms")
+    finally:
+        server.terminate()
+        server.wait()
+        os.remove(video_path)
+
+
+if __name__ == '__main__':
+    main()
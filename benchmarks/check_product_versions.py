@@ -0,0 +1,180 @@
+"""Revisión del GET condicional de /product/<id> y de la versión de los productos.
+
+Comprueba que un If-None-Match con el ETag vigente responde 304 (sin cuerpo,
+con el mismo ETag y solo la consulta de versión), que cualquier otro ETag
+recibe la página completa, y que cada forma de modificar un producto sube
+`version`: edición por el ORM, la ruta de admin, UPDATE en bloque con
+bump_values() y la reserva/liberación de stock del checkout. Después de una
+edición el ETag viejo tiene que dejar de dar 304.
+Termina con código 1 si alguna comprobación falla (útil en CI).
+
+Uso:
+    python benchmarks/check_product_versions.py
+
+Usa DATABASE_URL si está definida; si no, una base SQLite temporal.
+"""
+import os
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DB_PATH = os.path.join(tempfile.gettempdir(), 'check_product_versions.db')
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{DB_PATH}')
+os.environ.setdefault('RESERVATION_SWEEP_SECONDS', '0')
+os.environ['SQL_LOG'] = 'off'
+
+if os.environ['DATABASE_URL'] == f'sqlite:///{DB_PATH}' and os.path.exists(DB_PATH):
+    os.remove(DB_PATH)
+
+from app import create_app, init_db  # noqa: E402
+from models import db, User, Product, Cart, CartItem  # noqa: E402
+from inventory import reserve_cart, release_reservations  # noqa: E402
+
+app = create_app()
+
+app.config['TESTING'] = True
+
+results = []
+
+
+def check(label, ok, detail=''):
+    results.append(ok)
+    print(f"   {'✅' if ok else '❌'} {label}{f'  ({detail})' if detail and not ok else ''}")
+
+
+def version(product_id):
+    with app.app_context():
+        return db.session.get(Product, product_id).version
+
+
+def queries(response):
+    match = re.search(r'desc="(\d+) queries"', response.headers.get('Server-Timing', ''))
+    return int(match.group(1)) if match else None
+
+
+def seed():
+    with app.app_context():
+        init_db()
+        admin = User(username='check_pv_admin', email='check_pv_admin@example.com', role='admin')
+        admin.set_password('check')
+        customer = User(username='check_pv_cliente', email='check_pv_cliente@example.com', role='customer')
+        customer.set_password('check')
+        product = Product(name='Labial versionado', description='revisión', price=199, category='labios', stock=10)
+        db.session.add_all([admin, customer, product])
+        db.session.commit()
+        return product.id, customer.id
+
+
+def check_conditional(product_id):
+    print("\n🏷️ GET condicional")
+    path = f'/product/{product_id}'
+    client = app.test_client()
+
+    first = client.get(path)
+    etag = first.headers.get('ETag')
+    check('200 con ETag, Last-Modified y Cache-Control: private, no-cache',
+          first.status_code == 200 and etag and first.headers.get('Last-Modified')
+          and first.headers.get('Cache-Control') == 'private, no-cache',
+          f"{first.status_code} {dict(first.headers)}")
+
+    cached = client.get(path, headers={'If-None-Match': etag})
+    check('If-None-Match con el ETag vigente -> 304', cached.status_code == 304, cached.status_code)
+    check('el 304 va sin cuerpo y con el mismo ETag',
+          cached.data == b'' and cached.headers.get('ETag') == etag, cached.headers.get('ETag'))
+    count = queries(cached)
+    check('el 304 solo hace la consulta de versión', count == 1, f'{count} consultas')
+
+    listed = client.get(path, headers={'If-None-Match': f'"otro", {etag}'})
+    check('ETag vigente dentro de una lista -> 304', listed.status_code == 304, listed.status_code)
+
+    other = client.get(path, headers={'If-None-Match': '"p0-v0-anon-x"'})
+    check('otro ETag -> 200 con la página', other.status_code == 200 and b'Labial versionado' in other.data,
+          other.status_code)
+
+    customer = app.test_client()
+    customer.post('/login', data={'username': 'check_pv_cliente', 'password': 'check'})
+    logged = customer.get(path, headers={'If-None-Match': etag})
+    check('el ETag de un anónimo no sirve con sesión iniciada (otra barra de navegación)',
+          logged.status_code == 200 and logged.headers.get('ETag') != etag, logged.status_code)
+
+    as_json = client.get(f'{path}?format=json')
+    json_etag = as_json.headers.get('ETag')
+    check('el JSON tiene su propio ETag', json_etag and json_etag != etag, json_etag)
+    check('If-None-Match con el ETag del JSON -> 304',
+          client.get(f'{path}?format=json', headers={'If-None-Match': json_etag}).status_code == 304)
+    return etag, json_etag
+
+
+def check_versions(product_id, customer_id, etag, json_etag):
+    print("\n🔢 Versión del producto")
+    path = f'/product/{product_id}'
+    client = app.test_client()
+
+    before = version(product_id)
+    with app.app_context():
+        db.session.get(Product, product_id).price = 189
+        db.session.commit()
+    check('edición por el ORM: versión +1', version(product_id) == before + 1, f'{before} -> {version(product_id)}')
+
+    stale = client.get(path, headers={'If-None-Match': etag})
+    check('tras la edición el ETag viejo -> 200 con ETag nuevo',
+          stale.status_code == 200 and stale.headers.get('ETag') != etag, stale.status_code)
+    check('tras la edición el ETag viejo del JSON -> 200',
+          client.get(f'{path}?format=json', headers={'If-None-Match': json_etag}).status_code == 200)
+    check('el JSON informa la versión nueva',
+          client.get(f'{path}?format=json').get_json().get('version') == version(product_id))
+
+    admin = app.test_client()
+    admin.post('/login', data={'username': 'check_pv_admin', 'password': 'check'})
+    etag = client.get(path).headers.get('ETag')
+    before = version(product_id)
+    admin.post(f'/admin/product/edit/{product_id}', data={
+        'name': 'Labial versionado v2', 'description': 'revisión', 'price': '209',
+        'category': 'labios', 'stock': '10'})
+    check('edición en el admin: versión +1', version(product_id) == before + 1, f'{before} -> {version(product_id)}')
+    edited = client.get(path, headers={'If-None-Match': etag})
+    check('tras editar en el admin la página muestra el cambio',
+          edited.status_code == 200 and b'Labial versionado v2' in edited.data, edited.status_code)
+    check('el ETag nuevo vuelve a dar 304',
+          client.get(path, headers={'If-None-Match': edited.headers.get('ETag')}).status_code == 304)
+
+    before = version(product_id)
+    with app.app_context():
+        db.session.execute(db.update(Product).where(Product.id == product_id)
+                           .values(stock=Product.stock + 1, **Product.bump_values()))
+        db.session.commit()
+    check('UPDATE en bloque con bump_values(): versión +1', version(product_id) == before + 1,
+          f'{before} -> {version(product_id)}')
+
+    with app.app_context():
+        cart = Cart(user_id=customer_id, is_active=True)
+        db.session.add(cart)
+        db.session.flush()
+        db.session.add(CartItem(cart_id=cart.id, product_id=product_id, quantity=2))
+        db.session.commit()
+        before = version(product_id)
+        reserved = reserve_cart(customer_id).ok
+        check('reservar stock en el checkout: versión +1', reserved and version(product_id) == before + 1,
+              f'{before} -> {version(product_id)}')
+        before = version(product_id)
+        release_reservations(user_id=customer_id)
+        db.session.commit()
+        check('liberar la reserva: versión +1', version(product_id) == before + 1,
+              f'{before} -> {version(product_id)}')
+
+
+def main():
+    product_id, customer_id = seed()
+    etag, json_etag = check_conditional(product_id)
+    check_versions(product_id, customer_id, etag, json_etag)
+    print()
+    if all(results):
+        print(f"   ✅ {len(results)} comprobaciones correctas")
+    else:
+        print(f"   ❌ {results.count(False)} de {len(results)} comprobaciones fallaron")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""Revisión de consultas SQL por ruta (modo prueba de query_stats.py).
+
+Carga datos de ejemplo (productos, videos, órdenes y ventas), recorre las
+páginas principales como cliente y como admin, y para cada una muestra el
+número de consultas, el tiempo en la base de datos (Server-Timing) y las
+sentencias repetidas. Corre con SQL_STRICT: una ruta que repite la misma
+sentencia más de SQL_REPEAT_LIMIT veces o supera su presupuesto falla y el
+script termina con código 1 (útil en CI).
+Además comprueba que /cart hace las mismas consultas con 1 línea que con N
+(load_cart trae carrito, líneas, productos y totales de una vez), y recorre
+cada orden del catálogo (catalog.SORTS y relevancia) página por página con
+?cursor=: al menos dos páginas, sin repetir ni saltar productos.
+
+Uso:
+    python benchmarks/check_queries.py [num_filas]
+
+Usa DATABASE_URL si está definida; si no, una base SQLite temporal.
+"""
+import os
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DB_PATH = os.path.join(tempfile.gettempdir(), 'check_queries.db')
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{DB_PATH}')
+os.environ.setdefault('RESERVATION_SWEEP_SECONDS', '0')
+os.environ['SQL_STRICT'] = '1'
+os.environ['SQL_LOG'] = 'off'
+
+if os.environ['DATABASE_URL'] == f'sqlite:///{DB_PATH}' and os.path.exists(DB_PATH):
+    os.remove(DB_PATH)
+
+from app import create_app, init_db  # noqa: E402
+from models import db, User, Product, Video, Cart, CartItem, Order, OrderItem, Venta  # noqa: E402
+from query_stats import QueryBudgetExceeded  # noqa: E402
+from rollups import backfill_rollups  # noqa: E402
+from catalog import CatalogFilters, SORTS, RELEVANCE  # noqa: E402
+
+app = create_app()
+
+app.config['TESTING'] = True
+
+CUSTOMER_PAGES = ['/', '/products', '/products?category=labios', '/search?q=labial', '/search?q=labial+rubi', '/search/suggest?q=lab', '/product/1',
+                  '/cart', '/checkout']
+ADMIN_PAGES = ['/admin', '/admin/products', '/admin/users', '/admin/videos', '/admin/ventas',
+               '/admin/product/edit/1', '/admin/user/edit/1', '/admin/video/edit/1']
+
+
+def seed(rows):
+    admin = User(username='check_admin', email='check_admin@example.com', role='master_admin')
+    admin.set_password('check')
+    customer = User(username='check_cliente', email='check_cliente@example.com', role='customer')
+    customer.set_password('check')
+    db.session.add_all([admin, customer])
+    db.session.execute(db.insert(Product), [{
+        'name': f'Labial {i}', 'description': 'revisión', 'price': 10 + i, 'category': 'labios',
+        'stock': 50, 'featured': i < 8
+    } for i in range(rows)])
+    db.session.execute(db.insert(Video), [{
+        'title': f'Video {i}', 'category': 'Tutorial', 'file_path': f'videos/check_{i}.mp4',
+        'is_featured': i == 0
+    } for i in range(rows)])
+    db.session.commit()
+
+    cart = Cart(user_id=customer.id, is_active=True)
+    db.session.add(cart)
+    db.session.flush()
+    db.session.execute(db.insert(CartItem), [{'cart_id': cart.id, 'product_id': pid, 'quantity': 1}
+                                             for pid in range(1, min(rows, 20) + 1)])
+    for n in range(rows):
+        order = Order(user_id=customer.id, total=10, status='paid', payment_id=f'CHECK-{n}')
+        db.session.add(order)
+        db.session.flush()
+        db.session.add(OrderItem(order_id=order.id, product_id=n % rows + 1, quantity=1, price=10))
+        db.session.add(Venta(producto_id=n % rows + 1, cantidad=1, usuario_id=customer.id))
+    db.session.commit()
+    backfill_rollups()
+
+
+def query_count(client, path):
+    timing = client.get(path).headers.get('Server-Timing', '')
+    match = re.search(r'desc="(\d+) queries"', timing)
+    return int(match.group(1)) if match else 0
+
+
+def check_cart_scaling(rows):
+    """Consultas de /cart con 1, la mitad y todas las líneas: tienen que ser iguales"""
+    with app.app_context():
+        user = User(username='check_carrito', email='check_carrito@example.com', role='customer')
+        user.set_password('check')
+        db.session.add(user)
+        db.session.flush()
+        cart = Cart(user_id=user.id, is_active=True)
+        db.session.add(cart)
+        db.session.commit()
+        cart_id = cart.id
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'check_carrito', 'password': 'check'})
+    client.get('/cart')  # la primera petición carga la identidad en su caché
+    counts = {}
+    lines = 0
+    for target in sorted({1, max(rows // 2, 1), rows}):
+        with app.app_context():
+            db.session.execute(db.insert(CartItem), [{'cart_id': cart_id, 'product_id': pid, 'quantity': 1}
+                                                     for pid in range(lines + 1, target + 1)])
+            db.session.commit()
+        lines = target
+        counts[lines] = query_count(client, '/cart')
+
+    same = len(set(counts.values())) == 1
+    detail = ', '.join(f'{n} líneas: {q}' for n, q in counts.items())
+    print(f"\n   {'✅' if same else '❌'} /cart no depende del número de líneas ({detail})")
+    return 0 if same else 1
+
+
+def check_catalog_sorts(rows):
+    """Cada orden del catálogo recorrido con cursores tiene que dar lo mismo que sin paginar"""
+    with app.app_context():
+        # Empates y NULL en las claves de orden: destacados sin valor, vendidos repetidos
+        db.session.execute(db.update(Product).where(Product.id.in_([2, 3])).values(featured=None))
+        db.session.execute(db.update(Product).where(Product.id % 3 == 0).values(sold_count=5))
+        db.session.commit()
+
+    page_size = max(rows // 4, 1)
+    client = app.test_client()
+    failures = 0
+    print()
+    for sort, q in [(sort, '') for sort in SORTS] + [(RELEVANCE, 'labial')]:
+        args = {'sort': sort, 'q': q}
+        with app.app_context():
+            filters = CatalogFilters(args)
+            expected = [p.id for p in filters.query().order_by(
+                *[expr.desc() if descending else expr.asc() for expr, descending in filters.sort_keys()])]
+
+        walked, pages, cursor, error = [], 0, None, None
+        while True:
+            query = {**args, 'format': 'json', 'limit': page_size, **({'cursor': cursor} if cursor else {})}
+            response = client.get('/products', query_string=query)
+            if response.status_code != 200:
+                error = f'página {pages + 1}: {response.status_code} {response.get_data(as_text=True)[:80]}'
+                break
+            data = response.get_json()
+            walked += [p['id'] for p in data['products']]
+            pages += 1
+            cursor = data['next_cursor']
+            if not cursor or pages > len(expected):
+                break
+
+        ok = error is None and pages >= 2 and walked == expected
+        failures += not ok
+        detail = error or (f'{pages} páginas, {len(walked)} productos' if ok
+                           else f'{pages} páginas, {len(walked)} de {len(expected)} productos o en otro orden')
+        print(f"   {'✅' if ok else '❌'} orden {sort:<14} {detail}")
+    return failures
+
+
+def crawl(client, pages):
+    failures = 0
+    for path in pages:
+        try:
+            response = client.get(path)
+        except QueryBudgetExceeded as e:
+            print(f"   ❌ {path:<32} {e}")
+            failures += 1
+            continue
+        timing = response.headers.get('Server-Timing', '')
+        match = re.search(r'dur=([\d.]+);desc="(\d+) queries"', timing)
+        queries, db_ms = (int(match.group(2)), float(match.group(1))) if match else (0, 0.0)
+        print(f"   ✅ {path:<32} {response.status_code}  {queries:3d} consultas  {db_ms:7.1f} ms")
+    return failures
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+
+    with app.app_context():
+        init_db()
+        seed(rows)
+
+    limit = app.config['SQL_REPEAT_LIMIT']
+    print(f"\n🧮 Consultas por ruta ({rows} filas por tabla, límite de repetición {limit})")
+    failures = 0
+    for username, pages in (('check_cliente', CUSTOMER_PAGES), ('check_admin', ADMIN_PAGES)):
+        client = app.test_client()
+        client.post('/login', data={'username': username, 'password': 'check'})
+        print(f"\n   {username}")
+        failures += crawl(client, pages)
+    failures += check_cart_scaling(rows)
+    failures += check_catalog_sorts(rows)
+
+    print("\n   ✅ Ninguna ruta repite consultas ni supera su presupuesto" if not failures
+          else f"\n   ❌ {failures} rutas marcadas")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""Servidor PayPal de mentira para probar latencia y fallos sin conexión.
+
+Implementa lo que usa paypal_client.py:
+    POST /v1/oauth2/token
+    POST /v2/checkout/orders
+    POST /v2/checkout/orders/<id>/capture
+
+Uso:
+    python benchmarks/paypal_stub.py [--port 8099] [--latency 0.2] [--fail-rate 0.1]
+                                     [--hang-rate 0.0] [--token-ttl 32400]
+
+Luego arrancar la app con PAYPAL_BASE_URL=http://127.0.0.1:8099 y cualquier
+PAYPAL_CLIENT_ID/PAYPAL_CLIENT_SECRET. GET /stats devuelve los contadores.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CAPTURE_PATH = re.compile(r'^/v2/checkout/orders/([^/]+)/capture$')
+
+
+class StubState:
+    def __init__(self, latency=0.0, fail_rate=0.0, hang_rate=0.0, token_ttl=32400):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.hang_rate = hang_rate
+        self.token_ttl = token_ttl
+        self.lock = threading.Lock()
+        self.tokens = set()
+        self.orders = {}
+        # PayPal-Request-Id -> respuesta: reintentos idempotentes
+        self.responses = {}
+        self.counters = {'token': 0, 'create': 0, 'capture': 0, 'failures': 0, 'hangs': 0,
+                         'replays': 0, 'connections': 0}
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Cabeceras y cuerpo van en escrituras separadas: sin esto, Nagle + ACK
+        # retrasado agregan ~40 ms a cada respuesta en conexiones keep-alive
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            with state.lock:
+                state.counters['connections'] += 1
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _simulate_network(self):
+            """Latencia fija + fallos 503 o cuelgues aleatorios. True si ya respondió."""
+            time.sleep(state.latency)
+            roll = random.random()
+            if roll < state.hang_rate:
+                with state.lock:
+                    state.counters['hangs'] += 1
+                time.sleep(60)
+                return True
+            if roll < state.hang_rate + state.fail_rate:
+                with state.lock:
+                    state.counters['failures'] += 1
+                self._send(503, {'name': 'SERVICE_UNAVAILABLE'})
+                return True
+            return False
+
+        def _authorized(self):
+            token = self.headers.get('Authorization', '').removeprefix('Bearer ')
+            with state.lock:
+                return token in state.tokens
+
+        def do_GET(self):
+            if self.path == '/stats':
+                with state.lock:
+                    return self._send(200, dict(state.counters))
+            self._send(404, {'name': 'NOT_FOUND'})
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            if self._simulate_network():
+                return
+
+            if self.path == '/v1/oauth2/token':
+                if not self.headers.get('Authorization', '').startswith('Basic '):
+                    return self._send(401, {'error': 'invalid_client'})
+                token = uuid.uuid4().hex
+                with state.lock:
+                    state.tokens.add(token)
+                    state.counters['token'] += 1
+                return self._send(200, {'access_token': token, 'token_type': 'Bearer',
+                                        'expires_in': state.token_ttl})
+
+            if not self._authorized():
+                return self._send(401, {'name': 'AUTHENTICATION_FAILURE'})
+
+            request_id = self.headers.get('PayPal-Request-Id')
+            with state.lock:
+                if request_id and request_id in state.responses:
+                    state.counters['replays'] += 1
+                    return self._send(*state.responses[request_id])
+
+            if self.path == '/v2/checkout/orders':
+                body = json.loads(raw or b'{}')
+                order_id = uuid.uuid4().hex[:17].upper()
+                response = (201, {'id': order_id, 'status': 'CREATED'})
+                with state.lock:
+                    state.orders[order_id] = body
+                    state.counters['create'] += 1
+            elif CAPTURE_PATH.match(self.path):
+                order_id = CAPTURE_PATH.match(self.path).group(1)
+                with state.lock:
+                    order = state.orders.get(order_id)
+                    state.counters['capture'] += 1
+                # Como PayPal: el monto cobrado viene en purchase_units[].payments.captures[]
+                units = [{'payments': {'captures': [{'id': uuid.uuid4().hex[:17].upper(), 'status': 'COMPLETED',
+                                                     'amount': unit.get('amount')}]}}
+                         for unit in (order or {}).get('purchase_units', [])]
+                response = ((201, {'id': order_id, 'status': 'COMPLETED', 'purchase_units': units})
+                            if order is not None else (404, {'name': 'RESOURCE_NOT_FOUND'}))
+            else:
+                response = (404, {'name': 'NOT_FOUND'})
+
+            if request_id:
+                with state.lock:
+                    state.responses[request_id] = response
+            self._send(*response)
+
+    return Handler
+
+
+def serve(port=0, **options):
+    """Arranca el stub en un hilo; devuelve (server, state). server.server_port tiene el puerto."""
+    state = StubState(**options)
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency', type=float, default=0.0, help='segundos por petición')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='fracción de respuestas 503')
+    parser.add_argument('--hang-rate', type=float, default=0.0, help='fracción de peticiones que nunca responden')
+    parser.add_argument('--token-ttl', type=int, default=32400, help='expires_in del token')
+    args = parser.parse_args()
+
+    server, _ = serve(args.port, latency=args.latency, fail_rate=args.fail_rate,
+                      hang_rate=args.hang_rate, token_ttl=args.token_ttl)
+    print(f"💳 Stub de PayPal en http://127.0.0.1:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import os
+import threading
+import time
+
+# 🧠 CACHÉ DE FRAGMENTOS HTML (por proceso)
+# Las secciones de la página principal solo cambian cuando un admin edita
+# productos o videos: esas rutas invalidan su sección y el TTL cubre a los
+# demás workers de gunicorn, que tienen su propia copia.
+
+HOME_CACHE_TTL = int(os.environ.get('HOME_CACHE_TTL', 300))
+
+
+class FragmentCache:
+    def __init__(self, default_ttl=HOME_CACHE_TTL, max_entries=None):
+        self.default_ttl = default_ttl
+        # Con claves abiertas (p. ej. una por búsqueda) se descarta la que vence primero
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_or_render(self, key, render, ttl=None):
+        """Devuelve el fragmento cacheado o lo genera con render() si no existe o expiró"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = render()
+        expires_at = now + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            if self.max_entries and key not in self._entries and len(self._entries) >= self.max_entries:
+                oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                del self._entries[oldest]
+            self._entries[key] = (expires_at, value)
+        return value
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 3) if total else 0.0,
+                'invalidations': self.invalidations,
+                'ttl_seconds': self.default_ttl
+            }
+
+
+home_cache = FragmentCache()
+
+# Conteos de facetas del catálogo por búsqueda (ver catalog.py): el stock cambia
+# con cada compra, así que el TTL es corto
+CATALOG_CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL', 60))
+catalog_cache = FragmentCache(CATALOG_CACHE_TTL, max_entries=256)
+
+HOME_PRODUCT_SECTIONS = ('home:featured_products',)
+HOME_VIDEO_SECTIONS = ('home:featured_video', 'home:other_videos')
+
+
+def invalidate_home_products():
+    home_cache.invalidate(*HOME_PRODUCT_SECTIONS)
+    catalog_cache.clear()
+
+
+def invalidate_home_videos():
+    home_cache.invalidate(*HOME_VIDEO_SECTIONS)
@@ -0,0 +1,210 @@
+from datetime import datetime
+
+from models import db, Cart, CartItem, Product
+from rollups import dialect_insert
+
+# 🛒 CARGA DEL CARRITO EN UNA SOLA CONSULTA
+# Carrito + líneas + productos + subtotal/IVA/envío en un único SELECT,
+# en lugar de recorrer cart.items y item.product de forma perezosa (N+1).
+
+TAX_RATE = 0.16
+SHIPPING_FLAT = 5.00
+MAX_BATCH_OPERATIONS = 100
+
+
+class CartSummary:
+    def __init__(self, cart=None, items=None, subtotal=0, tax=0, shipping=0, total=0):
+        self.cart = cart
+        self.items = items or []
+        self.subtotal = subtotal
+        self.tax = tax
+        self.shipping = shipping
+        self.total = total
+
+    @property
+    def is_empty(self):
+        return not self.items
+
+    @property
+    def item_count(self):
+        return len(self.items)
+
+
+def active_cart_id_subquery(user_id):
+    """id del carrito activo del usuario como subconsulta escalar"""
+    return (db.select(Cart.id)
+            .where(Cart.user_id == user_id, Cart.is_active == True)
+            .order_by(Cart.id)
+            .limit(1)
+            .scalar_subquery())
+
+
+def load_cart(user_id):
+    """Carrito activo del usuario con sus líneas y totales, en una sola consulta"""
+    line_total = Product.price * CartItem.quantity
+    subtotal = db.func.coalesce(db.func.sum(line_total).over(), 0)
+
+    rows = (db.session.query(
+                Cart,
+                CartItem,
+                Product,
+                line_total.label('line_total'),
+                subtotal.label('subtotal'),
+                (subtotal * TAX_RATE).label('tax'),
+                db.case((subtotal > 0, SHIPPING_FLAT), else_=0).label('shipping'))
+            .outerjoin(CartItem, CartItem.cart_id == Cart.id)
+            .outerjoin(Product, Product.id == CartItem.product_id)
+            .filter(Cart.id == active_cart_id_subquery(user_id))
+            .order_by(CartItem.id)
+            .all())
+
+    if not rows:
+        return CartSummary()
+
+    first = rows[0]
+    items = [{
+        'product': row.Product,
+        'quantity': row.CartItem.quantity,
+        'total': row.line_total
+    } for row in rows if row.CartItem is not None]
+
+    return CartSummary(
+        cart=first.Cart,
+        items=items,
+        subtotal=first.subtotal,
+        tax=first.tax,
+        shipping=first.shipping,
+        total=first.subtotal + first.tax + first.shipping
+    )
+
+
+def order_total(subtotal):
+    """Total a cobrar con IVA y envío, con las mismas reglas que load_cart"""
+    return subtotal + subtotal * TAX_RATE + (SHIPPING_FLAT if subtotal > 0 else 0)
+
+
+def get_active_cart_id(user_id):
+    """id del carrito activo del usuario, creándolo si no existe, en un solo INSERT ... ON CONFLICT.
+
+    El índice único parcial uq_cart_active_user evita dos carritos activos
+    aunque dos peticiones lleguen a la vez.
+    """
+    stmt = dialect_insert(Cart).values(user_id=user_id, is_active=True, created_at=datetime.utcnow())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id'],
+        index_where=db.text('is_active'),
+        # Actualización vacía: solo para que RETURNING devuelva el carrito existente
+        set_={'user_id': stmt.excluded.user_id}
+    ).returning(Cart.id)
+    return db.session.execute(stmt).scalar_one()
+
+
+def add_cart_item(user_id, product_id, quantity, replace=False, cart_id=None):
+    """Agrega `quantity` unidades al carrito activo (o las suma a la línea existente).
+
+    INSERT ... SELECT desde products + ON CONFLICT (cart_id, product_id): si el
+    producto no existe no se inserta nada. Con replace=True la línea queda con
+    `quantity` exacta. Devuelve la cantidad resultante o None si el producto
+    no existe. No hace commit.
+    """
+    cart_id = cart_id or get_active_cart_id(user_id)
+    source = (db.select(db.literal(cart_id, db.Integer),
+                        Product.id,
+                        db.literal(quantity, db.Integer),
+                        db.literal(datetime.utcnow(), db.DateTime))
+              .where(Product.id == product_id))
+    stmt = dialect_insert(CartItem).from_select(['cart_id', 'product_id', 'quantity', 'added_at'], source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['cart_id', 'product_id'],
+        set_={'quantity': stmt.excluded.quantity if replace else CartItem.quantity + stmt.excluded.quantity}
+    ).returning(CartItem.quantity)
+    return db.session.execute(stmt).scalar()
+
+
+def remove_cart_item(user_id, product_id):
+    """Elimina una línea del carrito activo con un solo DELETE. Devuelve las filas borradas."""
+    return (CartItem.query
+            .filter(CartItem.cart_id == active_cart_id_subquery(user_id),
+                    CartItem.product_id == product_id)
+            .delete(synchronize_session=False))
+
+
+class CartOperationError(ValueError):
+    pass
+
+
+def _coalesce_operations(operations):
+    """Reduce la lista de operaciones a una acción final por producto.
+
+    Devuelve {product_id: (acción, cantidad)} con acción en 'add', 'set',
+    'put' (insertar o fijar la cantidad) o 'remove'.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise CartOperationError('Se esperaba una lista de operaciones')
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise CartOperationError(f'Máximo {MAX_BATCH_OPERATIONS} operaciones por petición')
+
+    final = {}
+    for operation in operations:
+        try:
+            action = operation['op']
+            product_id = int(operation['product_id'])
+            quantity = int(operation.get('quantity', 1))
+        except (KeyError, TypeError, ValueError):
+            raise CartOperationError(f'Operación inválida: {operation}')
+
+        previous = final.get(product_id)
+        if action == 'remove' or (action == 'set' and quantity <= 0):
+            final[product_id] = ('remove', 0)
+        elif action == 'set':
+            # Fijar después de eliminar o de agregar en el mismo lote puede tener que
+            # insertar la línea: se escribe con la cantidad exacta ('put')
+            final[product_id] = ('put', quantity) if previous and previous[0] != 'set' else ('set', quantity)
+        elif action == 'add':
+            if quantity <= 0:
+                raise CartOperationError(f'Cantidad inválida: {operation}')
+            if previous is None:
+                final[product_id] = ('add', quantity)
+            elif previous[0] == 'remove':
+                final[product_id] = ('put', quantity)
+            elif previous[0] == 'add':
+                final[product_id] = ('add', previous[1] + quantity)
+            else:
+                # Después de un set/put la cantidad final es conocida: insertar o fijar la suma
+                final[product_id] = ('put', previous[1] + quantity)
+        else:
+            raise CartOperationError(f'Operación desconocida: {action}')
+    return final
+
+
+def apply_cart_operations(user_id, operations):
+    """Aplica un lote de operaciones add/set/remove al carrito activo. No hace commit.
+
+    Las cantidades fijadas van en un solo UPDATE ... CASE y las eliminaciones
+    en un solo DELETE; solo las altas necesitan un upsert por producto.
+    Devuelve la lista de product_id que no existen (altas ignoradas).
+    """
+    final = _coalesce_operations(operations)
+    cart_id = active_cart_id_subquery(user_id)
+
+    to_set = {pid: qty for pid, (action, qty) in final.items() if action == 'set'}
+    if to_set:
+        (CartItem.query
+         .filter(CartItem.cart_id == cart_id, CartItem.product_id.in_(to_set))
+         .update({CartItem.quantity: db.case(to_set, value=CartItem.product_id)},
+                 synchronize_session=False))
+
+    to_remove = [pid for pid, (action, _) in final.items() if action == 'remove']
+    if to_remove:
+        (CartItem.query
+         .filter(CartItem.cart_id == cart_id, CartItem.product_id.in_(to_remove))
+         .delete(synchronize_session=False))
+
+    missing = []
+    to_add = [(pid, action, qty) for pid, (action, qty) in final.items() if action in ('add', 'put')]
+    if to_add:
+        active_id = get_active_cart_id(user_id)
+        for product_id, action, quantity in to_add:
+            if add_cart_item(user_id, product_id, quantity, replace=action == 'put', cart_id=active_id) is None:
+                missing.append(product_id)
+    return missing
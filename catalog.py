@@ -0,0 +1,125 @@
+from models import db, Product, featured_rank
+from cache import catalog_cache
+from search import search_products, search_sort_keys
+
+# 🗂️ CATÁLOGO CON FACETAS
+# Filtros: categoría, rango de precio, solo con stock y búsqueda de texto;
+# orden por destacados, novedades, precio o más vendidos, cada uno con su
+# índice compuesto (ver Product.__table_args__ y featured_rank) para paginar por cursor.
+# Los conteos de las facetas salen de un "cubo" (categoría, rango, con stock)
+# -> cantidad: una sola consulta agrupada por búsqueda, cacheada; cualquier
+# combinación de filtros se resuelve sumando filas del cubo en Python.
+
+# (clave, etiqueta, desde, hasta) en pesos; el último no tiene tope
+PRICE_RANGES = [
+    ('0-100', 'Menos de $100', 0, 100),
+    ('100-250', '$100 a $250', 100, 250),
+    ('250-500', '$250 a $500', 250, 500),
+    ('500+', '$500 o más', 500, None),
+]
+PRICE_RANGE_KEYS = {key for key, _, _, _ in PRICE_RANGES}
+
+SORTS = {
+    'featured': ('Destacados', [(featured_rank, True), (Product.id, True)]),
+    'newest': ('Más nuevos', [(Product.id, True)]),
+    'best_selling': ('Más vendidos', [(Product.sold_count, True), (Product.id, True)]),
+    'price_asc': ('Precio: menor a mayor', [(Product.price, False), (Product.id, False)]),
+    'price_desc': ('Precio: mayor a menor', [(Product.price, True), (Product.id, True)]),
+}
+RELEVANCE = 'relevance'
+
+
+class CatalogFilters:
+    """Filtros y orden pedidos en la URL (?q=&category=&price=&in_stock=1&sort=)"""
+
+    def __init__(self, args):
+        self.q = (args.get('q') or '').strip()
+        self.category = (args.get('category') or '').strip()
+        self.price = args.get('price') if args.get('price') in PRICE_RANGE_KEYS else ''
+        self.in_stock = args.get('in_stock') in ('1', 'true', 'on')
+        sort = args.get('sort')
+        if sort in SORTS or (sort == RELEVANCE and self.q):
+            self.sort = sort
+        else:
+            self.sort = RELEVANCE if self.q else 'featured'
+
+    def query(self):
+        query = search_products(self.q) if self.q else Product.query
+        if self.category:
+            query = query.filter(Product.category == self.category)
+        if self.price:
+            _, _, low, high = next(r for r in PRICE_RANGES if r[0] == self.price)
+            query = query.filter(Product.price >= low)
+            if high is not None:
+                query = query.filter(Product.price < high)
+        if self.in_stock:
+            query = query.filter(Product.stock > 0)
+        return query
+
+    def sort_keys(self):
+        if self.sort == RELEVANCE:
+            return search_sort_keys()
+        return SORTS[self.sort][1]
+
+    def sort_options(self):
+        options = [(RELEVANCE, 'Relevancia')] if self.q else []
+        return options + [(key, label) for key, (label, _) in SORTS.items()]
+
+    def url_args(self, **changes):
+        """Argumentos para url_for con los filtros actuales (sin cursor) y los cambios pedidos"""
+        args = {'q': self.q, 'category': self.category, 'price': self.price,
+                'in_stock': '1' if self.in_stock else '', 'sort': self.sort}
+        args.update(changes)
+        return {key: value for key, value in args.items() if value}
+
+
+def _price_bucket():
+    # Límites como literales: PostgreSQL exige que la expresión del SELECT y la del
+    # GROUP BY sean idénticas, y con parámetros cada una tendría los suyos
+    return db.case(*[(Product.price < db.literal_column(str(high)), db.literal_column(f"'{key}'"))
+                     for key, _, _, high in PRICE_RANGES if high is not None],
+                   else_=db.literal_column(f"'{PRICE_RANGES[-1][0]}'"))
+
+
+def facet_cube(q=''):
+    """[(categoría, rango de precio, con stock, cantidad)] de los productos que coinciden con `q`"""
+    def compute():
+        query = search_products(q) if q else Product.query
+        bucket = _price_bucket()
+        in_stock = db.func.coalesce(Product.stock, db.literal_column('0')) > db.literal_column('0')
+        rows = (query.order_by(None)
+                .with_entities(Product.category, bucket, in_stock, db.func.count())
+                .group_by(Product.category, bucket, in_stock)
+                .all())
+        return [(category, bucket, bool(stock), count) for category, bucket, stock, count in rows]
+
+    return catalog_cache.get_or_render(f'cube:{q.lower()}', compute)
+
+
+class Facets:
+    def __init__(self, cube, filters):
+        self._cube = cube
+        self._filters = filters
+        # Cada faceta cuenta con los demás filtros aplicados y el suyo reemplazado
+        self.categories = [(category, self._count(category=category))
+                           for category in sorted({row[0] for row in cube})]
+        self.prices = [(key, label, self._count(price=key)) for key, label, _, _ in PRICE_RANGES]
+        self.in_stock = self._count(in_stock=True)
+        self.total = self._count()
+
+    def _count(self, **override):
+        wanted = {'category': self._filters.category, 'price': self._filters.price,
+                  'in_stock': self._filters.in_stock, **override}
+        return sum(n for category, bucket, in_stock, n in self._cube
+                   if (not wanted['category'] or category == wanted['category'])
+                   and (not wanted['price'] or bucket == wanted['price'])
+                   and (in_stock or not wanted['in_stock']))
+
+
+def catalog_facets(filters):
+    return Facets(facet_cube(filters.q), filters)
+
+
+def catalog_categories():
+    """Categorías con productos, para el menú (comparte el cubo cacheado del catálogo)"""
+    return sorted({category for category, _, _, _ in facet_cube()})
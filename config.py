@@ -1,5 +1,10 @@
 import os
 
+from dotenv import load_dotenv
+
+# Variables de .env (sin pisar las del sistema) antes de leer DATABASE_URL
+load_dotenv()
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'clave-temporal-makeup-ecommerce'
     
@@ -19,6 +24,66 @@ class Config:
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Pool por proceso (cada worker de gunicorn tiene el suyo): pre_ping descarta
+    # conexiones que el proxy de Railway cerró y recycle las renueva antes de que pase
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+    }
+    if not SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        SQLALCHEMY_ENGINE_OPTIONS.update(
+            pool_size=int(os.environ.get('DB_POOL_SIZE', 5)),
+            max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 5)),
+            pool_timeout=int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        )
+    
+    # Réplicas de lectura para el catálogo, separadas por comas (ver db_routing.py)
+    SQLALCHEMY_BINDS = {
+        f'replica_{n}': url.strip().replace('postgres://', 'postgresql://', 1)
+        for n, url in enumerate(os.environ.get('DATABASE_REPLICA_URLS', '').split(','))
+        if url.strip()
+    }
+    
     PAYPAL_MODE = os.environ.get('PAYPAL_MODE', 'sandbox')
     PAYPAL_CLIENT_ID = os.environ.get('PAYPAL_CLIENT_ID', '')
-    PAYPAL_CLIENT_SECRET = os.environ.get('PAYPAL_CLIENT_SECRET', '')
\ No newline at end of file
+    PAYPAL_CLIENT_SECRET = os.environ.get('PAYPAL_CLIENT_SECRET', '')
+    PAYPAL_BASE_URL = os.environ.get('PAYPAL_BASE_URL', '')  # vacío = según PAYPAL_MODE
+    # Peor caso por llamada: (conexión + lectura) × (reintentos + 1) + backoff,
+    # tiene que caber en PAYPAL_DEADLINE (por defecto WORKER_TIMEOUT - 5)
+    PAYPAL_CONNECT_TIMEOUT = float(os.environ.get('PAYPAL_CONNECT_TIMEOUT', 3.05))
+    PAYPAL_READ_TIMEOUT = float(os.environ.get('PAYPAL_READ_TIMEOUT', 7))
+    PAYPAL_RETRIES = int(os.environ.get('PAYPAL_RETRIES', 1))
+    PAYPAL_BACKOFF = float(os.environ.get('PAYPAL_BACKOFF', 0.3))
+    PAYPAL_POOL_SIZE = int(os.environ.get('PAYPAL_POOL_SIZE', 8))
+    PAYPAL_DEADLINE = float(os.environ.get('PAYPAL_DEADLINE', 0))
+    # El mismo valor que `timeout` en gunicorn.conf.py
+    WORKER_TIMEOUT = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+    
+    UPLOAD_FOLDER = 'static/uploads'
+    VIDEO_UPLOAD_FOLDER = 'static/videos'
+    MAX_CONTENT_LENGTH = 100 * 1024 * 1024
+    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+    ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'mov', 'avi', 'wmv', 'webm', 'mkv'}
+    VIDEO_MIME_TYPES = {
+        'mp4': 'video/mp4',
+        'mov': 'video/quicktime',
+        'avi': 'video/x-msvideo',
+        'wmv': 'video/x-ms-wmv',
+        'webm': 'video/webm',
+        'mkv': 'video/x-matroska'
+    }
+    # Cómo se entregan los videos: 'direct' (sendfile desde gunicorn),
+    # 'x-accel' (nginx: X-Accel-Redirect) o 'x-sendfile' (Apache/lighttpd)
+    VIDEO_SENDFILE_MODE = os.environ.get('VIDEO_SENDFILE_MODE', 'direct')
+    VIDEO_ACCEL_PREFIX = os.environ.get('VIDEO_ACCEL_PREFIX', '/protected-videos/')
+    USE_X_SENDFILE = VIDEO_SENDFILE_MODE == 'x-sendfile'
+    VIDEO_MAX_AGE = 86400
+    # Subidas por partes: el tamaño total ya no depende de MAX_CONTENT_LENGTH (que limita cada petición)
+    MAX_VIDEO_SIZE = int(os.environ.get('MAX_VIDEO_UPLOAD_MB', 500)) * 1024 * 1024
+    VIDEO_CHUNK_SIZE = 5 * 1024 * 1024
+    
+    # Consultas SQL por petición (ver query_stats.py)
+    SQL_QUERY_BUDGET = int(os.environ.get('SQL_QUERY_BUDGET', 0))  # 0 = sin límite general
+    SQL_REPEAT_LIMIT = int(os.environ.get('SQL_REPEAT_LIMIT', 5))
+    SQL_LOG = os.environ.get('SQL_LOG', 'flagged')  # all | flagged | off
+    SQL_STRICT = os.environ.get('SQL_STRICT', '').lower() in ('1', 'true', 'yes')
@@ -0,0 +1,135 @@
+import itertools
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_app_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql import Select
+
+# 🔀 RÉPLICAS DE LECTURA
+# Las rutas del catálogo (@replica_read) leen de una réplica elegida por
+# turnos; todo lo demás (carrito, checkout, admin, escrituras, SELECT ...
+# FOR UPDATE, flush) va al primario. La réplica se elige y se conecta al
+# empezar la petición: si no responde queda fuera DB_REPLICA_RETRY_SECONDS
+# y se prueba la siguiente, o el primario si no queda ninguna.
+# Lee-lo-que-escribiste: después de un POST la sesión del usuario lee del
+# primario durante DB_REPLICA_STICKY_SECONDS (la réplica puede ir atrasada).
+
+REPLICA_BIND_PREFIX = 'replica_'
+RETRY_SECONDS = int(os.environ.get('DB_REPLICA_RETRY_SECONDS', 30))
+STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5))
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+class RoutingSession(Session):
+    """Sesión que manda las lecturas a la réplica elegida para la petición"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context():
+            replica = g.get('db_replica')
+            if replica is not None and isinstance(clause, Select) and clause._for_update_arg is None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+        self._down_until = {}
+        self.routed = {}
+        self.failures = {}
+        self.fallbacks = 0
+
+    def bind_keys(self, db):
+        return sorted(key for key in db.engines if key and key.startswith(REPLICA_BIND_PREFIX))
+
+    def candidates(self, db):
+        """Réplicas disponibles, empezando por la que toca en el turno"""
+        keys = self.bind_keys(db)
+        if not keys:
+            return []
+        start = next(self._turn) % len(keys)
+        now = time.monotonic()
+        with self._lock:
+            return [key for key in keys[start:] + keys[:start] if self._down_until.get(key, 0) <= now]
+
+    def mark_down(self, key):
+        with self._lock:
+            self._down_until[key] = time.monotonic() + RETRY_SECONDS
+            self.failures[key] = self.failures.get(key, 0) + 1
+
+    def use_replica(self, db):
+        """Conecta la sesión a una réplica sana y la deja como destino de las lecturas"""
+        for key in self.candidates(db):
+            engine = db.engines[key]
+            try:
+                # Con pool_pre_ping el checkout ya verifica que la conexión responde
+                db.session.connection(bind_arguments={'bind': engine})
+            except OperationalError as e:
+                db.session.rollback()
+                self.mark_down(key)
+                print(f"⚠️ Réplica {key} fuera de servicio por {RETRY_SECONDS}s: {e.orig}")
+                continue
+            g.db_replica = engine
+            with self._lock:
+                self.routed[key] = self.routed.get(key, 0) + 1
+            return key
+        if self.bind_keys(db):
+            with self._lock:
+                self.fallbacks += 1
+        return None
+
+    def stats(self, db):
+        now = time.monotonic()
+        pools = {}
+        for key, engine in db.engines.items():
+            name = key or 'primary'
+            pool = engine.pool
+            info = {'url': engine.url.render_as_string(hide_password=True), 'status': pool.status()}
+            if hasattr(pool, 'checkedout'):
+                info.update(size=pool.size(), checked_in=pool.checkedin(),
+                            checked_out=pool.checkedout(), overflow=pool.overflow())
+            if key in self.bind_keys(db):
+                with self._lock:
+                    info.update(routed=self.routed.get(key, 0), failures=self.failures.get(key, 0),
+                                healthy=self._down_until.get(key, 0) <= now)
+            pools[name] = info
+        return {'binds': pools, 'fallbacks_to_primary': self.fallbacks}
+
+
+router = ReplicaRouter()
+
+
+def wants_primary():
+    """Ventana de lee-lo-que-escribiste después de un POST del mismo usuario"""
+    return session.get('db_primary_until', 0) > time.time()
+
+
+def replica_read(f):
+    """La vista solo lee: sus SELECT van a una réplica (si hay y no hay escrituras recientes)"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not wants_primary():
+            router.use_replica(current_app.extensions['sqlalchemy'])
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def _stick_to_primary(response):
+    if STICKY_SECONDS and request.method in WRITE_METHODS and response.status_code < 400:
+        session['db_primary_until'] = time.time() + STICKY_SECONDS
+    return response
+
+
+def _forget_replica(exc=None):
+    g.pop('db_replica', None)
+
+
+def init_db_routing(app):
+    if any(key.startswith(REPLICA_BIND_PREFIX) for key in app.config.get('SQLALCHEMY_BINDS') or {}):
+        app.after_request(_stick_to_primary)
+    app.teardown_appcontext(_forget_replica)
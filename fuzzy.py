@@ -0,0 +1,140 @@
+import os
+from collections import Counter
+
+from models import db, Product
+from search import search_terms, dialect_name
+
+# 🔤 BÚSQUEDA TOLERANTE A ERRORES DE TIPEO
+# "rubr", "labial mate rubi" o "delinador" no coinciden con el índice de texto
+# completo; aquí se comparan por trigramas de palabras (como pg_trgm):
+# similitud = trigramas en común / trigramas de ambas palabras.
+# Cada palabra de la búsqueda tiene que parecerse a alguna palabra del nombre
+# (al menos SEARCH_FUZZY_THRESHOLD) y el producto se ordena por el promedio.
+# PostgreSQL: strict_word_similarity() con índice GIN de trigramas sobre el
+# nombre sin acentos (ver PG_SEARCH_DDL). SQLite y demás: índice invertido de
+# trigramas en memoria, mantenido junto al de sugerencias (suggest.py).
+
+FUZZY_THRESHOLD = float(os.environ.get('SEARCH_FUZZY_THRESHOLD', 0.3))
+FUZZY_LIMIT = int(os.environ.get('SEARCH_FUZZY_LIMIT', 24))
+
+
+def trigrams(word):
+    """Trigramas de una palabra con el mismo relleno que pg_trgm: 'rojo' -> '  r', ' ro', ..., 'jo '"""
+    padded = f'  {word} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class TrigramIndex:
+    """Palabra -> productos que la tienen en el nombre, y trigrama -> palabras"""
+
+    def __init__(self):
+        self._words = {}         # palabra -> {id}
+        self._postings = {}      # trigrama -> {palabra}
+        self._trigrams = {}      # palabra -> trigramas
+
+    def __len__(self):
+        return len(self._words)
+
+    def add(self, product_id, words):
+        """`words`: palabras normalizadas del nombre (search_terms)"""
+        for word in set(words):
+            products = self._words.get(word)
+            if products is None:
+                products = self._words[word] = set()
+                # Los números (tallas, códigos) solo se buscan tal cual
+                if not word.isdigit():
+                    grams = self._trigrams[word] = trigrams(word)
+                    for gram in grams:
+                        self._postings.setdefault(gram, set()).add(word)
+            products.add(product_id)
+
+    def remove(self, product_id, words):
+        for word in set(words):
+            products = self._words.get(word)
+            if products is None:
+                continue
+            products.discard(product_id)
+            if not products:
+                del self._words[word]
+                for gram in self._trigrams.pop(word, ()):
+                    words = self._postings[gram]
+                    words.discard(word)
+                    if not words:
+                        del self._postings[gram]
+
+    def similar_words(self, word, threshold=FUZZY_THRESHOLD):
+        """{palabra del catálogo: similitud} para las que alcanzan el umbral"""
+        if word.isdigit():
+            return {word: 1.0} if word in self._words else {}
+        grams = trigrams(word)
+        common = Counter(candidate for gram in grams for candidate in self._postings.get(gram, ()))
+        similar = {}
+        for candidate, shared in common.items():
+            score = shared / (len(grams) + len(self._trigrams[candidate]) - shared)
+            if score >= threshold:
+                similar[candidate] = score
+        return similar
+
+    def match(self, query, threshold=FUZZY_THRESHOLD):
+        """{id: puntaje promedio} de los productos donde cada palabra de `query` tiene una parecida"""
+        terms = search_terms(query)
+        if not terms:
+            return {}
+        per_term = []
+        for term in terms:
+            best = {}
+            for word, score in self.similar_words(term, threshold).items():
+                for product_id in self._words[word]:
+                    if score > best.get(product_id, 0):
+                        best[product_id] = score
+            if not best:
+                return {}
+            per_term.append(best)
+        # Se recorre el conjunto más chico y se busca en los demás
+        per_term.sort(key=len)
+        matches = {}
+        for product_id, score in per_term[0].items():
+            total = score
+            for best in per_term[1:]:
+                other = best.get(product_id)
+                if other is None:
+                    break
+                total += other
+            else:
+                matches[product_id] = total / len(terms)
+        return matches
+
+
+def _pg_fuzzy_products(query, limit, exclude):
+    terms = search_terms(query)
+    if not terms:
+        return []
+    name = db.func.f_unaccent(db.func.lower(Product.name))
+    # Umbral del operador <<% solo para esta transacción; como SELECT va a la
+    # misma conexión (réplica o primario) que la consulta siguiente
+    db.session.execute(db.select(db.func.set_config(
+        'pg_trgm.strict_word_similarity_threshold', str(FUZZY_THRESHOLD), True)))
+    # La suma ordena igual que el promedio
+    score = sum(db.func.strict_word_similarity(term, name) for term in terms)
+    products_query = Product.query.filter(*[db.literal(term).op('<<%')(name) for term in terms])
+    if exclude:
+        products_query = products_query.filter(Product.id.notin_(exclude))
+    return (products_query
+            .order_by(score.desc(), Product.sold_count.desc(), Product.id)
+            .limit(limit)
+            .all())
+
+
+def fuzzy_products(query, limit=FUZZY_LIMIT, exclude=()):
+    """Productos parecidos a `query` (errores de tipeo), del más al menos parecido, sin los de `exclude`"""
+    if dialect_name() == 'postgresql':
+        return _pg_fuzzy_products(query, limit, exclude)
+
+    # Sin pg_trgm: índice de trigramas en memoria de este proceso
+    from suggest import suggest_index
+    suggest_index.refresh()
+    ids = suggest_index.fuzzy(query, FUZZY_THRESHOLD, limit, exclude)
+    if not ids:
+        return []
+    products = {product.id: product for product in Product.query.filter(Product.id.in_(ids))}
+    return [products[product_id] for product_id in ids if product_id in products]
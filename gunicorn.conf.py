@@ -0,0 +1,24 @@
+# ⚙️ CONFIGURACIÓN DE GUNICORN (se carga sola desde el directorio de trabajo)
+# gunicorn 'app:create_app()'
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8080)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+
+# La app se importa una vez en el proceso maestro y los workers la heredan con
+# fork: arrancan más rápido y comparten la memoria de los módulos ya cargados.
+# create_app() no abre conexiones ni hilos, así que no hay nada que duplicar.
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+
+
+def post_fork(server, worker):
+    # Por si el maestro llegó a abrir conexiones: cada worker arranca con su propio pool
+    if preload_app:
+        from models import db
+        app = server.app.wsgi()
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
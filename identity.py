@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask_login import UserMixin
+
+from models import db, User
+
+# 🪪 CACHÉ DE IDENTIDAD PARA FLASK-LOGIN (por proceso)
+# load_user() se ejecuta en cada petición autenticada (incluidas las llamadas
+# AJAX del carrito). En vez de ir a la base de datos cada vez se guarda una
+# copia ligera del usuario (id, username, role) con TTL y tamaño máximo (LRU).
+# admin_edit_user/admin_delete_user invalidan la entrada; el TTL cubre a los
+# demás workers de gunicorn.
+
+IDENTITY_CACHE_TTL = int(os.environ.get('IDENTITY_CACHE_TTL', 60))
+IDENTITY_CACHE_SIZE = int(os.environ.get('IDENTITY_CACHE_SIZE', 1024))
+
+
+class UserIdentity(UserMixin):
+    """Copia inmutable del usuario: lo que necesitan current_user y las plantillas"""
+
+    def __init__(self, id, username, role):
+        self.id = id
+        self.username = username
+        self.role = role
+
+    def is_admin(self):
+        return self.role in ['admin', 'master_admin']
+
+    def is_master_admin(self):
+        return self.role == 'master_admin'
+
+    def __repr__(self):
+        return f'<UserIdentity {self.username}>'
+
+
+class IdentityCache:
+    def __init__(self, ttl=IDENTITY_CACHE_TTL, max_size=IDENTITY_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get(self, user_id, load):
+        """Identidad cacheada de `user_id`; si no está o expiró se llama load(user_id)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        identity = load(user_id)
+        if identity is None:
+            return None
+        with self._lock:
+            self._entries[user_id] = (now + self.ttl, identity)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return identity
+
+    def invalidate(self, user_id):
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 3) if total else 0.0,
+                # Cada acierto es un SELECT de users que no se hizo en esa petición
+                'db_queries_saved': self.hits,
+                'invalidations': self.invalidations,
+                'evictions': self.evictions,
+                'ttl_seconds': self.ttl
+            }
+
+
+identity_cache = IdentityCache()
+
+
+def _load_identity(user_id):
+    row = db.session.execute(
+        db.select(User.id, User.username, User.role).where(User.id == user_id)
+    ).first()
+    return UserIdentity(row.id, row.username, row.role) if row else None
+
+
+def load_identity(user_id):
+    """user_loader de Flask-Login: identidad ligera desde la caché"""
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    return identity_cache.get(user_id, _load_identity)
+
+
+def invalidate_identity(user_id):
+    identity_cache.invalidate(int(user_id))
@@ -0,0 +1,117 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageOps
+
+from models import db, Product
+from cache import invalidate_home_products
+
+# 🖼️ PROCESAMIENTO DE IMÁGENES EN SEGUNDO PLANO
+# La ruta del admin guarda el archivo original y responde de inmediato;
+# un pool de hilos genera las variantes responsivas (WebP + JPEG) y las
+# registra en Product.image_variants para que las plantillas emitan srcset.
+
+IMAGE_WIDTHS = (320, 640, 1024)
+IMAGE_QUALITY = {'webp': 80, 'jpeg': 82}
+IMAGE_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+MAX_ORIGINAL_SIZE = (1600, 1600)
+VARIANTS_SUBFOLDER = 'variants'
+
+image_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('IMAGE_WORKERS', 2)),
+    thread_name_prefix='image-worker'
+)
+
+
+def _static_url(filepath):
+    """static/uploads/x.jpg -> /static/uploads/x.jpg"""
+    return '/' + filepath.replace(os.sep, '/').lstrip('/')
+
+
+def generate_variants(filepath):
+    """Genera las variantes de `filepath` y devuelve {formato: {ancho: url}}"""
+    folder = os.path.join(os.path.dirname(filepath), VARIANTS_SUBFOLDER)
+    os.makedirs(folder, exist_ok=True)
+    base = os.path.splitext(os.path.basename(filepath))[0]
+
+    with Image.open(filepath) as img:
+        img = ImageOps.exif_transpose(img)
+        # JPEG no admite transparencia: se aplana sobre fondo blanco
+        if img.mode in ('RGBA', 'LA', 'P'):
+            rgba = img.convert('RGBA')
+            img = Image.new('RGB', rgba.size, (255, 255, 255))
+            img.paste(rgba, mask=rgba.split()[-1])
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        # No se amplían imágenes pequeñas: se usa su ancho real
+        widths = sorted({min(w, img.width) for w in IMAGE_WIDTHS})
+        variants = {fmt: {} for fmt in IMAGE_QUALITY}
+        for width in widths:
+            height = round(img.height * width / img.width)
+            resized = img if width == img.width else img.resize((width, height), Image.LANCZOS)
+            for fmt, quality in IMAGE_QUALITY.items():
+                out = os.path.join(folder, f"{base}-{width}.{IMAGE_EXTENSIONS[fmt]}")
+                if fmt == 'jpeg':
+                    resized.save(out, 'JPEG', quality=quality, optimize=True, progressive=True)
+                else:
+                    resized.save(out, 'WEBP', quality=quality, method=4)
+                variants[fmt][str(width)] = _static_url(out)
+    return variants
+
+
+def shrink_original(filepath):
+    """Limita el tamaño del archivo original (fallback para navegadores sin srcset)"""
+    with Image.open(filepath) as img:
+        if img.width <= MAX_ORIGINAL_SIZE[0] and img.height <= MAX_ORIGINAL_SIZE[1]:
+            return
+        img.thumbnail(MAX_ORIGINAL_SIZE)
+        img.save(filepath)
+
+
+def delete_variants(image_variants):
+    """Borra del disco los archivos de variantes guardados en image_variants"""
+    if not image_variants:
+        return
+    try:
+        variants = json.loads(image_variants)
+    except ValueError:
+        return
+    for urls in variants.values():
+        for url in urls.values():
+            path = url.lstrip('/')
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def process_product_image(app, product_id, filepath, image_url):
+    """Tarea del pool: genera variantes y las guarda en el producto"""
+    try:
+        shrink_original(filepath)
+        variants = generate_variants(filepath)
+    except Exception as e:
+        print(f"⚠️ Error procesando imagen {filepath}: {e}")
+        return
+
+    with app.app_context():
+        try:
+            product = db.session.get(Product, product_id)
+            # El admin pudo cambiar la imagen mientras se procesaba esta
+            if not product or product.image_url != image_url:
+                delete_variants(json.dumps(variants))
+                return
+            product.image_variants = json.dumps(variants)
+            db.session.commit()
+            invalidate_home_products()
+            print(f"✅ Variantes generadas para producto {product_id}")
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️ Error guardando variantes del producto {product_id}: {e}")
+        finally:
+            db.session.remove()
+
+
+def enqueue_product_image(app, product_id, filepath, image_url):
+    """Encola el procesamiento de la imagen subida y regresa inmediatamente"""
+    return image_executor.submit(process_product_image, app, product_id, filepath, image_url)
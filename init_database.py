@@ -1,13 +1,15 @@
-from app import app, db
+from app import create_app, db, init_db
 from models import User, Product, Video
 
+app = create_app()
+
 def init_database():
     with app.app_context():
         print("🗑️  Eliminando tablas existentes...")
         db.drop_all()
         
         print("🔄 Creando nuevas tablas...")
-        db.create_all()
+        init_db()
         
         print("👥 Creando usuarios de ejemplo...")
         # Crear administrador maestro
@@ -0,0 +1,264 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import OperationalError
+
+from models import db, Product, CartItem, StockReservation
+from cart_service import active_cart_id_subquery
+
+# 📦 RESERVA DE STOCK EN EL CHECKOUT
+# Al crear la orden de pago se descuenta el stock de todas las líneas del
+# carrito con un solo UPDATE condicional (stock = stock - n WHERE stock >= n):
+# no hay SELECT ... FOR UPDATE previo, así que cada fila de producto queda
+# bloqueada solo lo que dura ese UPDATE y su commit. Lo apartado queda en
+# stock_reservations hasta que el pago se confirma (committed) o se cancela
+# / vence (released, el stock se devuelve).
+# Cada juego de reservas queda atado a su orden de PayPal (paypal_order_id):
+# al capturar solo cuenta lo apartado para esa orden, y si el carrito ya no
+# coincide o la reserva venció se libera y no se cobra.
+
+RESERVATION_TTL = timedelta(minutes=int(os.environ.get('STOCK_RESERVATION_MINUTES', 15)))
+SWEEP_INTERVAL = int(os.environ.get('RESERVATION_SWEEP_SECONDS', 60))
+RESERVE_ATTEMPTS = 3
+
+
+class ReservationResult:
+    def __init__(self, ok, failed=None):
+        self.ok = ok
+        # [{'product_id', 'name', 'requested', 'available'}] de las líneas sin stock suficiente
+        self.failed = failed or []
+
+    @property
+    def message(self):
+        if self.ok:
+            return 'Stock reservado'
+        detalle = ', '.join(f"{line['name']} (quedan {line['available']})" for line in self.failed)
+        return f'Sin stock suficiente: {detalle}'
+
+
+def _reserve_once(user_id):
+    cart_id = active_cart_id_subquery(user_id)
+    now = datetime.utcnow()
+
+    # Un solo UPDATE para todas las líneas; solo se descuentan las que alcanzan
+    reserved = set(db.session.execute(
+        db.update(Product)
+        .where(Product.id == CartItem.product_id,
+               CartItem.cart_id == cart_id,
+               Product.stock >= CartItem.quantity)
+        .values(stock=Product.stock - CartItem.quantity, **Product.bump_values())
+        .returning(Product.id)
+    ).scalars())
+
+    requested = set(db.session.execute(
+        db.insert(StockReservation)
+        .from_select(['user_id', 'product_id', 'quantity', 'price', 'status', 'created_at', 'expires_at'],
+                     db.select(db.literal(user_id, db.Integer),
+                               CartItem.product_id,
+                               CartItem.quantity,
+                               Product.price,
+                               db.literal('held', db.String),
+                               db.literal(now, db.DateTime),
+                               db.literal(now + RESERVATION_TTL, db.DateTime))
+                     .join(Product, Product.id == CartItem.product_id)
+                     .where(CartItem.cart_id == cart_id))
+        .returning(StockReservation.product_id)
+    ).scalars())
+
+    if requested and reserved == requested:
+        db.session.commit()
+        return ReservationResult(True)
+
+    # Todo o nada: se deshace el descuento y se informa qué líneas fallaron
+    db.session.rollback()
+    failed = [{
+        'product_id': row.product_id,
+        'name': row.name,
+        'requested': row.quantity,
+        'available': row.stock or 0
+    } for row in (db.session.query(CartItem.product_id, CartItem.quantity, Product.name, Product.stock)
+                  .join(Product, Product.id == CartItem.product_id)
+                  .filter(CartItem.cart_id == active_cart_id_subquery(user_id),
+                          db.func.coalesce(Product.stock, 0) < CartItem.quantity))]
+    return ReservationResult(False, failed)
+
+
+def reserve_cart(user_id):
+    """Aparta el stock de todo el carrito activo (todo o nada) y hace commit.
+
+    Las reservas anteriores del usuario que sigan apartadas se liberan primero
+    (p. ej. si vuelve a pulsar "Pagar").
+    """
+    for attempt in range(RESERVE_ATTEMPTS):
+        try:
+            release_reservations(user_id=user_id)
+            return _reserve_once(user_id)
+        except OperationalError:
+            # Interbloqueo (dos carritos con los mismos productos en distinto orden)
+            # o base de datos ocupada: reintentar la transacción completa
+            db.session.rollback()
+            if attempt == RESERVE_ATTEMPTS - 1:
+                raise
+            time.sleep(0.05 * (attempt + 1))
+
+
+def _held(user_id=None, paypal_order_id=None, expired=False):
+    conditions = [StockReservation.status == 'held']
+    if user_id is not None:
+        conditions.append(StockReservation.user_id == user_id)
+    if paypal_order_id is not None:
+        conditions.append(StockReservation.paypal_order_id == paypal_order_id)
+    if expired:
+        conditions.append(StockReservation.expires_at < datetime.utcnow())
+    return conditions
+
+
+def release_reservations(user_id=None, paypal_order_id=None, expired=False):
+    """Libera reservas apartadas y devuelve su stock. No hace commit. Devuelve las líneas liberadas.
+
+    Primero se marcan como released (RETURNING): si el barrido y una cancelación
+    coinciden, solo uno de los dos recibe las filas y el stock no se devuelve dos veces.
+    """
+    rows = db.session.execute(
+        db.update(StockReservation)
+        .where(*_held(user_id, paypal_order_id, expired))
+        .values(status='released')
+        .returning(StockReservation.product_id, StockReservation.quantity)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not rows:
+        return 0
+
+    totals = defaultdict(int)
+    for product_id, quantity in rows:
+        totals[product_id] += quantity
+    db.session.execute(
+        db.update(Product)
+        .where(Product.id.in_(totals))
+        .values(stock=Product.stock + db.case(totals, value=Product.id), **Product.bump_values())
+        .execution_options(synchronize_session=False)
+    )
+    return len(rows)
+
+
+def attach_order(user_id, paypal_order_id):
+    """Asocia las reservas apartadas del usuario a la orden de PayPal. No hace commit."""
+    return db.session.execute(
+        db.update(StockReservation)
+        .where(*_held(user_id))
+        .values(paypal_order_id=paypal_order_id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def extend_reservations(user_id, paypal_order_id):
+    """Renueva el vencimiento de las reservas vigentes de la orden. Devuelve cuántas siguen apartadas."""
+    now = datetime.utcnow()
+    return db.session.execute(
+        db.update(StockReservation)
+        .where(*_held(user_id, paypal_order_id), StockReservation.expires_at >= now)
+        .values(expires_at=now + RESERVATION_TTL)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def reserved_quantities(user_id, paypal_order_id):
+    """{product_id: unidades} apartadas y vigentes para la orden de PayPal"""
+    totals = defaultdict(int)
+    for product_id, quantity in (db.session.query(StockReservation.product_id, StockReservation.quantity)
+                                 .filter(*_held(user_id, paypal_order_id),
+                                         StockReservation.expires_at >= datetime.utcnow())):
+        totals[product_id] += quantity
+    return dict(totals)
+
+
+def reserved_lines(user_id, paypal_order_id=None):
+    """Líneas apartadas (product_id, quantity, price) con el precio de cuando se apartaron.
+
+    Si el admin cambia el precio mientras el cliente paga, la orden se registra
+    con el precio que PayPal cobró.
+    """
+    return (db.session.query(StockReservation.product_id, StockReservation.quantity, StockReservation.price)
+            .filter(*_held(user_id, paypal_order_id))
+            .order_by(StockReservation.id)
+            .all())
+
+
+def cart_quantities(user_id):
+    """{product_id: unidades} del carrito activo"""
+    return dict(db.session.query(CartItem.product_id, CartItem.quantity)
+                .filter(CartItem.cart_id == active_cart_id_subquery(user_id)))
+
+
+def check_reservations(user_id, paypal_order_id):
+    """Antes de capturar: renueva las reservas de la orden y verifica que sigan
+    siendo exactamente el carrito. Si no, las libera. No hace commit.
+
+    Devuelve None si se puede cobrar, o el motivo para no hacerlo.
+    """
+    extend_reservations(user_id, paypal_order_id)
+    reserved = reserved_quantities(user_id, paypal_order_id)
+    if reserved and reserved == cart_quantities(user_id):
+        return None
+    release_reservations(user_id=user_id, paypal_order_id=paypal_order_id)
+    if not reserved:
+        return 'La reserva de stock venció; vuelve a iniciar el pago'
+    return 'El carrito cambió durante el pago; vuelve a iniciar el pago'
+
+
+def confirm_reservations(user_id, paypal_order_id):
+    """Pago capturado: las reservas de la orden pasan a committed (el stock ya estaba descontado). No hace commit."""
+    return db.session.execute(
+        db.update(StockReservation)
+        .where(*_held(user_id, paypal_order_id))
+        .values(status='committed')
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def release_expired_reservations():
+    """Barrido: devuelve el stock de las reservas vencidas y hace commit"""
+    released = release_reservations(expired=True)
+    db.session.commit()
+    return released
+
+
+_sweeper_pid = None
+_sweeper_lock = threading.Lock()
+
+
+def start_reservation_sweeper(app, interval=SWEEP_INTERVAL):
+    """Hilo de fondo que libera reservas vencidas cada `interval` segundos (0 = desactivado).
+
+    Se puede llamar en cada petición: arranca un solo hilo por proceso. Cada
+    worker de gunicorn tiene el suyo; marcar antes de devolver el stock evita
+    liberar dos veces la misma reserva.
+    """
+    global _sweeper_pid
+    if interval <= 0 or _sweeper_pid == os.getpid():
+        return None
+    with _sweeper_lock:
+        if _sweeper_pid == os.getpid():
+            return None
+        _sweeper_pid = os.getpid()
+
+    def sweep():
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    released = release_expired_reservations()
+                    if released:
+                        print(f"📦 {released} reservas de stock vencidas liberadas")
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"⚠️ Error liberando reservas vencidas: {e}")
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=sweep, name='reservation-sweeper', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,26 @@
+"""Add unique constraint on orders.payment_id
+
+Revision ID: 1b9e5f3a8c62
+Revises: 0a6c4e2b7d19
+Create Date: 2026-10-18 16:02:31.447019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1b9e5f3a8c62'
+down_revision = '0a6c4e2b7d19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_order_payment_id', ['payment_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_order_payment_id', type_='unique')
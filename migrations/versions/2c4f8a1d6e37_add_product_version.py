@@ -0,0 +1,31 @@
+"""Add version and updated_at to products
+
+Revision ID: 2c4f8a1d6e37
+Revises: 1b9e5f3a8c62
+Create Date: 2026-10-18 17:10:52.318604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c4f8a1d6e37'
+down_revision = '1b9e5f3a8c62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    # Los productos existentes arrancan con la fecha de la migración como última modificación
+    op.execute(sa.text('UPDATE products SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL'))
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('version')
@@ -0,0 +1,47 @@
+"""Add products.sold_count and catalog sort indexes
+
+Revision ID: 3e7a9c2f4b51
+Revises: 2c4f8a1d6e37
+Create Date: 2026-10-18 18:05:13.902471
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e7a9c2f4b51'
+down_revision = '2c4f8a1d6e37'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_product_featured_id', ['featured', 'id']),
+    ('ix_product_price_id', ['price', 'id']),
+    ('ix_product_sold_count_id', ['sold_count', 'id']),
+    ('ix_product_category_price', ['category', 'price', 'id']),
+    ('ix_product_category_sold_count', ['category', 'sold_count', 'id']),
+    ('ix_product_category_featured', ['category', 'featured', 'id']),
+]
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sold_count', sa.Integer(), nullable=False, server_default='0'))
+
+    # Unidades vendidas hasta hoy, desde los rollups diarios
+    op.execute(sa.text(
+        'UPDATE products SET sold_count = COALESCE('
+        '(SELECT SUM(cantidad) FROM ventas_diarias WHERE ventas_diarias.producto_id = products.id), 0)'
+    ))
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        for name, columns in INDEXES:
+            batch_op.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        for name, _ in reversed(INDEXES):
+            batch_op.drop_index(name)
+        batch_op.drop_column('sold_count')
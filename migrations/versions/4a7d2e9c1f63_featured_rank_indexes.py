@@ -0,0 +1,34 @@
+"""Index the featured sort as an integer expression
+
+Revision ID: 4a7d2e9c1f63
+Revises: 3e7a9c2f4b51
+Create Date: 2026-10-18 21:40:27.615093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a7d2e9c1f63'
+down_revision = '3e7a9c2f4b51'
+branch_labels = None
+depends_on = None
+
+# La misma expresión que models.featured_rank (el orden del catálogo la usa tal cual)
+FEATURED_RANK = '(CASE WHEN featured THEN 1 ELSE 0 END)'
+
+
+def upgrade():
+    op.drop_index('ix_product_category_featured', table_name='products')
+    op.drop_index('ix_product_featured_id', table_name='products')
+    op.create_index('ix_product_featured_rank_id', 'products', [sa.text(FEATURED_RANK), 'id'], unique=False)
+    op.create_index('ix_product_category_featured_rank', 'products',
+                    ['category', sa.text(FEATURED_RANK), 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_product_category_featured_rank', table_name='products')
+    op.drop_index('ix_product_featured_rank_id', table_name='products')
+    op.create_index('ix_product_featured_id', 'products', ['featured', 'id'], unique=False)
+    op.create_index('ix_product_category_featured', 'products', ['category', 'featured', 'id'], unique=False)
@@ -0,0 +1,43 @@
+"""Add pg_trgm and the trigram index on product names
+
+Revision ID: 5b8e3f0a2d74
+Revises: 4a7d2e9c1f63
+Create Date: 2026-10-18 22:15:48.207391
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8e3f0a2d74'
+down_revision = '4a7d2e9c1f63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Búsqueda tolerante a errores de tipeo (fuzzy.py) en PostgreSQL; en SQLite
+    # se usa el índice de trigramas en memoria y no hay nada que crear
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # f_unaccent() la crea b3e1c9a4d2f7; se repite por si la base se armó a mano
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS
+        $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """)
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_product_name_trgm ON products "
+               "USING GIN (f_unaccent(lower(name)) gin_trgm_ops)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_product_name_trgm")
+    # Sin CASCADE: si algo más usa pg_trgm, el downgrade falla en vez de borrarlo
+    op.execute("DROP EXTENSION IF EXISTS pg_trgm")
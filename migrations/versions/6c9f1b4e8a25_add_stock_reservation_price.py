@@ -0,0 +1,33 @@
+"""Add unit price to stock_reservations
+
+Revision ID: 6c9f1b4e8a25
+Revises: 5b8e3f0a2d74
+Create Date: 2026-10-18 23:02:11.540876
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c9f1b4e8a25'
+down_revision = '5b8e3f0a2d74'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('stock_reservations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('price', sa.Float(), nullable=True))
+
+    # Reservas vigentes al migrar: el precio actual es el que se cobró al crearlas
+    op.execute(sa.text(
+        "UPDATE stock_reservations SET price = "
+        "(SELECT price FROM products WHERE products.id = stock_reservations.product_id) "
+        "WHERE price IS NULL"
+    ))
+
+
+def downgrade():
+    with op.batch_alter_table('stock_reservations', schema=None) as batch_op:
+        batch_op.drop_column('price')
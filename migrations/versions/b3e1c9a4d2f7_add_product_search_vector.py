@@ -0,0 +1,91 @@
+"""Add full-text search vector to products
+
+Revision ID: b3e1c9a4d2f7
+Revises: 547f45f90e23
+Create Date: 2026-10-18 10:12:03.418227
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e1c9a4d2f7'
+down_revision = '547f45f90e23'
+branch_labels = None
+depends_on = None
+
+# Igual que search.SQLITE_SEARCH_DDL, copiado para que la migración no cambie si ese módulo cambia
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, category,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description, category)
+        VALUES (new.id, new.name, new.description, new.category);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, category)
+        VALUES ('delete', old.id, old.name, old.description, old.category);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, category)
+        VALUES ('delete', old.id, old.name, old.description, old.category);
+        INSERT INTO products_fts(rowid, name, description, category)
+        VALUES (new.id, new.name, new.description, new.category);
+    END
+    """,
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        # Tabla FTS5 con contenido externo (products) y triggers que la mantienen al día
+        for ddl in SQLITE_SEARCH_DDL:
+            op.execute(ddl)
+        # Indexar los productos que ya existían
+        op.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+        return
+    if dialect != 'postgresql':
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS
+        $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """)
+    op.execute("""
+        ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', f_unaccent(coalesce(name, ''))), 'A') ||
+            setweight(to_tsvector('simple', f_unaccent(coalesce(category, ''))), 'B') ||
+            setweight(to_tsvector('simple', f_unaccent(coalesce(description, ''))), 'C')
+        ) STORED
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_product_search_vector ON products USING GIN (search_vector)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for trigger in ('products_fts_ai', 'products_fts_ad', 'products_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS products_fts")
+        return
+    if dialect != 'postgresql':
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_product_search_vector")
+    op.execute("ALTER TABLE products DROP COLUMN IF EXISTS search_vector")
+    op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
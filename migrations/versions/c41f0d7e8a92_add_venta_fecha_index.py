@@ -0,0 +1,26 @@
+"""Add (fecha, id) index to ventas for keyset pagination
+
+Revision ID: c41f0d7e8a92
+Revises: b3e1c9a4d2f7
+Create Date: 2026-10-18 11:02:47.905113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41f0d7e8a92'
+down_revision = 'b3e1c9a4d2f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('ventas', schema=None) as batch_op:
+        batch_op.create_index('ix_venta_fecha_id', ['fecha', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('ventas', schema=None) as batch_op:
+        batch_op.drop_index('ix_venta_fecha_id')
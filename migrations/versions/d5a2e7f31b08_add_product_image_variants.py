@@ -0,0 +1,26 @@
+"""Add image_variants column to products
+
+Revision ID: d5a2e7f31b08
+Revises: c41f0d7e8a92
+Create Date: 2026-10-18 11:48:20.562031
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a2e7f31b08'
+down_revision = 'c41f0d7e8a92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_variants', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_column('image_variants')
@@ -0,0 +1,46 @@
+"""Add ventas_diarias rollup table
+
+Revision ID: e8b4c2a9f615
+Revises: d5a2e7f31b08
+Create Date: 2026-10-18 12:31:56.204718
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b4c2a9f615'
+down_revision = 'd5a2e7f31b08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ventas_diarias',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('producto_id', sa.Integer(), nullable=False),
+    sa.Column('cantidad', sa.Integer(), nullable=False),
+    sa.Column('ingresos', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['producto_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('fecha', 'producto_id', name='uq_venta_diaria_fecha_producto')
+    )
+    with op.batch_alter_table('ventas_diarias', schema=None) as batch_op:
+        batch_op.create_index('ix_venta_diaria_producto', ['producto_id'], unique=False)
+
+    # Cargar los rollups con las ventas existentes (precio actual del producto)
+    op.execute("""
+        INSERT INTO ventas_diarias (fecha, producto_id, cantidad, ingresos)
+        SELECT date(v.fecha), v.producto_id, SUM(v.cantidad), SUM(v.cantidad * p.price)
+        FROM ventas v JOIN products p ON p.id = v.producto_id
+        GROUP BY date(v.fecha), v.producto_id
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('ventas_diarias', schema=None) as batch_op:
+        batch_op.drop_index('ix_venta_diaria_producto')
+
+    op.drop_table('ventas_diarias')
@@ -0,0 +1,56 @@
+"""Add unique (cart_id, product_id) and one active cart per user
+
+Revision ID: f17a3d5c9e40
+Revises: e8b4c2a9f615
+Create Date: 2026-10-18 14:08:12.530961
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f17a3d5c9e40'
+down_revision = 'e8b4c2a9f615'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Fusionar líneas duplicadas (sumando cantidades) en la de menor id
+    op.execute("""
+        UPDATE cart_items SET quantity = (
+            SELECT SUM(d.quantity) FROM cart_items d
+            WHERE d.cart_id = cart_items.cart_id AND d.product_id = cart_items.product_id
+        )
+        WHERE id IN (
+            SELECT MIN(id) FROM cart_items GROUP BY cart_id, product_id HAVING COUNT(*) > 1
+        )
+    """)
+    op.execute("""
+        DELETE FROM cart_items
+        WHERE id NOT IN (SELECT MIN(id) FROM cart_items GROUP BY cart_id, product_id)
+    """)
+    # Dejar activo solo el carrito más antiguo de cada usuario (el que ya usaba la app)
+    op.execute("""
+        UPDATE carts SET is_active = false
+        WHERE is_active AND id NOT IN (
+            SELECT MIN(id) FROM carts WHERE is_active GROUP BY user_id
+        )
+    """)
+
+    with op.batch_alter_table('cart_items', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_cart_item_cart_product', ['cart_id', 'product_id'])
+
+    with op.batch_alter_table('carts', schema=None) as batch_op:
+        batch_op.create_index('uq_cart_active_user', ['user_id'], unique=True,
+                              postgresql_where=sa.text('is_active'),
+                              sqlite_where=sa.text('is_active'))
+
+
+def downgrade():
+    with op.batch_alter_table('carts', schema=None) as batch_op:
+        batch_op.drop_index('uq_cart_active_user')
+
+    with op.batch_alter_table('cart_items', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_cart_item_cart_product', type_='unique')
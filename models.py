@@ -2,8 +2,12 @@ from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 from datetime import datetime
+import json
 
-db = SQLAlchemy()
+from db_routing import RoutingSession
+
+# Las lecturas de las rutas de catálogo pueden ir a una réplica (ver db_routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
@@ -44,19 +48,55 @@ class Product(db.Model):
     price = db.Column(db.Float, nullable=False)
     category = db.Column(db.String(50), nullable=False)
     image_url = db.Column(db.String(200), nullable=True, default='')
+    image_variants = db.Column(db.Text, nullable=True)  # JSON {formato: {ancho: url}} generado en segundo plano
     stock = db.Column(db.Integer, default=0)
     featured = db.Column(db.Boolean, default=False)
+    # Sube con cada cambio (ORM o UPDATE en bloque): ETag/Last-Modified de la página del producto
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Unidades vendidas, se suma al registrar ventas (ver rollups.py): orden "más vendidos"
+    sold_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Actualizar índices también
     __table_args__ = (
         db.Index('ix_product_name', 'name'),  # ✅ VOLVER A name
         db.Index('ix_product_category', 'category'),
         db.Index('ix_product_name_desc', 'name', 'description'),  # ✅ VOLVER A name
+        # Órdenes del catálogo (catalog.py), con y sin filtro de categoría; el id desempata el cursor
+        db.Index('ix_product_price_id', 'price', 'id'),
+        db.Index('ix_product_sold_count_id', 'sold_count', 'id'),
+        db.Index('ix_product_category_price', 'category', 'price', 'id'),
+        db.Index('ix_product_category_sold_count', 'category', 'sold_count', 'id'),
     )
     
+    def image_srcset(self, fmt='jpeg'):
+        """srcset con las variantes responsivas ('' si aún no se generan)"""
+        if not self.image_variants:
+            return ''
+        variants = json.loads(self.image_variants).get(fmt, {})
+        return ', '.join(f'{url} {width}w' for width, url in sorted(variants.items(), key=lambda v: int(v[0])))
+    
+    @staticmethod
+    def bump_values():
+        """Columnas a agregar en un UPDATE en bloque de productos para marcar el cambio"""
+        return {'version': Product.version + 1, 'updated_at': datetime.utcnow()}
+    
     def __repr__(self):
         return f'<Product {self.name}>'  # ✅ VOLVER A name
 
+# Orden "destacados" (catalog.py): 1/0 en lugar del booleano, que no admite < / >
+# en el cursor y puede ser NULL. Los índices usan exactamente la misma expresión
+# (literales, sin parámetros) para que el planificador los reconozca.
+featured_rank = db.case((Product.featured, db.literal_column('1')), else_=db.literal_column('0'))
+db.Index('ix_product_featured_rank_id', featured_rank, Product.id)
+db.Index('ix_product_category_featured_rank', Product.category, featured_rank, Product.id)
+
+@db.event.listens_for(Product, 'before_update')
+def bump_product_version(mapper, connection, target):
+    # Cualquier edición por el ORM (admin, variantes de imagen) sube la versión en el mismo UPDATE
+    target.version = Product.version + 1
+    target.updated_at = datetime.utcnow()
+
 class Cart(db.Model):
     __tablename__ = 'carts'
     
@@ -65,6 +105,12 @@ class Cart(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
     
+    # Un solo carrito activo por usuario (índice único parcial)
+    __table_args__ = (
+        db.Index('uq_cart_active_user', 'user_id', unique=True,
+                 postgresql_where=db.text('is_active'), sqlite_where=db.text('is_active')),
+    )
+    
     # Relaciones
     items = db.relationship('CartItem', backref='cart', lazy=True, cascade='all, delete-orphan')
     
@@ -80,6 +126,11 @@ class CartItem(db.Model):
     quantity = db.Column(db.Integer, default=1)
     added_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Una línea por producto en cada carrito: agregar de nuevo suma la cantidad (upsert)
+    __table_args__ = (
+        db.UniqueConstraint('cart_id', 'product_id', name='uq_cart_item_cart_product'),
+    )
+    
     # ✅ AGREGAR ESTA RELACIÓN (FALTANTE)
     product = db.relationship('Product', backref='cart_items')
     
@@ -99,6 +150,11 @@ class Order(db.Model):
     shipping_name = db.Column(db.String(100), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # payment_id (id de la orden de PayPal) es la llave de idempotencia: una orden por pago
+    __table_args__ = (
+        db.UniqueConstraint('payment_id', name='uq_order_payment_id'),
+    )
+    
     # Relaciones
     items = db.relationship('OrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
     
@@ -144,6 +200,54 @@ class Venta(db.Model):
     # Relaciones con nombres explícitos para evitar conflictos
     producto = db.relationship('Product', backref=db.backref('ventas_asociadas', lazy=True))
     usuario = db.relationship('User', backref=db.backref('ventas_realizadas', lazy=True))
+
+    # Orden estable (fecha, id) para paginar el historial de ventas por cursor
+    __table_args__ = (
+        db.Index('ix_venta_fecha_id', 'fecha', 'id'),
+    )
+    
+    def __repr__(self):
+        return f'<Venta {self.id} - Producto {self.producto_id} - Usuario {self.usuario_id}>'
+class VentaDiaria(db.Model):
+    """Resumen diario por producto, se mantiene al registrar ventas (ver rollups.py)"""
+    __tablename__ = 'ventas_diarias'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    fecha = db.Column(db.Date, nullable=False)
+    producto_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    cantidad = db.Column(db.Integer, nullable=False, default=0)
+    ingresos = db.Column(db.Float, nullable=False, default=0)
+    
+    producto = db.relationship('Product')
+    
+    __table_args__ = (
+        db.UniqueConstraint('fecha', 'producto_id', name='uq_venta_diaria_fecha_producto'),
+        db.Index('ix_venta_diaria_producto', 'producto_id'),
+    )
+    
+    def __repr__(self):
+        return f'<VentaDiaria {self.fecha} - Producto {self.producto_id} - {self.cantidad}>'
+
+class StockReservation(db.Model):
+    """Stock apartado durante el pago (ver inventory.py): held -> committed | released"""
+    __tablename__ = 'stock_reservations'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    # Precio unitario al apartar: lo que se cobra en PayPal y se registra en la orden
+    price = db.Column(db.Float, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='held')
+    paypal_order_id = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_stock_reservation_user_status', 'user_id', 'status'),
+        # El barrido de vencidas solo recorre las que siguen apartadas
+        db.Index('ix_stock_reservation_status_expires', 'status', 'expires_at'),
+    )
     
     def __repr__(self):
-        return f'<Venta {self.id} - Producto {self.producto_id} - Usuario {self.usuario_id}>'
\ No newline at end of file
+        return f'<StockReservation {self.id} - Producto {self.product_id} x{self.quantity} ({self.status})>'
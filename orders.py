@@ -0,0 +1,114 @@
+from flask import current_app
+
+from models import db, Cart, Order, OrderItem
+from cart_service import order_total
+from inventory import confirm_reservations, release_reservations, reserved_lines
+from stats import invalidate_dashboard_stats
+from rollups import dialect_insert, record_ventas
+
+# 🧾 REGISTRO DE ÓRDENES AL CAPTURAR EL PAGO
+# Orden + líneas + ventas (y rollups) + desactivar el carrito + confirmar la
+# reserva de stock, todo en una transacción y con inserts en bloque. El id de
+# la orden de PayPal (Order.payment_id, único) es la llave de idempotencia:
+# un reintento o doble clic devuelve la orden ya creada en vez de duplicarla.
+# Las líneas salen de las reservas de ese pago (lo que se cobró), no del
+# carrito, que el cliente pudo cambiar en otra pestaña mientras pagaba.
+
+
+class OrderError(Exception):
+    pass
+
+
+def find_order(payment_id, user_id):
+    """Orden del pago `payment_id`, solo si es del usuario"""
+    return Order.query.filter_by(payment_id=payment_id, user_id=user_id).first()
+
+
+def place_order(user_id, payment_id, amount=None, payer_id=None, shipping_name=None, shipping_address=None):
+    """Crea la orden con el stock apartado para el pago `payment_id` y hace commit.
+
+    `amount` es lo que PayPal cobró (None en pagos simulados). Si no coincide
+    con el total de las líneas, las reservas se liberan y se lanza OrderError.
+    Devuelve (orden, creada). Si ya existía una orden con ese pago la devuelve
+    con creada=False sin tocar nada más.
+    """
+    existing = find_order(payment_id, user_id)
+    if existing:
+        return existing, False
+
+    lines = reserved_lines(user_id, payment_id)
+    if not lines:
+        raise OrderError('No hay stock apartado para este pago')
+
+    total = order_total(sum(line.price * line.quantity for line in lines))
+    if amount is not None and round(amount, 2) != round(total, 2):
+        release_reservations(user_id=user_id, paypal_order_id=payment_id)
+        db.session.commit()
+        # Cobrado y sin orden: tiene que quedar en el log de la app para reembolsarlo o conciliarlo
+        current_app.logger.error(
+            "Pago capturado sin orden: paypal_order_id=%s user_id=%s cobrado=%.2f total=%.2f (reembolsar o conciliar)",
+            payment_id, user_id, amount, total)
+        raise OrderError('El monto cobrado no coincide con el total de la orden')
+
+    stmt = dialect_insert(Order).values(
+        user_id=user_id,
+        total=total,
+        status='paid',
+        payment_id=payment_id,
+        payer_id=payer_id,
+        shipping_name=shipping_name,
+        shipping_address=shipping_address
+    ).on_conflict_do_nothing(index_elements=['payment_id']).returning(Order.id)
+    order_id = db.session.execute(stmt).scalar()
+
+    if order_id is None:
+        # Otra petición con el mismo pago ganó la carrera: se devuelve su orden
+        db.session.rollback()
+        existing = find_order(payment_id, user_id)
+        if existing is None:
+            raise OrderError('Este pago ya está registrado en otra orden')
+        return existing, False
+
+    db.session.execute(db.insert(OrderItem), [{
+        'order_id': order_id,
+        'product_id': line.product_id,
+        'quantity': line.quantity,
+        'price': line.price
+    } for line in lines])
+
+    record_ventas([{
+        'producto_id': line.product_id,
+        'cantidad': line.quantity,
+        'precio': line.price
+    } for line in lines], user_id)
+
+    db.session.execute(
+        db.update(Cart)
+        .where(Cart.user_id == user_id, Cart.is_active == True)
+        .values(is_active=False)
+        .execution_options(synchronize_session=False)
+    )
+    confirm_reservations(user_id, payment_id)
+    db.session.commit()
+    # Órdenes, ventas, ingresos y stock bajo del panel cambiaron
+    invalidate_dashboard_stats()
+    return db.session.get(Order, order_id), True
+
+
+def payer_details(capture):
+    """(payer_id, nombre, dirección) de la respuesta de captura de PayPal"""
+    payer_id = (capture.get('payer') or {}).get('payer_id')
+    units = capture.get('purchase_units') or [{}]
+    shipping = units[0].get('shipping') or {}
+    name = (shipping.get('name') or {}).get('full_name')
+    address = shipping.get('address') or {}
+    lines = [address.get(key) for key in ('address_line_1', 'address_line_2', 'admin_area_2',
+                                          'admin_area_1', 'postal_code', 'country_code')]
+    return payer_id, name, ', '.join(line for line in lines if line) or None
+
+
+def captured_amount(capture):
+    """Total cobrado según la respuesta de captura de PayPal (0 si no trae montos)"""
+    return sum(float((item.get('amount') or {}).get('value') or 0)
+               for unit in capture.get('purchase_units') or []
+               for item in (unit.get('payments') or {}).get('captures') or [])
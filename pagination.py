@@ -0,0 +1,211 @@
+import base64
+import json
+from datetime import date, datetime
+
+from flask import request, url_for
+
+from models import db
+
+# 📄 PAGINACIÓN POR CURSOR (KEYSET)
+# En lugar de OFFSET se guarda la clave de orden de la última fila de la página
+# y la siguiente página arranca "después" de ella, usando el índice de esas columnas.
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """El ?cursor= no es de este orden (alterado, de otra ruta o de otra versión)"""
+
+
+class Page:
+    def __init__(self, items, next_cursor, page_size):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.page_size = page_size
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and set(value) == {'dt'}:
+        return datetime.fromisoformat(value['dt'])
+    if isinstance(value, dict) and set(value) == {'d'}:
+        return date.fromisoformat(value['d'])
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Valores de la clave de orden, o None si el cursor no es válido"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list):
+            return None
+        return [_decode_value(v) for v in values]
+    except (ValueError, TypeError):
+        return None
+
+
+def _column(expr):
+    return getattr(expr, 'expression', expr)
+
+
+def _nullable(expr):
+    column = _column(expr)
+    return isinstance(column, db.Column) and column.nullable
+
+
+def _is_boolean(expr):
+    return isinstance(getattr(expr, 'type', None), db.Boolean)
+
+
+def _accepts(expr, value):
+    """¿`value` sirve como valor de la columna de orden `expr`?"""
+    if value is None:
+        return _nullable(expr)
+    column_type = getattr(expr, 'type', None)
+    if isinstance(column_type, db.Boolean):
+        return isinstance(value, bool)
+    if isinstance(value, bool):
+        return False
+    if isinstance(column_type, db.Integer):
+        return isinstance(value, int)
+    if isinstance(column_type, db.String):
+        return isinstance(value, str)
+    if isinstance(column_type, db.DateTime):
+        return isinstance(value, datetime)
+    if isinstance(column_type, db.Date):
+        return isinstance(value, date) and not isinstance(value, datetime)
+    # Numeric/Float y expresiones sin tipo (rangos de relevancia, CASE)
+    return isinstance(value, (int, float))
+
+
+def cursor_values(cursor, keys):
+    """Valores del cursor validados contra `keys`; InvalidCursor si no corresponden"""
+    values = decode_cursor(cursor)
+    if values is None or len(values) != len(keys):
+        raise InvalidCursor('cursor inválido para este listado')
+    for (expr, _), value in zip(keys, values):
+        if not _accepts(expr, value):
+            raise InvalidCursor('cursor inválido para este listado')
+    return values
+
+
+def get_page_size(default=DEFAULT_PAGE_SIZE):
+    """Tamaño de página pedido en ?limit=, acotado a MAX_PAGE_SIZE"""
+    try:
+        size = int(request.args.get('limit', default))
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _equal(expr, value):
+    return expr.is_(None) if value is None else expr == value
+
+
+def _nulls_at_end(descending):
+    # Sin NULLS FIRST/LAST explícito (para seguir usando los índices):
+    # PostgreSQL trata NULL como el mayor valor, SQLite como el menor
+    nulls_largest = db.engine.dialect.name == 'postgresql'
+    return nulls_largest != descending
+
+
+def _beyond(expr, value, descending):
+    """Filas que van después de `value` en la columna `expr` (sin contar los empates).
+
+    Los booleanos no admiten < / > en SQLAlchemy: False < True se escribe como igualdad.
+    """
+    nullable = _nullable(expr)
+    if value is None:
+        # El cursor está entre los NULL: después van los no nulos solo si los NULL van primero
+        return db.false() if _nulls_at_end(descending) else expr.is_not(None)
+    if _is_boolean(expr):
+        step = expr == (not value) if value == descending else db.false()
+    else:
+        step = expr < value if descending else expr > value
+    if nullable and _nulls_at_end(descending):
+        step = db.or_(step, expr.is_(None))
+    return step
+
+
+def _after(keys, values):
+    """Condición "fila posterior al cursor" para un orden compuesto.
+
+    (a, b) después de (va, vb) == a > va OR (a = va AND b > vb), con < para columnas DESC.
+    """
+    conditions = []
+    for i, (expr, descending) in enumerate(keys):
+        equal_prefix = [_equal(keys[j][0], values[j]) for j in range(i)]
+        conditions.append(db.and_(*equal_prefix, _beyond(expr, values[i], descending)))
+    return db.or_(*conditions)
+
+
+
+def keyset_paginate(query, keys, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """Una página de `query` ordenada por `keys` = [(columna, descendente), ...].
+
+    La última clave debe ser única (normalmente el id) para que el orden sea estable.
+    Un cursor que no corresponde a `keys` lanza InvalidCursor (las rutas responden 400).
+    """
+    if cursor:
+        query = query.filter(_after(keys, cursor_values(cursor, keys)))
+
+    query = query.order_by(None).order_by(
+        *[expr.desc() if descending else expr.asc() for expr, descending in keys]
+    )
+    rows = query.add_columns(
+        *[expr.label(f'_cursor_{i}') for i, (expr, _) in enumerate(keys)]
+    ).limit(page_size + 1).all()
+
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = encode_cursor(list(rows[-1][1:])) if has_next else None
+    return Page([row[0] for row in rows], next_cursor, page_size)
+
+
+def paginate_request(query, keys, default_size=DEFAULT_PAGE_SIZE):
+    """keyset_paginate() con el cursor y el tamaño tomados de la petición actual"""
+    return keyset_paginate(query, keys,
+                           cursor=request.args.get('cursor'),
+                           page_size=get_page_size(default_size))
+
+
+def next_page_url(page, **extra):
+    """URL de la siguiente página conservando los filtros de la petición actual"""
+    if not page.has_next:
+        return None
+    args = request.args.to_dict()
+    args.update(extra)
+    args['cursor'] = page.next_cursor
+    return url_for(request.endpoint, **request.view_args, **args)
+
+
+def link_header(page):
+    """Cabecera Link (RFC 8288) para las respuestas JSON"""
+    url = next_page_url(page, _external=True)
+    return {'Link': f'<{url}>; rel="next"'} if url else {}
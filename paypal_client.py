@@ -0,0 +1,209 @@
+import threading
+import time
+import uuid
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 💳 CLIENTE DE PAYPAL
+# - El access token se reutiliza hasta poco antes de `expires_in` (un POST
+#   OAuth por hora en lugar de uno por checkout).
+# - Una sola requests.Session por proceso: conexiones keep-alive en pool,
+#   sin repetir el handshake TLS en cada llamada.
+# - Timeouts de conexión/lectura acotados y reintentos con backoff, para que
+#   un PayPal lento no deje colgado un hilo de gunicorn. El peor caso de una
+#   llamada, (conexión + lectura) × (reintentos + 1) + backoff, tiene que caber
+#   en PAYPAL_DEADLINE, y este por debajo del timeout del worker (init_app).
+# - Solo se reintentan los GET y los POST con PayPal-Request-Id (PayPal no
+#   duplica la orden ni el cobro); el POST del token solo reintenta la conexión.
+# La configuración sale de app.config (ver config.py) en init_app().
+
+DEFAULT_TIMEOUT = (3.05, 7)
+DEFAULT_RETRIES = 1
+DEFAULT_BACKOFF = 0.3
+DEFAULT_POOL_SIZE = 8
+DEFAULT_DEADLINE = 25  # gunicorn mata el worker a los 30 s
+# Segundos antes de `expires_in` en que el token se considera vencido
+TOKEN_REFRESH_MARGIN = 60
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def base_url_for(mode):
+    return "https://api-m.paypal.com" if mode == "live" else "https://api-m.sandbox.paypal.com"
+
+
+def worst_case_seconds(timeout, retries, backoff):
+    """Lo más que puede tardar una llamada: todos los intentos agotan sus timeouts, más las esperas"""
+    connect, read = timeout
+    # urllib3 no espera antes del primer reintento y luego duplica: backoff × 2, × 4, ...
+    waits = sum(backoff * 2 ** (n - 1) for n in range(2, retries + 1))
+    return (connect + read) * (retries + 1) + waits
+
+
+class PayPalError(Exception):
+    """Error al hablar con PayPal; `status` es el código HTTP (None si no hubo respuesta)"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class PayPalClient:
+    def __init__(self, base_url=base_url_for('sandbox'), client_id='', client_secret='',
+                 timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                 pool_size=DEFAULT_POOL_SIZE, deadline=DEFAULT_DEADLINE):
+        self._token = None
+        self._token_expires_at = 0
+        self._token_lock = threading.Lock()
+        self.token_fetches = 0
+        self.api_calls = 0
+        self.configure(base_url, client_id, client_secret, timeout, retries, backoff, pool_size, deadline)
+
+    def configure(self, base_url, client_id, client_secret, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                  backoff=DEFAULT_BACKOFF, pool_size=DEFAULT_POOL_SIZE, deadline=DEFAULT_DEADLINE):
+        self.base_url = base_url.rstrip('/')
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.timeout = tuple(timeout)
+        self.call_budget = worst_case_seconds(self.timeout, retries, backoff)
+        # Tiempo total de request(): token + llamada (+ renovación si hubo 401)
+        self.deadline = deadline
+        if self.call_budget > self.deadline:
+            raise RuntimeError(f"🚫 PayPal: una llamada puede tardar {self.call_budget:.1f} s y el límite es "
+                               f"{self.deadline:.1f} s; bajar PAYPAL_READ_TIMEOUT o PAYPAL_RETRIES")
+
+        # Retry-After se ignora: un 429 con "espera 60 s" no puede retener el hilo
+        retry_options = dict(backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+                             respect_retry_after_header=False, raise_on_status=False)
+        # Reintentos completos: GET y POST con PayPal-Request-Id (idempotentes)
+        self.session = self._session(pool_size, Retry(
+            total=retries, connect=retries, read=retries, status=retries,
+            allowed_methods=frozenset(['GET', 'POST']), **retry_options))
+        # POST sin PayPal-Request-Id (token OAuth): se repite si no llegó a
+        # conectar o PayPal lo rechazó (429/5xx), nunca tras un timeout de lectura
+        self.single_session = self._session(pool_size, Retry(
+            total=retries, connect=retries, read=0, status=retries, other=0,
+            allowed_methods=frozenset(['GET', 'POST']), **retry_options))
+        self.invalidate_token()
+
+    def init_app(self, app):
+        """Toma la configuración de app.config y verifica que quepa en el timeout del worker"""
+        config = app.config
+        worker_timeout = config['WORKER_TIMEOUT']
+        deadline = config['PAYPAL_DEADLINE'] or worker_timeout - 5
+        if deadline >= worker_timeout:
+            raise RuntimeError(f"🚫 PAYPAL_DEADLINE ({deadline} s) tiene que ser menor que el timeout "
+                               f"del worker ({worker_timeout} s)")
+        self.configure(
+            config['PAYPAL_BASE_URL'] or base_url_for(config['PAYPAL_MODE']),
+            config['PAYPAL_CLIENT_ID'], config['PAYPAL_CLIENT_SECRET'],
+            timeout=(config['PAYPAL_CONNECT_TIMEOUT'], config['PAYPAL_READ_TIMEOUT']),
+            retries=config['PAYPAL_RETRIES'], backoff=config['PAYPAL_BACKOFF'],
+            pool_size=config['PAYPAL_POOL_SIZE'], deadline=deadline)
+
+    @staticmethod
+    def _session(pool_size, retry):
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _check_deadline(self, started):
+        """Antes de cada llamada: si ya no cabe su peor caso, mejor fallar ahora que matar el worker"""
+        if time.monotonic() - started + self.call_budget > self.deadline:
+            raise PayPalError("PayPal tardó demasiado; se canceló antes del timeout del servidor", 504)
+
+    @property
+    def is_configured(self):
+        return bool(self.client_id and self.client_secret)
+
+    def _fetch_token(self):
+        try:
+            response = self.single_session.post(
+                f"{self.base_url}/v1/oauth2/token",
+                auth=(self.client_id, self.client_secret),
+                data={"grant_type": "client_credentials"},
+                headers={"Accept": "application/json"},
+                timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            raise PayPalError(f"Sin respuesta de PayPal al pedir token: {e}")
+        if response.status_code != 200:
+            raise PayPalError(f"Error PayPal al pedir token: {response.text}", response.status_code)
+
+        payload = response.json()
+        self.token_fetches += 1
+        expires_in = int(payload.get('expires_in', 0))
+        self._token = payload['access_token']
+        self._token_expires_at = time.monotonic() + max(expires_in - TOKEN_REFRESH_MARGIN, 0)
+        return self._token
+
+    def get_access_token(self, force_refresh=False, started=None):
+        """Token OAuth cacheado; solo un hilo lo renueva cuando vence"""
+        if not force_refresh and self._token and time.monotonic() < self._token_expires_at:
+            return self._token
+        with self._token_lock:
+            if not force_refresh and self._token and time.monotonic() < self._token_expires_at:
+                return self._token
+            if started is not None:
+                self._check_deadline(started)
+            return self._fetch_token()
+
+    def invalidate_token(self):
+        with self._token_lock:
+            self._token = None
+            self._token_expires_at = 0
+
+    def request(self, method, path, json=None, request_id=None):
+        """Llamada autenticada a la API. Si el token fue revocado (401) se renueva una vez.
+
+        Todo (token incluido) termina dentro de `deadline`: antes de cada llamada
+        se verifica que su peor caso todavía quepa.
+        """
+        started = time.monotonic()
+        headers = {"Content-Type": "application/json"}
+        if method == 'POST':
+            headers["PayPal-Request-Id"] = request_id or uuid.uuid4().hex
+
+        for attempt in range(2):
+            token = self.get_access_token(force_refresh=attempt > 0, started=started)
+            headers["Authorization"] = f"Bearer {token}"
+            self._check_deadline(started)
+            try:
+                response = self.session.request(method, f"{self.base_url}{path}", json=json,
+                                                headers=headers, timeout=self.timeout)
+            except requests.RequestException as e:
+                raise PayPalError(f"Sin respuesta de PayPal: {e}")
+            self.api_calls += 1
+            if response.status_code != 401:
+                break
+
+        if response.status_code >= 400:
+            raise PayPalError(f"Error PayPal: {response.text}", response.status_code)
+        return response.json() if response.content else {}
+
+    def create_order(self, total, currency='MXN', request_id=None):
+        return self.request('POST', '/v2/checkout/orders', json={
+            "intent": "CAPTURE",
+            "purchase_units": [{
+                "amount": {"currency_code": currency, "value": f"{total:.2f}"}
+            }]
+        }, request_id=request_id)
+
+    def capture_order(self, order_id, request_id=None):
+        return self.request('POST', f'/v2/checkout/orders/{order_id}/capture',
+                            request_id=request_id or f"capture-{order_id}")
+
+    def stats(self):
+        return {
+            'token_fetches': self.token_fetches,
+            'api_calls': self.api_calls,
+            'token_valid_for': max(round(self._token_expires_at - time.monotonic()), 0) if self._token else 0
+        }
+
+
+# Sin credenciales hasta paypal.init_app(app) en create_app()
+paypal = PayPalClient()
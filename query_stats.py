@@ -0,0 +1,169 @@
+import json
+import re
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 🧮 CONSULTAS SQL POR PETICIÓN
+# Los eventos de SQLAlchemy cuentan cada sentencia que ejecuta una petición,
+# su tiempo y su "forma" (la sentencia sin valores). Al responder:
+#   - cabecera Server-Timing (db;dur=...;desc="N queries"), visible en DevTools,
+#   - una línea JSON en el log (todas o solo las marcadas, según SQL_LOG),
+#   - se marca la ruta si repite la misma forma más de SQL_REPEAT_LIMIT veces
+#     (consultas dentro de un bucle, el típico N+1) o si supera su presupuesto.
+# Con SQL_STRICT (pruebas/CI) lo marcado hace fallar la petición.
+
+_NAMED_PARAM = re.compile(r'%\(\w+\)s|:\w+|\$\d+')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PARAM_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACES = re.compile(r'\s+')
+_SELECT_LIST = re.compile(r'^SELECT .+? FROM ')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def fingerprint(statement):
+    """Forma de la sentencia: sin valores, con listas IN (...) colapsadas y espacios normalizados"""
+    shape = _NAMED_PARAM.sub('?', statement)
+    shape = _STRING.sub('?', shape)
+    shape = _NUMBER.sub('?', shape)
+    shape = _PARAM_LIST.sub('(?)', shape)
+    return _SPACES.sub(' ', shape).strip()
+
+
+class RequestQueries:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+        self.failed = 0
+
+    def record(self, statement, elapsed, failed=False):
+        self.count += 1
+        self.failed += failed
+        self.duration += elapsed
+        self.shapes[fingerprint(statement)] += 1
+
+    def repeated(self, limit):
+        """[(forma, veces)] de las sentencias ejecutadas más de `limit` veces"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n > limit]
+
+    def server_timing(self):
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"'
+
+
+def _short(shape, size=200):
+    # Para el log: sin la lista de columnas, que es lo que menos dice de la consulta
+    shape = _SELECT_LIST.sub('SELECT … FROM ', shape, count=1)
+    return shape if len(shape) <= size else shape[:size] + '…'
+
+
+def query_budget(limit):
+    """Máximo de consultas SQL que puede hacer la vista (se revisa al responder)"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            g.sql_budget = limit
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+def _current():
+    return g.get('sql_queries') if has_app_context() else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('sql_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['sql_started'].pop()
+    queries = _current()
+    if queries is not None:
+        queries.record(statement, time.perf_counter() - started)
+
+
+def _handle_error(context):
+    # Si la sentencia falla no llega after_cursor_execute: sacar su inicio de la pila
+    # (si no, los tiempos de las siguientes quedan corridos) y contarla igual
+    conn = context.connection
+    started = conn.info.get('sql_started') if conn is not None else None
+    if not started or context.statement is None:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    queries = _current()
+    if queries is not None:
+        queries.record(context.statement, elapsed, failed=True)
+
+
+_listening = False
+_listen_lock = threading.Lock()
+
+
+def _listen():
+    # En la clase Engine: cubre todos los motores (también los que se creen después)
+    global _listening
+    with _listen_lock:
+        if not _listening:
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(Engine, 'handle_error', _handle_error)
+            _listening = True
+
+
+def _start_request():
+    g.sql_queries = RequestQueries()
+
+
+def _finish_request(response):
+    queries = g.pop('sql_queries', None)
+    if queries is None or not queries.count:
+        return response
+
+    config = current_app.config
+    response.headers.add('Server-Timing', queries.server_timing())
+
+    budget = g.get('sql_budget') or config['SQL_QUERY_BUDGET']
+    repeated = queries.repeated(config['SQL_REPEAT_LIMIT'])
+    over_budget = bool(budget) and queries.count > budget
+    flagged = over_budget or bool(repeated)
+
+    if config['SQL_LOG'] == 'all' or (flagged and config['SQL_LOG'] != 'off'):
+        print(('⚠️ SQL ' if flagged else '🧮 SQL ') + json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'queries': queries.count,
+            'failed': queries.failed,
+            'db_ms': round(queries.duration * 1000, 1),
+            'budget': budget or None,
+            'repeated': [{'count': n, 'sql': _short(shape)} for shape, n in repeated]
+        }, ensure_ascii=False), flush=True)
+
+    if flagged and config['SQL_STRICT']:
+        detail = '; '.join(f'{n}x {_short(shape, 120)}' for shape, n in repeated)
+        raise QueryBudgetExceeded(
+            f"{request.endpoint}: {queries.count} consultas"
+            + (f" (presupuesto {budget})" if over_budget else '')
+            + (f"; repetidas: {detail}" if detail else ''))
+    return response
+
+
+def init_query_stats(app):
+    app.config.setdefault('SQL_QUERY_BUDGET', 0)
+    app.config.setdefault('SQL_REPEAT_LIMIT', 5)
+    app.config.setdefault('SQL_LOG', 'flagged')
+    app.config.setdefault('SQL_STRICT', False)
+    _listen()
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
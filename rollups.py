@@ -0,0 +1,121 @@
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, Product, Venta, VentaDiaria
+
+# 📈 RESÚMENES DE VENTAS (ROLLUPS)
+# Cada venta registrada suma su cantidad e ingreso a la fila (día, producto)
+# de ventas_diarias en la misma transacción, así /admin/ventas lee totales
+# de una tabla pequeña en lugar de recorrer todo el historial.
+
+
+def dialect_insert(model):
+    """insert() con soporte de ON CONFLICT para el motor actual (PostgreSQL/SQLite)"""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(model)
+    if dialect == 'sqlite':
+        return sqlite.insert(model)
+    raise RuntimeError(f'upsert no soportado en {dialect}')
+
+
+def upsert(model, rows, index_elements, increment):
+    """INSERT ... ON CONFLICT DO UPDATE sumando las columnas de `increment` (PostgreSQL/SQLite)"""
+    if not rows:
+        return
+
+    stmt = dialect_insert(model).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={column: getattr(model, column) + stmt.excluded[column] for column in increment}
+    )
+    db.session.execute(stmt)
+
+
+def record_ventas(lines, usuario_id, fecha=None):
+    """Registra ventas y actualiza los rollups en la transacción actual (no hace commit).
+
+    lines: [{'producto_id': ..., 'cantidad': ..., 'precio': precio unitario}, ...]
+    """
+    fecha = fecha or datetime.utcnow()
+    db.session.execute(db.insert(Venta), [{
+        'producto_id': line['producto_id'],
+        'cantidad': line['cantidad'],
+        'usuario_id': usuario_id,
+        'fecha': fecha
+    } for line in lines])
+
+    # Una sola fila por (día, producto): ON CONFLICT no puede tocar la misma fila dos veces
+    totals = defaultdict(lambda: {'cantidad': 0, 'ingresos': 0.0})
+    for line in lines:
+        total = totals[line['producto_id']]
+        total['cantidad'] += line['cantidad']
+        total['ingresos'] += line['precio'] * line['cantidad']
+
+    upsert(VentaDiaria, [{
+        'fecha': fecha.date(),
+        'producto_id': producto_id,
+        'cantidad': total['cantidad'],
+        'ingresos': total['ingresos']
+    } for producto_id, total in totals.items()],
+        index_elements=['fecha', 'producto_id'],
+        increment=['cantidad', 'ingresos'])
+
+    # Contador de "más vendidos" del catálogo
+    db.session.execute(
+        db.update(Product)
+        .where(Product.id.in_(totals))
+        .values(sold_count=Product.sold_count + db.case(
+            {producto_id: total['cantidad'] for producto_id, total in totals.items()}, value=Product.id))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def backfill_rollups():
+    """Recalcula ventas_diarias (y Product.sold_count) desde cero a partir de las ventas existentes.
+
+    Las ventas anteriores a los rollups no guardan precio, se usa el precio actual del producto.
+    """
+    dia = db.func.date(Venta.fecha)
+    select = (db.select(dia,
+                        Venta.producto_id,
+                        db.func.sum(Venta.cantidad),
+                        db.func.sum(Venta.cantidad * Product.price))
+              .join(Product, Product.id == Venta.producto_id)
+              .group_by(dia, Venta.producto_id))
+
+    db.session.execute(db.delete(VentaDiaria))
+    db.session.execute(
+        db.insert(VentaDiaria).from_select(['fecha', 'producto_id', 'cantidad', 'ingresos'], select)
+    )
+    sold = (db.select(db.func.coalesce(db.func.sum(VentaDiaria.cantidad), 0))
+            .where(VentaDiaria.producto_id == Product.id)
+            .scalar_subquery())
+    db.session.execute(db.update(Product).values(sold_count=sold).execution_options(synchronize_session=False))
+    db.session.commit()
+    return VentaDiaria.query.count()
+
+
+def sales_summary(top=5):
+    """Totales generales y productos más vendidos, leídos solo de los rollups"""
+    unidades, ingresos = db.session.query(
+        db.func.coalesce(db.func.sum(VentaDiaria.cantidad), 0),
+        db.func.coalesce(db.func.sum(VentaDiaria.ingresos), 0)
+    ).one()
+
+    top_products = (db.session.query(Product.name,
+                                     db.func.sum(VentaDiaria.cantidad).label('cantidad'),
+                                     db.func.sum(VentaDiaria.ingresos).label('ingresos'))
+                    .join(Product, Product.id == VentaDiaria.producto_id)
+                    .group_by(Product.id, Product.name)
+                    .order_by(db.func.sum(VentaDiaria.ingresos).desc())
+                    .limit(top)
+                    .all())
+
+    return {
+        'unidades': unidades,
+        'ingresos': ingresos,
+        'top_products': top_products
+    }
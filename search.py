@@ -0,0 +1,151 @@
+import re
+import unicodedata
+
+from sqlalchemy import text, column, literal_column, table
+
+from models import db, Product
+
+# 🔎 BÚSQUEDA DE TEXTO COMPLETO
+# PostgreSQL: columna tsvector generada (sin acentos) + índice GIN
+# SQLite (local): tabla virtual FTS5 sincronizada con triggers
+# Con errores de tipeo se completa con coincidencias aproximadas (fuzzy.py)
+# En producción lo crean las migraciones (b3e1c9a4d2f7 y 5b8e3f0a2d74);
+# ensure_search_index() lo repite para bases creadas con init-db o create_all
+
+# Tabla ligera (no está en db.metadata para que create_all no la toque)
+products_fts = table('products_fts', column('rowid'))
+
+PG_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() no es IMMUTABLE, se envuelve para poder usarla en columnas generadas
+    """
+    CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS
+    $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """,
+    """
+    ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', f_unaccent(coalesce(name, ''))), 'A') ||
+        setweight(to_tsvector('simple', f_unaccent(coalesce(category, ''))), 'B') ||
+        setweight(to_tsvector('simple', f_unaccent(coalesce(description, ''))), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_product_search_vector ON products USING GIN (search_vector)",
+    # Búsqueda tolerante a errores de tipeo (fuzzy.py): trigramas del nombre sin acentos
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_product_name_trgm ON products USING GIN (f_unaccent(lower(name)) gin_trgm_ops)",
+]
+
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, category,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description, category)
+        VALUES (new.id, new.name, new.description, new.category);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, category)
+        VALUES ('delete', old.id, old.name, old.description, old.category);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, category)
+        VALUES ('delete', old.id, old.name, old.description, old.category);
+        INSERT INTO products_fts(rowid, name, description, category)
+        VALUES (new.id, new.name, new.description, new.category);
+    END
+    """,
+]
+
+
+def normalize_text(value):
+    """Minúsculas y sin acentos: 'Rúbor' -> 'rubor'"""
+    if not value or value.isascii():
+        return (value or '').lower()
+    value = unicodedata.normalize('NFKD', value)
+    value = ''.join(c for c in value if not unicodedata.combining(c))
+    return value.lower()
+
+
+def search_terms(query):
+    """Palabras normalizadas de la búsqueda del usuario"""
+    return re.findall(r'\w+', normalize_text(query))
+
+
+def dialect_name():
+    return db.engine.dialect.name
+
+
+def ensure_search_index():
+    """Crear (si no existe) el índice de texto completo según el motor de BD"""
+    dialect = dialect_name()
+    with db.engine.begin() as conn:
+        if dialect == 'postgresql':
+            for ddl in PG_SEARCH_DDL:
+                conn.execute(text(ddl))
+        elif dialect == 'sqlite':
+            exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='products_fts'"
+            )).first()
+            for ddl in SQLITE_SEARCH_DDL:
+                conn.execute(text(ddl))
+            if not exists:
+                # Indexar los productos que ya existían
+                conn.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+
+
+def search_sort_keys():
+    """Orden por relevancia como claves (columna, descendente), aptas para paginar por cursor"""
+    dialect = dialect_name()
+    if dialect == 'postgresql':
+        rank = literal_column("ts_rank_cd(products.search_vector, to_tsquery('simple', :ts_query))")
+        return [(rank, True), (Product.id, False)]
+    if dialect == 'sqlite':
+        # bm25: más negativo = más relevante. Peso por columna: name, description, category
+        rank = literal_column("bm25(products_fts, 10.0, 1.0, 5.0)")
+        return [(rank, False), (Product.id, False)]
+    return [(Product.id, False)]
+
+
+def search_products(query):
+    """Query de productos que coinciden con `query`, ordenados por relevancia.
+
+    Cada palabra se busca como prefijo ("lab" encuentra "labial") y sin acentos.
+    Si el motor no tiene índice de texto completo se usa ILIKE como respaldo.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return Product.query.filter(db.false())
+
+    dialect = dialect_name()
+    if dialect == 'postgresql':
+        ts_query = ' & '.join(f'{term}:*' for term in terms)
+        products_query = (Product.query
+                          .filter(text("products.search_vector @@ to_tsquery('simple', :ts_query)"))
+                          .params(ts_query=ts_query))
+    elif dialect == 'sqlite':
+        fts_query = ' AND '.join(f'"{term}"*' for term in terms)
+        products_query = (Product.query
+                          .join(products_fts, products_fts.c.rowid == Product.id)
+                          .filter(text("products_fts MATCH :fts_query"))
+                          .params(fts_query=fts_query))
+    else:
+        products_query = Product.query.filter(
+            (Product.name.ilike(f'%{query}%')) |
+            (Product.description.ilike(f'%{query}%')) |
+            (Product.category.ilike(f'%{query}%'))
+        )
+
+    return products_query.order_by(
+        *[expr.desc() if descending else expr.asc() for expr, descending in search_sort_keys()]
+    )
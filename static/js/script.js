@@ -12,8 +12,54 @@ document.addEventListener('DOMContentLoaded', function() {
     if (document.querySelector('.cart-container')) {
         initCartFunctionality();
     }
+
+    // Subida de videos por partes (formularios de administración)
+    document.querySelectorAll('form[data-chunked-upload]').forEach(initChunkedVideoUpload);
+
+    // Sugerencias del buscador del encabezado
+    document.querySelectorAll('input[data-suggest-url]').forEach(initSearchSuggest);
 });
 
+function initSearchSuggest(input) {
+    const list = document.getElementById(input.getAttribute('list'));
+    const seen = new Map();  // prefijo -> nombres (evita repetir peticiones al borrar)
+    let timer = null;
+    let controller = null;
+
+    function render(names) {
+        list.replaceChildren(...names.map(name => {
+            const option = document.createElement('option');
+            option.value = name;
+            return option;
+        }));
+    }
+
+    input.addEventListener('input', function() {
+        const query = input.value.trim();
+        clearTimeout(timer);
+        if (!query) {
+            render([]);
+            return;
+        }
+        if (seen.has(query)) {
+            render(seen.get(query));
+            return;
+        }
+        timer = setTimeout(() => {
+            if (controller) controller.abort();
+            controller = new AbortController();
+            fetch(`${input.dataset.suggestUrl}?q=${encodeURIComponent(query)}`, {signal: controller.signal})
+                .then(response => response.json())
+                .then(data => {
+                    const names = (data.products || []).map(product => product.name);
+                    seen.set(query, names);
+                    if (input.value.trim() === query) render(names);
+                })
+                .catch(() => {});
+        }, 120);
+    });
+}
+
 function initCartFunctionality() {
     // Variables para el modal
     const modal = document.getElementById('confirmationModal');
@@ -92,94 +138,47 @@ function initCartFunctionality() {
     });
 }
 
-// Función para eliminar producto del carrito
-function removeItemFromCart(productId) {
-    console.log('Eliminando producto ID:', productId);
-    
-    fetch('/remove_from_cart', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-            product_id: parseInt(productId)
-        })
-    })
-    .then(response => {
-        if (!response.ok) {
-            throw new Error('Error en la respuesta del servidor');
-        }
-        return response.json();
-    })
-    .then(data => {
-        console.log('Respuesta del servidor:', data);
-        if (data.success) {
-            // Encontrar el elemento del carrito y eliminarlo
-            const itemToRemove = document.querySelector(`.cart-item[data-product-id="${productId}"]`);
-            if (itemToRemove) {
-                itemToRemove.remove();
-                
-                // Actualizar el total
-                if (data.total !== undefined) {
-                    const totalElement = document.querySelector('.cart-summary h2');
-                    if (totalElement) {
-                        totalElement.textContent = `Total: $${data.total.toFixed(2)}`;
-                    }
-                }
-                
-                // Si no quedan items, mostrar carrito vacío
-                const remainingItems = document.querySelectorAll('.cart-item');
-                if (remainingItems.length === 0) {
-                    const cartItemsContainer = document.querySelector('.cart-items');
-                    if (cartItemsContainer) {
-                        cartItemsContainer.innerHTML = `
-                            <div class="empty-cart">
-                                <p>Tu carrito está vacío</p>
-                                <a href="/products" class="btn-primary">Seguir comprando</a>
-                            </div>
-                        `;
-                    }
-                    
-                    const cartSummary = document.querySelector('.cart-summary');
-                    if (cartSummary) cartSummary.style.display = 'none';
-                }
-                
-                // Actualizar contador del carrito
-                updateCartCount(-1);
-                
-                // Mostrar mensaje de éxito
-                showNotification('Producto eliminado del carrito', 'success');
-            }
-        } else {
-            showNotification('Error: ' + data.message, 'error');
-        }
-    })
-    .catch(error => {
-        console.error('Error:', error);
-        showNotification('Error al eliminar el producto: ' + error.message, 'error');
-    });
+// Cambios del carrito agrupados: los clics en +/- y "Eliminar" se acumulan
+// y se envían juntos a /cart/batch tras una pausa breve (una petición, un commit)
+const CART_BATCH_DELAY = 400;
+const pendingCartOperations = new Map();
+let cartBatchTimer = null;
+let cartBatchInFlight = null;
+
+function queueCartOperation(productId, operation) {
+    // set/remove son absolutos: la última operación de cada producto es la que cuenta
+    pendingCartOperations.set(productId, { ...operation, product_id: parseInt(productId) });
+    clearTimeout(cartBatchTimer);
+    cartBatchTimer = setTimeout(flushCartOperations, CART_BATCH_DELAY);
 }
 
-// Función para actualizar la cantidad
-function updateQuantity(productId, quantity, quantityElement) {
-    fetch('/update_cart_quantity', {
+function flushCartOperations(keepalive = false) {
+    clearTimeout(cartBatchTimer);
+    if (pendingCartOperations.size === 0) return;
+    if (cartBatchInFlight && !keepalive) {
+        // Un lote a la vez: el siguiente sale cuando termine el actual
+        cartBatchInFlight.finally(() => flushCartOperations());
+        return;
+    }
+
+    const operations = Array.from(pendingCartOperations.values());
+    pendingCartOperations.clear();
+
+    cartBatchInFlight = fetch('/cart/batch', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
         },
-        body: JSON.stringify({
-            product_id: parseInt(productId),
-            quantity: quantity
-        })
+        body: JSON.stringify({ operations: operations }),
+        keepalive: keepalive
     })
     .then(response => response.json())
     .then(data => {
         if (data.success) {
-            // Actualizar la cantidad mostrada
-            quantityElement.textContent = quantity;
-            
-            // Recargar la página para actualizar los totales
-            window.location.reload();
+            renderCartSummary(data);
+            if (operations.some(op => op.op === 'remove')) {
+                showNotification('Producto eliminado del carrito', 'success');
+            }
         } else {
             showNotification('Error: ' + data.message, 'error');
             // Recargar para restaurar cantidades correctas
@@ -188,11 +187,73 @@ function updateQuantity(productId, quantity, quantityElement) {
     })
     .catch(error => {
         console.error('Error:', error);
-        showNotification('Error al actualizar la cantidad', 'error');
+        showNotification('Error al actualizar el carrito', 'error');
         window.location.reload();
+    })
+    .finally(() => {
+        cartBatchInFlight = null;
     });
 }
 
+// Si el usuario sale de la página (p. ej. "Proceder al pago") se envía lo pendiente
+window.addEventListener('pagehide', () => flushCartOperations(true));
+
+function renderCartSummary(data) {
+    const items = new Map(data.items.map(item => [String(item.product_id), item]));
+
+    document.querySelectorAll('.cart-item').forEach(element => {
+        const productId = element.getAttribute('data-product-id');
+        // Los cambios que aún esperan su lote ya están reflejados en pantalla
+        if (pendingCartOperations.has(productId)) return;
+
+        const item = items.get(productId);
+        if (!item) {
+            element.remove();
+            return;
+        }
+        const quantityElement = element.querySelector('.quantity');
+        if (quantityElement) quantityElement.textContent = item.quantity;
+        const totalElement = element.querySelector('.item-total');
+        if (totalElement) totalElement.textContent = `$${item.total.toFixed(2)}`;
+    });
+
+    const summaryTotal = document.querySelector('.cart-summary h2');
+    if (summaryTotal) {
+        summaryTotal.textContent = `Total: $${data.subtotal.toFixed(2)}`;
+    }
+    setCartCount(data.item_count);
+
+    // Si no quedan items, mostrar carrito vacío
+    if (document.querySelectorAll('.cart-item').length === 0) {
+        const cartItemsContainer = document.querySelector('.cart-items');
+        if (cartItemsContainer) {
+            cartItemsContainer.innerHTML = `
+                <div class="empty-cart">
+                    <p>Tu carrito está vacío</p>
+                    <a href="/products" class="btn-primary">Seguir comprando</a>
+                </div>
+            `;
+        }
+        
+        const cartSummary = document.querySelector('.cart-summary');
+        if (cartSummary) cartSummary.style.display = 'none';
+    }
+}
+
+// Función para eliminar producto del carrito
+function removeItemFromCart(productId) {
+    // Se oculta al instante; el servidor lo confirma en el siguiente lote
+    const itemToRemove = document.querySelector(`.cart-item[data-product-id="${productId}"]`);
+    if (itemToRemove) itemToRemove.style.display = 'none';
+    queueCartOperation(productId, { op: 'remove' });
+}
+
+// Función para actualizar la cantidad
+function updateQuantity(productId, quantity, quantityElement) {
+    quantityElement.textContent = quantity;
+    queueCartOperation(productId, { op: 'set', quantity: quantity });
+}
+
 function addToCart(productId, quantity) {
     fetch('/add_to_cart', {
         method: 'POST',
@@ -269,7 +330,14 @@ function updateCartCount(change = 0) {
     const cartCount = document.getElementById('cart-count');
     if (cartCount) {
         const currentCount = parseInt(cartCount.textContent) || 0;
-        const newCount = Math.max(0, currentCount + change);
+        setCartCount(currentCount + change);
+    }
+}
+
+function setCartCount(count) {
+    const cartCount = document.getElementById('cart-count');
+    if (cartCount) {
+        const newCount = Math.max(0, count);
         cartCount.textContent = newCount;
         
         // Mostrar u ocultar el contador según si hay items
@@ -279,4 +347,116 @@ function updateCartCount(change = 0) {
             cartCount.style.display = 'none';
         }
     }
-}
\ No newline at end of file
+}
+
+// Subida reanudable de videos: el archivo se envía en partes con checksum y,
+// si se corta la red, se retoma desde el último offset confirmado por el servidor
+function initChunkedVideoUpload(form) {
+    const fileInput = form.querySelector('input[type="file"][name="video_file"]');
+    const progress = form.querySelector('.upload-progress');
+    const submitButton = form.querySelector('button[type="submit"]');
+
+    form.addEventListener('submit', async function(event) {
+        // Sin archivo nuevo o sin Web Crypto: envío normal del formulario
+        if (!fileInput || !fileInput.files.length || !window.crypto || !window.crypto.subtle) {
+            return;
+        }
+        event.preventDefault();
+
+        const file = fileInput.files[0];
+        const chunkSize = parseInt(form.dataset.chunkSize) || 5 * 1024 * 1024;
+        const storageKey = `video-upload:${form.dataset.videoId || 'new'}:${file.name}:${file.size}:${file.lastModified}`;
+
+        if (submitButton) submitButton.disabled = true;
+        if (progress) {
+            progress.hidden = false;
+            progress.max = file.size;
+        }
+
+        try {
+            let uploadUrl = localStorage.getItem(storageKey);
+            let offset = uploadUrl ? await getUploadOffset(uploadUrl) : null;
+
+            if (offset === null) {
+                const formData = new FormData(form);
+                const response = await fetch(form.dataset.chunkedUpload, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({
+                        filename: file.name,
+                        size: file.size,
+                        video_id: form.dataset.videoId || null,
+                        title: formData.get('title'),
+                        description: formData.get('description'),
+                        category: formData.get('category'),
+                        is_featured: formData.get('is_featured') !== null
+                    })
+                });
+                const data = await response.json();
+                if (!response.ok) throw new Error(data.message);
+                uploadUrl = response.headers.get('Location');
+                offset = 0;
+                localStorage.setItem(storageKey, uploadUrl);
+            }
+
+            let retries = 0;
+            while (offset < file.size) {
+                if (progress) progress.value = offset;
+                const chunk = await file.slice(offset, offset + chunkSize).arrayBuffer();
+                const digest = new Uint8Array(await crypto.subtle.digest('SHA-256', chunk));
+                const checksum = btoa(String.fromCharCode.apply(null, digest));
+
+                let response;
+                try {
+                    response = await fetch(uploadUrl, {
+                        method: 'PATCH',
+                        headers: {
+                            'Content-Type': 'application/offset+octet-stream',
+                            'Upload-Offset': String(offset),
+                            'Upload-Checksum': `sha256 ${checksum}`
+                        },
+                        body: chunk
+                    });
+                } catch (networkError) {
+                    response = null;
+                }
+
+                if (response && response.ok) {
+                    retries = 0;
+                    offset = parseInt(response.headers.get('Upload-Offset'));
+                    if (response.status === 200) {
+                        const data = await response.json();
+                        localStorage.removeItem(storageKey);
+                        window.location.href = data.redirect;
+                        return;
+                    }
+                    continue;
+                }
+
+                if (response && response.status !== 409 && response.status !== 460 && response.status < 500) {
+                    const data = await response.json();
+                    throw new Error(data.message);
+                }
+
+                // Corte de red, offset desfasado o checksum incorrecto: reintentar con espera creciente
+                if (++retries > 5) throw new Error('No se pudo completar la subida');
+                await new Promise(resolve => setTimeout(resolve, 1000 * 2 ** retries));
+                const serverOffset = await getUploadOffset(uploadUrl);
+                if (serverOffset !== null) offset = serverOffset;
+            }
+        } catch (error) {
+            console.error('Error:', error);
+            showNotification('Error al subir el video: ' + error.message, 'error');
+            if (submitButton) submitButton.disabled = false;
+        }
+    });
+}
+
+async function getUploadOffset(uploadUrl) {
+    try {
+        const response = await fetch(uploadUrl, { method: 'HEAD' });
+        return response.ok ? parseInt(response.headers.get('Upload-Offset')) : null;
+    } catch (error) {
+        return null;
+    }
+}
@@ -0,0 +1,76 @@
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import literal_column
+
+from models import db, Product, User, Order, Video, Venta, VentaDiaria
+from cache import FragmentCache
+
+# 📊 ESTADÍSTICAS DEL PANEL DE ADMINISTRACIÓN
+# Todos los contadores salen de un único SELECT con subconsultas escalares y el
+# resultado se cachea unos segundos: recargar el panel no vuelve a contar tablas.
+
+STATS_TTL = int(os.environ.get('DASHBOARD_STATS_TTL', 30))
+LOW_STOCK_THRESHOLD = int(os.environ.get('LOW_STOCK_THRESHOLD', 5))
+LOW_STOCK_LIMIT = 10
+# En PostgreSQL, usar pg_class.reltuples (estimación de ANALYZE) en vez de COUNT(*) para tablas grandes
+USE_ESTIMATES = os.environ.get('DASHBOARD_USE_ESTIMATES', '').lower() in ('1', 'true', 'yes')
+ESTIMATED_TABLES = {'ventas', 'orders', 'users'}
+
+stats_cache = FragmentCache(default_ttl=STATS_TTL)
+
+
+def _count(model):
+    table = model.__tablename__
+    if USE_ESTIMATES and table in ESTIMATED_TABLES and db.engine.dialect.name == 'postgresql':
+        # reltuples es -1 si la tabla nunca se analizó
+        return literal_column(
+            f"(SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = '{table}'::regclass)"
+        )
+    return db.select(db.func.count()).select_from(model).scalar_subquery()
+
+
+def _revenue_since(day):
+    return (db.select(db.func.coalesce(db.func.sum(VentaDiaria.ingresos), 0))
+            .where(VentaDiaria.fecha >= day)
+            .scalar_subquery())
+
+
+def compute_dashboard_stats():
+    """Contadores e ingresos en una consulta + la lista corta de productos con poco stock"""
+    today = datetime.utcnow().date()
+    week_start = today - timedelta(days=today.weekday())
+
+    row = db.session.execute(db.select(
+        _count(Product).label('product_count'),
+        _count(User).label('user_count'),
+        _count(Order).label('order_count'),
+        _count(Video).label('video_count'),
+        _count(Venta).label('venta_count'),
+        _revenue_since(today).label('revenue_today'),
+        _revenue_since(week_start).label('revenue_week'),
+        db.select(db.func.count()).select_from(Product)
+          .where(Product.stock <= LOW_STOCK_THRESHOLD)
+          .scalar_subquery().label('low_stock_count')
+    )).one()
+
+    stats = dict(row._mapping)
+    stats['low_stock_products'] = [
+        {'id': p.id, 'name': p.name, 'stock': p.stock}
+        for p in (db.session.query(Product.id, Product.name, Product.stock)
+                  .filter(Product.stock <= LOW_STOCK_THRESHOLD)
+                  .order_by(Product.stock, Product.id)
+                  .limit(LOW_STOCK_LIMIT))
+    ] if stats['low_stock_count'] else []
+    stats['low_stock_threshold'] = LOW_STOCK_THRESHOLD
+    stats['estimated'] = USE_ESTIMATES and db.engine.dialect.name == 'postgresql'
+    stats['generated_at'] = datetime.utcnow()
+    return stats
+
+
+def get_dashboard_stats():
+    return stats_cache.get_or_render('dashboard', compute_dashboard_stats)
+
+
+def invalidate_dashboard_stats():
+    stats_cache.invalidate('dashboard')
@@ -0,0 +1,268 @@
+import bisect
+import heapq
+import os
+import threading
+import time
+
+from fuzzy import TrigramIndex
+from models import db, Product
+from search import search_terms
+
+# ⌨️ SUGERENCIAS DE BÚSQUEDA (typeahead)
+# Índice de prefijos en memoria, uno por proceso: una lista ordenada de
+# (clave, id) con bisect. Cada producto aporta su nombre normalizado desde
+# cada palabra ("labial mate rojo", "mate rojo", "rojo"), así "roj" también
+# lo encuentra. Se ordena por popularidad (unidades vendidas).
+# Las rutas de admin actualizan el índice del worker que las atiende; los
+# demás se ponen al día cada SUGGEST_REFRESH_SECONDS trayendo solo los
+# productos con updated_at nuevo (reconstruyen todo si hubo bajas, y cada
+# SUGGEST_REBUILD_SECONDS para refrescar la popularidad).
+# Junto a las claves se mantiene el índice de trigramas de las palabras de
+# los nombres para la búsqueda tolerante a errores sin pg_trgm (fuzzy.py).
+
+REFRESH_SECONDS = int(os.environ.get('SUGGEST_REFRESH_SECONDS', 30))
+REBUILD_SECONDS = int(os.environ.get('SUGGEST_REBUILD_SECONDS', 600))
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+# Rangos más grandes que esto (prefijos cortos) guardan su top-k ya calculado;
+# las altas, ediciones y bajas lo actualizan en el lugar (con margen para las bajas)
+SCAN_LIMIT = 256
+TOP_DEPTH = 64
+MAX_CATEGORIES = 2
+_END = '\U0010ffff'
+
+SUGGEST_COLUMNS = (Product.id, Product.name, Product.category, Product.price,
+                   Product.sold_count, Product.featured, Product.updated_at)
+
+
+def normalize_key(value):
+    return ' '.join(search_terms(value))
+
+
+def name_keys(words):
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+class SuggestIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._keys = []          # [(clave, id)] ordenada
+        self._products = {}      # id -> (rank, nombre, categoría, precio)
+        self._categories = {}    # categoría -> [productos, unidades vendidas]
+        self._top = {}           # prefijo -> [id] para rangos grandes
+        self._trigrams = TrigramIndex()
+        self._built = False
+        self._stale = False
+        self._built_at = 0
+        self._checked_at = 0
+        self._watermark = None
+        self.rebuilds = 0
+        self.incremental = 0
+        self.lookups = 0
+
+    # --- mantenimiento -------------------------------------------------------
+
+    def _add(self, row):
+        product_id, name, category, price, sold_count, featured = row[:6]
+        # Más vendido primero; a igualdad, destacado, nombre más corto, más nuevo
+        rank = (sold_count or 0, bool(featured), -len(name or ''), product_id)
+        self._products[product_id] = (rank, name, category, price)
+        words = search_terms(name)
+        keys = name_keys(words)
+        for key in keys:
+            bisect.insort(self._keys, (key, product_id))
+        self._trigrams.add(product_id, words)
+        totals = self._categories.setdefault(category, [0, 0])
+        totals[0] += 1
+        totals[1] += sold_count or 0
+        for top in self._cached_tops(keys):
+            # El top guardado es exacto: solo puede entrar quien supera al último
+            if product_id not in top and rank > self._rank(top[-1]):
+                top.append(product_id)
+                top.sort(key=self._rank, reverse=True)
+                del top[TOP_DEPTH:]
+
+    def _remove(self, product_id):
+        entry = self._products.pop(product_id, None)
+        if entry is None:
+            return
+        rank, name, category, _ = entry
+        words = search_terms(name)
+        keys = name_keys(words)
+        for key in keys:
+            i = bisect.bisect_left(self._keys, (key, product_id))
+            if i < len(self._keys) and self._keys[i] == (key, product_id):
+                del self._keys[i]
+        self._trigrams.remove(product_id, words)
+        totals = self._categories.get(category)
+        if totals:
+            totals[0] -= 1
+            totals[1] -= rank[0]
+            if totals[0] <= 0:
+                del self._categories[category]
+        for prefix, top in list(self._cached_tops(keys, with_prefix=True)):
+            if product_id in top:
+                top.remove(product_id)
+                if not top:
+                    del self._top[prefix]
+
+    def _cached_tops(self, keys, with_prefix=False):
+        """Tops guardados de los prefijos de `keys` (para actualizarlos en lugar de descartarlos)"""
+        if not self._top:
+            return
+        seen = set()
+        for key in keys:
+            for i in range(1, len(key) + 1):
+                prefix = key[:i]
+                top = self._top.get(prefix)
+                if top is not None and prefix not in seen:
+                    seen.add(prefix)
+                    yield (prefix, top) if with_prefix else top
+
+    def upsert(self, product):
+        """Agrega o reemplaza un producto (después del commit en las rutas de admin)"""
+        row = tuple(getattr(product, column.key) for column in SUGGEST_COLUMNS)
+        with self._lock:
+            if not self._built:
+                return
+            self._remove(product.id)
+            self._add(row)
+            self.incremental += 1
+
+    def remove(self, product_id):
+        with self._lock:
+            self._remove(product_id)
+            self.incremental += 1
+
+    def invalidate(self):
+        """Cambios en bloque (productos de ejemplo): reconstruir en la siguiente consulta"""
+        with self._lock:
+            self._stale = True
+
+    def rebuild(self):
+        self.load(db.session.query(*SUGGEST_COLUMNS).all())
+
+    def load(self, rows):
+        """Reemplaza el índice completo con filas (id, nombre, categoría, precio, vendidos, destacado, updated_at)"""
+        keys, products, categories, trigram_index = [], {}, {}, TrigramIndex()
+        for row in rows:
+            product_id, name, category, price, sold_count, featured, _ = row
+            products[product_id] = ((sold_count or 0, bool(featured), -len(name or ''), product_id),
+                                    name, category, price)
+            words = search_terms(name)
+            keys.extend((key, product_id) for key in name_keys(words))
+            trigram_index.add(product_id, words)
+            totals = categories.setdefault(category, [0, 0])
+            totals[0] += 1
+            totals[1] += sold_count or 0
+        keys.sort()
+        now = time.monotonic()
+        with self._lock:
+            self._keys, self._products, self._categories = keys, products, categories
+            self._trigrams = trigram_index
+            self._top = {}
+            self._watermark = max((row[6] for row in rows if row[6] is not None), default=None)
+            self._built = True
+            self._stale = False
+            self._built_at = self._checked_at = now
+            self.rebuilds += 1
+
+    def sync(self):
+        """Trae los productos modificados desde la última vez; reconstruye si hubo bajas"""
+        total, latest = db.session.query(db.func.count(Product.id), db.func.max(Product.updated_at)).one()
+        if latest is not None and (self._watermark is None or latest > self._watermark):
+            # >= para no perder commits con la misma marca de tiempo que la última vista
+            changed = (db.session.query(*SUGGEST_COLUMNS)
+                       .filter(Product.updated_at >= self._watermark) if self._watermark is not None
+                       else db.session.query(*SUGGEST_COLUMNS))
+            rows = changed.all()
+            with self._lock:
+                for row in rows:
+                    self._remove(row[0])
+                    self._add(row)
+                self._watermark = latest
+                self.incremental += len(rows)
+        with self._lock:
+            consistent = len(self._products) == total
+            self._checked_at = time.monotonic()
+        if not consistent:
+            self.rebuild()
+
+    def refresh(self):
+        now = time.monotonic()
+        if self._built and not self._stale and now - self._checked_at < REFRESH_SECONDS:
+            return
+        if self._built and not self._refresh_lock.acquire(blocking=False):
+            return  # otro hilo ya está al día; mientras tanto se usa el índice actual
+        if not self._built:
+            self._refresh_lock.acquire()
+        try:
+            if not self._built or self._stale or now - self._built_at >= REBUILD_SECONDS:
+                self.rebuild()
+            elif now - self._checked_at >= REFRESH_SECONDS:
+                self.sync()
+        finally:
+            self._refresh_lock.release()
+
+    # --- consultas -----------------------------------------------------------
+
+    def _range(self, prefix):
+        lo = bisect.bisect_left(self._keys, (prefix,))
+        hi = bisect.bisect_left(self._keys, (prefix + _END,), lo)
+        return lo, hi
+
+    def _rank(self, product_id):
+        return self._products[product_id][0]
+
+    def _top_ids(self, prefix, limit):
+        lo, hi = self._range(prefix)
+        if hi - lo <= SCAN_LIMIT:
+            ids = {product_id for _, product_id in self._keys[lo:hi]}
+            return heapq.nlargest(limit, ids, key=self._rank)
+        top = self._top.get(prefix)
+        # Si las bajas lo dejaron más corto que lo pedido, se vuelve a calcular
+        if top is None or len(top) < limit:
+            ids = {product_id for _, product_id in self._keys[lo:hi]}
+            top = self._top[prefix] = heapq.nlargest(TOP_DEPTH, ids, key=self._rank)
+        return top[:limit]
+
+    def suggest(self, query, limit=DEFAULT_LIMIT):
+        """([(categoría, productos)], [(id, nombre, categoría, precio)]) para el prefijo `query`"""
+        prefix = normalize_key(query)
+        if not prefix:
+            return [], []
+        with self._lock:
+            self.lookups += 1
+            ids = self._top_ids(prefix, limit)
+            products = [(product_id, *self._products[product_id][1:]) for product_id in ids]
+            categories = heapq.nlargest(
+                MAX_CATEGORIES,
+                ((category, totals) for category, totals in self._categories.items()
+                 if category and normalize_key(category).startswith(prefix)),
+                key=lambda item: item[1][1])
+        return [(category, totals[0]) for category, totals in categories], products
+
+    def fuzzy(self, query, threshold, limit, exclude=()):
+        """[id] de los productos parecidos a `query`, del más parecido (y más vendido) al menos"""
+        with self._lock:
+            matches = self._trigrams.match(query, threshold)
+            for product_id in exclude:
+                matches.pop(product_id, None)
+            return heapq.nlargest(limit, matches, key=lambda product_id: (matches[product_id], self._rank(product_id)))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'products': len(self._products),
+                'keys': len(self._keys),
+                'fuzzy_words': len(self._trigrams),
+                'cached_prefixes': len(self._top),
+                'lookups': self.lookups,
+                'rebuilds': self.rebuilds,
+                'incremental_updates': self.incremental,
+                'age_seconds': round(time.monotonic() - self._built_at, 1) if self._built else None,
+            }
+
+
+suggest_index = SuggestIndex()
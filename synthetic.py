@@ -0,0 +1,279 @@
+import csv
+import io
+import math
+import random
+import time
+from array import array
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+from werkzeug.security import generate_password_hash
+
+from models import db, User, Product, Cart, CartItem, Order, OrderItem, Venta
+from cart_service import TAX_RATE, SHIPPING_FLAT
+from rollups import backfill_rollups
+
+# 🧪 DATOS SINTÉTICOS PARA PRUEBAS DE CAPACIDAD
+# Genera millones de filas en lotes: cada lote se arma, se inserta (COPY en
+# PostgreSQL, executemany en los demás) y se confirma antes de armar el
+# siguiente, así la memoria depende del tamaño del lote y del catálogo
+# (id y precio de cada producto en arrays compactos), no del total de filas.
+# Distribuciones: categorías sesgadas, productos más vendidos tipo Zipf,
+# clientes frecuentes y fechas con temporadas (Navidad, Buen Fin, 14 de
+# febrero, Día de las Madres), fines de semana y horario nocturno.
+
+BATCH_SIZE = 10000
+PASSWORD = 'synth123'
+
+CATEGORY_WEIGHTS = {'labios': 45, 'rostro': 35, 'ojos': 20}
+TIPOS = {
+    'labios': ['Labial', 'Gloss', 'Delineador de labios', 'Bálsamo', 'Tinta'],
+    'rostro': ['Base', 'Corrector', 'Polvo', 'Rubor', 'Iluminador', 'Bronceador', 'Primer'],
+    'ojos': ['Sombra', 'Máscara', 'Delineador', 'Paleta', 'Cejas'],
+}
+ACABADOS = ['Mate', 'Satinado', 'Brillante', 'Metálico', 'Natural', 'Intenso', 'Líquido', 'Compacto', 'Cremoso']
+COLORES = ['Rojo', 'Rosa', 'Nude', 'Coral', 'Vino', 'Durazno', 'Café', 'Negro', 'Dorado', 'Ruby', 'Malva', 'Bronce']
+
+PRODUCT_ZIPF = 1.07   # pocos productos concentran la mayoría de las ventas
+CUSTOMER_ZIPF = 0.8   # clientes frecuentes
+LINES_PER_ORDER = ([1, 2, 3, 4, 5, 6], [40, 25, 15, 10, 6, 4])
+QUANTITY = ([1, 2, 3], [80, 15, 5])
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 1, 2, 3, 4, 5, 6, 7, 8, 8, 7, 7, 8, 9, 11, 13, 14, 13, 9, 4]
+
+
+def _dialect():
+    return db.engine.dialect.name
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return value
+
+
+def _copy(table, rows):
+    """COPY ... FROM STDIN en CSV por la conexión de la sesión (PostgreSQL)"""
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_csv_value(row[column]) for column in columns])
+    buffer.seek(0)
+    with db.session.connection().connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def _insert(model, rows, returning=False):
+    """Inserta un lote. Con returning devuelve los ids en el orden de `rows`."""
+    if returning:
+        stmt = db.insert(model).returning(model.id, sort_by_parameter_order=True)
+        return list(db.session.execute(stmt, rows).scalars())
+    if _dialect() == 'postgresql':
+        _copy(model.__tablename__, rows)
+    else:
+        db.session.execute(db.insert(model), rows)
+
+
+def _zipf_cum_weights(count, exponent):
+    return array('d', accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def season_weight(day):
+    """Peso relativo de ventas de un día"""
+    weight = 1.0
+    if day.weekday() >= 5:
+        weight += 0.25
+    if day.month == 12 and day.day <= 24:
+        weight += 0.5 + day.day / 24          # sube hasta Nochebuena
+    elif day.month == 11 and 14 <= day.day <= 20:
+        weight += 1.0                          # Buen Fin
+    elif day.month == 2 and 7 <= day.day <= 14:
+        weight += 0.8                          # 14 de febrero
+    elif day.month == 5 and 1 <= day.day <= 10:
+        weight += 1.2                          # Día de las Madres
+    elif day.month == 1:
+        weight -= 0.3                          # cuesta de enero
+    return weight
+
+
+class SyntheticData:
+    def __init__(self, seed=42, batch_size=BATCH_SIZE, days=365, report=print):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.report = report
+        self.run = int(time.time())
+
+        end = date.today()
+        self.days = [end - timedelta(days=n) for n in range(days - 1, -1, -1)]
+        # Temporadas y un crecimiento de hasta 50% a lo largo del periodo
+        self.day_weights = array('d', accumulate(
+            season_weight(day) * (1 + 0.5 * n / max(days - 1, 1)) for n, day in enumerate(self.days)))
+        self.hour_weights = list(accumulate(HOUR_WEIGHTS))
+
+        self.product_ids = self.prices = self.product_rank = self.product_weights = None
+        self.user_ids = self.user_rank = self.user_weights = None
+
+    # --- utilidades ---------------------------------------------------------
+
+    def _batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield start, min(self.batch_size, total - start)
+
+    def _progress(self, label, done, total, started):
+        elapsed = time.perf_counter() - started
+        self.report(f"   {label:<10} {done:>10,}/{total:,}  ({done / elapsed if elapsed else 0:,.0f} filas/s)")
+
+    def _moment(self):
+        day = self.rng.choices(self.days, cum_weights=self.day_weights)[0]
+        hour = self.rng.choices(range(24), cum_weights=self.hour_weights)[0]
+        return datetime(day.year, day.month, day.day, hour, self.rng.randrange(60), self.rng.randrange(60))
+
+    def _products_for(self, k):
+        """Índices (en el catálogo) de k productos distintos, sesgados a los más vendidos"""
+        picked = self.rng.choices(self.product_rank, cum_weights=self.product_weights, k=k)
+        return list(dict.fromkeys(picked))
+
+    def _customer(self):
+        return self.user_ids[self.rng.choices(self.user_rank, cum_weights=self.user_weights)[0]]
+
+    def load_catalog(self):
+        """ids y precios de todos los productos y ids de usuarios, en arrays compactos"""
+        self.product_ids, self.prices = array('l'), array('d')
+        for product_id, price in db.session.execute(
+                db.select(Product.id, Product.price).order_by(Product.id).execution_options(yield_per=50000)):
+            self.product_ids.append(product_id)
+            self.prices.append(price)
+        self.user_ids = array('l', db.session.execute(
+            db.select(User.id).order_by(User.id).execution_options(yield_per=50000)).scalars())
+
+        # El ranking de popularidad no sigue el id: se baraja una vez por corrida
+        self.product_rank = array('l', range(len(self.product_ids)))
+        self.rng.shuffle(self.product_rank)
+        self.product_weights = _zipf_cum_weights(len(self.product_ids), PRODUCT_ZIPF)
+        self.user_rank = array('l', range(len(self.user_ids)))
+        self.rng.shuffle(self.user_rank)
+        self.user_weights = _zipf_cum_weights(len(self.user_ids), CUSTOMER_ZIPF)
+
+    # --- tablas -------------------------------------------------------------
+
+    def products(self, total):
+        categories, weights = zip(*CATEGORY_WEIGHTS.items())
+        offset = Product.query.count()
+        started = time.perf_counter()
+        for start, size in self._batches(total):
+            rows = []
+            for n in range(offset + start, offset + start + size):
+                category = self.rng.choices(categories, weights)[0]
+                name = f"{self.rng.choice(TIPOS[category])} {self.rng.choice(ACABADOS)} {self.rng.choice(COLORES)} {n}"
+                # Precios log-normales terminados en 9 (la mayoría entre 100 y 600)
+                price = max(49, round(self.rng.lognormvariate(math.log(250), 0.6), -1) - 1)
+                rows.append({
+                    'name': name[:100],
+                    'description': f"{name}, acabado {self.rng.choice(ACABADOS).lower()} de larga duración",
+                    'price': float(price),
+                    'category': category,
+                    'image_url': '',
+                    'stock': int(self.rng.paretovariate(1.5) * 20),
+                    'featured': self.rng.random() < 0.002
+                })
+            _insert(Product, rows)
+            db.session.commit()
+            self._progress('productos', start + size, total, started)
+
+    def users(self, total):
+        # Un solo hash para todos: calcularlo por usuario tomaría horas
+        password_hash = generate_password_hash(PASSWORD)
+        first = self.days[0]
+        started = time.perf_counter()
+        new_ids = array('l')
+        for start, size in self._batches(total):
+            rows = [{
+                'username': f'synth{self.run}_{n}',
+                'email': f'synth{self.run}_{n}@example.com',
+                'password_hash': password_hash,
+                'role': 'customer',
+                'created_at': datetime(first.year, first.month, first.day)
+                + timedelta(seconds=self.rng.randrange(len(self.days) * 86400))
+            } for n in range(start, start + size)]
+            new_ids.extend(_insert(User, rows, returning=True))
+            db.session.commit()
+            self._progress('usuarios', start + size, total, started)
+        return new_ids
+
+    def carts(self, total, user_ids):
+        """Carritos activos para usuarios recién creados (no tienen otro activo)"""
+        total = min(total, len(user_ids))
+        owners = self.rng.sample(range(len(user_ids)), total)
+        started = time.perf_counter()
+        for start, size in self._batches(total):
+            cart_ids = _insert(Cart, [{
+                'user_id': user_ids[i], 'is_active': True, 'created_at': self._moment()
+            } for i in owners[start:start + size]], returning=True)
+            _insert(CartItem, [{
+                'cart_id': cart_id,
+                'product_id': self.product_ids[i],
+                'quantity': self.rng.choices(*QUANTITY)[0],
+                'added_at': datetime.utcnow()
+            } for cart_id in cart_ids
+                for i in self._products_for(self.rng.choices(*LINES_PER_ORDER)[0])])
+            db.session.commit()
+            self._progress('carritos', start + size, total, started)
+
+    def orders(self, total):
+        """Órdenes pagadas con sus líneas y una venta por línea"""
+        started = time.perf_counter()
+        for start, size in self._batches(total):
+            orders, lines = [], []
+            for n in range(start, start + size):
+                user_id, moment = self._customer(), self._moment()
+                items = [(i, self.rng.choices(*QUANTITY)[0])
+                         for i in self._products_for(self.rng.choices(*LINES_PER_ORDER)[0])]
+                subtotal = sum(self.prices[i] * quantity for i, quantity in items)
+                orders.append({
+                    'user_id': user_id,
+                    'total': round(subtotal * (1 + TAX_RATE) + SHIPPING_FLAT, 2),
+                    'status': 'paid',
+                    'payment_id': f'SYN{self.run}-{n}',
+                    'created_at': moment
+                })
+                lines.append((user_id, moment, items))
+
+            order_ids = _insert(Order, orders, returning=True)
+            _insert(OrderItem, [{
+                'order_id': order_id, 'product_id': self.product_ids[i],
+                'quantity': quantity, 'price': self.prices[i]
+            } for order_id, (_, _, items) in zip(order_ids, lines) for i, quantity in items])
+            _insert(Venta, [{
+                'producto_id': self.product_ids[i], 'cantidad': quantity,
+                'usuario_id': user_id, 'fecha': moment
+            } for user_id, moment, items in lines for i, quantity in items])
+            db.session.commit()
+            self._progress('órdenes', start + size, total, started)
+
+
+def generate(products=0, users=0, carts=0, orders=0, seed=42, batch_size=BATCH_SIZE, days=365, report=print):
+    """Genera los datos pedidos y recalcula rollups y estadísticas del planificador"""
+    data = SyntheticData(seed=seed, batch_size=batch_size, days=days, report=report)
+    started = time.perf_counter()
+
+    if products:
+        data.products(products)
+    new_users = data.users(users) if users else array('l')
+    if carts or orders:
+        data.load_catalog()
+        if not data.product_ids or not data.user_ids:
+            raise ValueError('Se necesitan productos y usuarios para generar carritos u órdenes')
+    if carts:
+        if not new_users:
+            raise ValueError('Los carritos se crean para los usuarios de esta corrida: usa también --users')
+        data.carts(carts, new_users)
+    if orders:
+        data.orders(orders)
+        report(f"   rollups    {backfill_rollups():>10,} filas (día, producto)")
+
+    # Estadísticas frescas para el planificador después de una carga masiva
+    db.session.execute(db.text('ANALYZE'))
+    db.session.commit()
+    report(f"✅ Datos sintéticos generados en {time.perf_counter() - started:.1f}s")
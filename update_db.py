@@ -1,7 +1,9 @@
 # update_db.py
-from app import app, db
+from app import create_app, db
 from models import Video
 
+app = create_app()
+
 with app.app_context():
     try:
         # Agregar la columna is_featured si no existe
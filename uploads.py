@@ -0,0 +1,179 @@
+import base64
+import fcntl
+import hashlib
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+from werkzeug.utils import secure_filename
+
+# ⬆️ SUBIDAS REANUDABLES POR PARTES (estilo tus)
+# 1. POST crea la subida con el tamaño total y los datos del video.
+# 2. PATCH envía cada parte con Upload-Offset y Upload-Checksum (sha256).
+# 3. HEAD devuelve el offset actual para reanudar tras un corte de red.
+# El estado vive en disco (<VIDEO_UPLOAD_FOLDER>/.partial) para que cualquier
+# worker pueda atender cualquier parte; la memoria usada es solo el búfer de lectura.
+# Cada escritura toma un flock exclusivo sobre el .part: dos PATCH simultáneos
+# con el mismo Upload-Offset no pueden agregar los dos (el segundo recibe 409).
+
+PARTIAL_SUBFOLDER = '.partial'
+READ_BLOCK = 64 * 1024
+STALE_UPLOAD_SECONDS = 24 * 3600
+
+
+class UploadError(Exception):
+    """Error del protocolo de subida; `status` es el código HTTP a devolver"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _partial_folder(upload_folder):
+    folder = os.path.join(upload_folder, PARTIAL_SUBFOLDER)
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _paths(upload_folder, upload_id):
+    try:
+        upload_id = uuid.UUID(upload_id).hex
+    except (ValueError, TypeError):
+        raise UploadError('Subida no encontrada', 404)
+    folder = _partial_folder(upload_folder)
+    return os.path.join(folder, f'{upload_id}.json'), os.path.join(folder, f'{upload_id}.part')
+
+
+def load_upload(upload_folder, upload_id):
+    """Metadatos de la subida con su offset actual (bytes ya recibidos)"""
+    meta_path, part_path = _paths(upload_folder, upload_id)
+    if not os.path.exists(meta_path):
+        raise UploadError('Subida no encontrada', 404)
+    with open(meta_path) as f:
+        meta = json.load(f)
+    meta['offset'] = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    return meta
+
+
+def purge_stale_uploads(upload_folder, max_age=STALE_UPLOAD_SECONDS):
+    """Borra las subidas abandonadas (sin actividad en `max_age` segundos)"""
+    folder = _partial_folder(upload_folder)
+    limit = time.time() - max_age
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        try:
+            if os.path.getmtime(path) < limit:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def create_upload(upload_folder, filename, size, max_size, fields):
+    """Registra una subida nueva y devuelve su id"""
+    purge_stale_uploads(upload_folder)
+    if size <= 0 or size > max_size:
+        raise UploadError(f'Tamaño inválido (máximo {max_size // (1024 * 1024)} MB)', 413)
+
+    upload_id = uuid.uuid4().hex
+    meta_path, part_path = _paths(upload_folder, upload_id)
+    meta = {
+        'id': upload_id,
+        'filename': secure_filename(filename),
+        'size': size,
+        'fields': fields,
+        'created_at': datetime.utcnow().isoformat()
+    }
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+    open(part_path, 'wb').close()
+    return upload_id
+
+
+@contextmanager
+def _locked_part(part_path):
+    """Abre el .part con un lock exclusivo; 409 si otra petición lo está usando"""
+    try:
+        f = open(part_path, 'r+b')
+    except FileNotFoundError:
+        raise UploadError('Subida no encontrada', 404)
+    with f:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadError('Otra parte de esta subida se está escribiendo', 409)
+        try:
+            yield f
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def parse_checksum(header):
+    """'sha256 <base64>' -> digest en bytes (None si no se envió)"""
+    if not header:
+        return None
+    algorithm, _, value = header.partition(' ')
+    if algorithm.lower() != 'sha256':
+        raise UploadError('Algoritmo de checksum no soportado', 400)
+    try:
+        return base64.b64decode(value)
+    except ValueError:
+        raise UploadError('Checksum inválido', 400)
+
+
+def append_chunk(upload_folder, upload_id, offset, stream, checksum=None):
+    """Agrega una parte en `offset` leyendo el stream por bloques. Devuelve el nuevo offset.
+
+    Si el checksum no coincide la parte se descarta (se trunca al offset anterior).
+    """
+    meta = load_upload(upload_folder, upload_id)
+    _, part_path = _paths(upload_folder, upload_id)
+    digest = hashlib.sha256()
+    with _locked_part(part_path) as f:
+        # El offset se compara con el lock tomado: es el tamaño real en este momento
+        current = os.fstat(f.fileno()).st_size
+        if offset != current:
+            raise UploadError(f"Offset incorrecto, se esperaba {current}", 409)
+        f.seek(offset)
+        written = 0
+        while True:
+            block = stream.read(READ_BLOCK)
+            if not block:
+                break
+            written += len(block)
+            if offset + written > meta['size']:
+                f.truncate(offset)
+                raise UploadError('La parte excede el tamaño declarado', 413)
+            digest.update(block)
+            f.write(block)
+
+        if checksum is not None and digest.digest() != checksum:
+            f.truncate(offset)
+            raise UploadError('Checksum incorrecto', 460)
+
+    return offset + written
+
+
+def complete_upload(upload_folder, upload_id):
+    """Mueve el archivo completo a la carpeta de videos (rename atómico).
+
+    Devuelve (ruta relativa a static/, ruta en disco, campos del formulario).
+    """
+    meta = load_upload(upload_folder, upload_id)
+    meta_path, part_path = _paths(upload_folder, upload_id)
+    unique_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{meta['filename']}"
+    final_path = os.path.join(upload_folder, unique_filename)
+    with _locked_part(part_path) as f:
+        if os.fstat(f.fileno()).st_size != meta['size']:
+            raise UploadError('La subida aún no está completa', 409)
+        os.replace(part_path, final_path)
+    os.remove(meta_path)
+    return f"videos/{unique_filename}", final_path, meta['fields']
+
+
+def discard_upload(upload_folder, upload_id):
+    for path in _paths(upload_folder, upload_id):
+        if os.path.exists(path):
+            os.remove(path)